@@ -0,0 +1,60 @@
+import sys
+
+class AuthorIndex:
+    """
+    A secondary index from authors to their books.
+    Books without an author are indexed under None.
+
+    Finding the books of an author is O(1) plus the amount of books found.
+    Adding and removing a book are O(1) -- the books of every author are kept in a dictionary keyed by the id of the book
+    (in the order they were added), so removing a book never scans the other books by the same author (e.g. every book without an author).
+    """
+
+    def __init__(self, books=(), titles=None):
+        """ 
+        Creates a new author index holding the specified books. 
+        titles is accepted like the other secondary indexes, but books are indexed by author only. 
+        """
+        self._books_by_author = dict()
+        # how many more times than once a book (the same object) was added, by id -- almost always empty
+        self._extra_copies = dict()
+        for book in books:
+            self.add(book)
+
+    def add(self, book, title=None):
+        """ Adds the specified book to the index. """
+        books = self._books_by_author.setdefault(book.author(), dict())
+        book_id = id(book)
+        if book_id in books:
+            self._extra_copies[book_id] = self._extra_copies.get(book_id, 0) + 1
+        else:
+            books[book_id] = book
+
+    def remove(self, book, title=None):
+        """ Removes the specified book (the same object that was added) from the index. """
+        books = self._books_by_author.get(book.author())
+        book_id = id(book)
+        if books is None or book_id not in books:
+            return
+        extra_copies = self._extra_copies.get(book_id)
+        if extra_copies is not None:
+            if extra_copies == 1:
+                del self._extra_copies[book_id]
+            else:
+                self._extra_copies[book_id] = extra_copies - 1
+            return
+        del books[book_id]
+        if not books:
+            del self._books_by_author[book.author()]
+
+    def find(self, author):
+        """ Returns a list of the books by author (or of the books without an author if author is None). """
+        books = self._books_by_author.get(author, {})
+        if not self._extra_copies:
+            return list(books.values())
+        return [book for book_id, book in books.items() for _ in range(1 + self._extra_copies.get(book_id, 0))]
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the index itself in bytes (the books and authors are shared with the library and not counted). """
+        return (sys.getsizeof(self._books_by_author) + sum(map(sys.getsizeof, self._books_by_author.values()))
+            + sum(sys.getsizeof(book_id) for books in self._books_by_author.values() for book_id in books) + sys.getsizeof(self._extra_copies))
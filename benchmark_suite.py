@@ -0,0 +1,240 @@
+"""
+A reproducible benchmark suite sweeping catalog sizes and library backends, writing machine-readable results.
+
+Every backend (LinearSearchLMS, BinarySearchLMS with every title_keys key function, and HashMapLMS) is measured
+for every size on construction, find (hit), find (miss), shelve and unshelve. Workloads are generated from a seed,
+so two runs with the same arguments measure the same operations on the same books.
+
+USAGE:
+
+python benchmark_suite.py --json results.json                                   # run the whole suite and save the results
+python benchmark_suite.py --sizes 1000 10000 --backends hash binary-fnv1a_64 --csv results.csv
+python benchmark_suite.py --json current.json --baseline results.json          # run again and flag regressions against a saved run
+python benchmark_suite.py --compare current.json --baseline results.json       # compare two saved runs without running anything
+python benchmark_suite.py --sizes 100000 --operations construction --memory    # also measure the memory used by every library
+
+The script exits with status 1 if any regression is found, so it can be used in CI.
+"""
+import argparse
+import csv
+import functools
+import json
+import platform
+import sys
+import time
+
+from timer import *
+from book import Book
+from binary_search_lms import BinarySearchLMS
+from linear_search_lms import LinearSearchLMS
+from hash_map_lms import HashMapLMS
+from benchmarks import generate_books, sample_titles
+from memory_usage import BytesFormatter, library_memory_usage
+import title_keys
+
+##################################################
+############### SUITE CONFIGURATION ##############
+##################################################
+
+BACKENDS = {
+	"linear": LinearSearchLMS,
+	**{f"binary-{key.__name__}": functools.partial(BinarySearchLMS, key=key) for key in title_keys.KEY_FUNCTIONS},
+	"hash": HashMapLMS,
+}
+
+OPERATIONS = ("construction", "find_hit", "find_miss", "shelve", "unshelve")
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# the columns of every result (and of the csv file) -- the memory columns are only filled for construction, when memory is measured
+RESULT_FIELDS = ("size", "backend", "operation", "count", "mean_ns", "min_ns", "p50_ns", "p90_ns", "p99_ns", "max_ns", "retained_bytes", "peak_bytes", "bytes_per_book", "copy_bytes")
+
+##################################################
+################### RUNNING ######################
+##################################################
+
+def run_suite(sizes=DEFAULT_SIZES, backend_names=tuple(BACKENDS), operations=OPERATIONS, amount_of_operations=1000, amount_of_constructions=3, seed=0, batch_size=1, progress=None, measure_memory_usage=False):
+	"""
+	Measures every operation of every backend for every size and returns the results (a list of dictionaries with RESULT_FIELDS).
+
+	sizes (optional) - the amounts of books in the libraries.
+	backend_names (optional) - the names of the backends to measure (keys of BACKENDS).
+	operations (optional) - the operations to measure (see OPERATIONS).
+	amount_of_operations (optional) - the amount of finds, shelves and unshelves measured for every backend and size.
+	amount_of_constructions (optional) - the amount of times every library is constructed.
+	seed (optional) - the seed of the generated books and titles.
+	batch_size (optional) - the amount of finds timed together (see measure_calls). Batches only give the percentiles of batch averages.
+	progress (optional) - a function called with every result once it is measured (e.g. to print it).
+	measure_memory_usage (optional) - if True, the memory used to construct every library (see memory_usage.library_memory_usage) is added to its construction result.
+		Memory is measured in an extra, untimed construction, since tracing memory slows allocations down.
+	"""
+	results = []
+	for size in sizes:
+		books = generate_books(size, seed)
+		new_books = [Book(f"New {book.title()}", book.author()) for book in generate_books(amount_of_operations, seed + 1)]
+		hit_titles = sample_titles(books, amount_of_operations, seed)
+		missing_titles = [f"Missing {title}" for title in sample_titles(books, amount_of_operations, seed + 2)]
+		for backend_name in backend_names:
+			measurements = _measure_backend(BACKENDS[backend_name], books, new_books, hit_titles, missing_titles, operations, amount_of_constructions, batch_size)
+			for operation, benchmarker in measurements:
+				result = _result(size, backend_name, operation, benchmarker)
+				if measure_memory_usage and operation == "construction":
+					memory_usage = library_memory_usage(BACKENDS[backend_name], books)
+					result.update({field: round(memory_usage[field], 1) for field in RESULT_FIELDS[10:]})
+				results.append(result)
+				if progress is not None:
+					progress(result)
+	return results
+
+def _measure_backend(library_type, books, new_books, hit_titles, missing_titles, operations, amount_of_constructions, batch_size):
+	""" Measures the operations of one backend and returns a list of (operation, benchmarker). """
+	measurements = []
+	library, benchmarker = measure_calls(library_type, [(books,)] * amount_of_constructions, disable_gc=True)
+	if "construction" in operations:
+		measurements.append(("construction", benchmarker))
+	# lookups are warmed up with their first titles (taken twice, so every title is still timed), changes are not (shelving the same book twice would change what is measured)
+	warmup = min(100, len(hit_titles))
+	read_measurement = dict(batch_size=batch_size, warmup=warmup, disable_gc=True, subtract_overhead=True)
+	write_measurement = dict(disable_gc=True, subtract_overhead=True)
+	if "find_hit" in operations:
+		measurements.append(("find_hit", measure_calls(library.find, [(title,) for title in hit_titles[:warmup] + hit_titles], **read_measurement)[1]))
+	if "find_miss" in operations:
+		measurements.append(("find_miss", measure_calls(library.find, [(title,) for title in missing_titles[:warmup] + missing_titles], **read_measurement)[1]))
+	# the shelved books are unshelved again, so every backend ends with the books it was constructed with
+	shelve_benchmarker = measure_calls(library.shelve, [(book,) for book in new_books], **write_measurement)[1]
+	if "shelve" in operations:
+		measurements.append(("shelve", shelve_benchmarker))
+	unshelve_benchmarker = measure_calls(library.unshelve, [(book.title(),) for book in new_books], **write_measurement)[1]
+	if "unshelve" in operations:
+		measurements.append(("unshelve", unshelve_benchmarker))
+	return measurements
+
+def _result(size, backend_name, operation, benchmarker):
+	""" Returns the result of one measurement as a dictionary with RESULT_FIELDS. """
+	return {
+		"size": size,
+		"backend": backend_name,
+		"operation": operation,
+		"count": benchmarker.count(),
+		"mean_ns": round(benchmarker.average(), 1),
+		"min_ns": round(benchmarker.minimum(), 1),
+		"p50_ns": round(benchmarker.percentile(50), 1),
+		"p90_ns": round(benchmarker.percentile(90), 1),
+		"p99_ns": round(benchmarker.percentile(99), 1),
+		"max_ns": round(benchmarker.maximum(), 1),
+	}
+
+def print_result(result):
+	""" Prints one result as a line of the progress table. """
+	mean, mean_name = SecondsFormatter.AUTO.convert(result["mean_ns"])
+	p99, p99_name = SecondsFormatter.AUTO.convert(result["p99_ns"])
+	memory_text = ""
+	if result.get("retained_bytes") is not None:
+		retained, retained_name = BytesFormatter.AUTO.convert(result["retained_bytes"])
+		memory_text = f" retained {retained:8.3f} {retained_name:<10} ({result['bytes_per_book']:.1f} bytes per book)"
+	print(f"{result['size']:>9} {result['backend']:<26} {result['operation']:<13} mean {mean:8.3f} {mean_name:<12} p99 {p99:8.3f} {p99_name:<12}{memory_text}")
+
+##################################################
+################ SAVING RESULTS ##################
+##################################################
+
+def save_json(results, path, arguments):
+	""" Saves the results as JSON, with the arguments and environment of the run (so saved runs can be told apart). """
+	document = {
+		"metadata": {
+			"arguments": arguments,
+			"python": platform.python_version(),
+			"implementation": platform.python_implementation(),
+			"platform": platform.platform(),
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		},
+		"results": results,
+	}
+	with open(path, "w") as json_file:
+		json.dump(document, json_file, indent=1)
+
+def load_json(path):
+	""" Returns the results saved with save_json at path. """
+	with open(path) as json_file:
+		return json.load(json_file)["results"]
+
+def save_csv(results, path):
+	""" Saves the results as a csv file with RESULT_FIELDS as headers. """
+	with open(path, "w", newline="") as csv_file:
+		writer = csv.DictWriter(csv_file, RESULT_FIELDS)
+		writer.writeheader()
+		writer.writerows(results)
+
+##################################################
+############## REGRESSION CHECKING ###############
+##################################################
+
+def compare_results(baseline, current, statistic="p50_ns", threshold=0.25):
+	"""
+	Compares the statistic of every measurement in current with the same measurement (size, backend and operation) in baseline.
+	Returns a list of (result, baseline result, ratio) for the measurements at least threshold (a fraction) slower than the baseline.
+	Measurements missing from either run are ignored.
+	"""
+	baseline_by_key = {(result["size"], result["backend"], result["operation"]): result for result in baseline}
+	regressions = []
+	for result in current:
+		baseline_result = baseline_by_key.get((result["size"], result["backend"], result["operation"]))
+		if baseline_result is None or not baseline_result.get(statistic) or result.get(statistic) is None:
+			continue
+		ratio = result[statistic] / baseline_result[statistic]
+		if ratio > 1 + threshold:
+			regressions.append((result, baseline_result, ratio))
+	return regressions
+
+def print_regressions(regressions, statistic):
+	if not regressions:
+		print(f"No regressions ({statistic}).")
+		return
+	print(f"{len(regressions)} regressions ({statistic}):")
+	formatter = SecondsFormatter.AUTO if statistic.endswith("_ns") else BytesFormatter.AUTO
+	for result, baseline_result, ratio in regressions:
+		current_time, current_time_name = formatter.convert(result[statistic])
+		baseline_time, baseline_time_name = formatter.convert(baseline_result[statistic])
+		print(f"{result['size']:>9} {result['backend']:<26} {result['operation']:<13} {baseline_time:8.3f} {baseline_time_name:<12} -> {current_time:8.3f} {current_time_name:<12} ({ratio:.2f}x)")
+
+##################################################
+###################### MAIN ######################
+##################################################
+
+def main(arguments=None):
+	parser = argparse.ArgumentParser(description="Runs the library benchmark suite and saves or compares its results.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="the amounts of books in the libraries")
+	parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+	parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+	parser.add_argument("--lookups", type=int, default=1000, help="the amount of finds, shelves and unshelves measured for every backend and size")
+	parser.add_argument("--constructions", type=int, default=3, help="the amount of times every library is constructed")
+	parser.add_argument("--batch-size", type=int, default=1, help="the amount of finds timed together")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--memory", action="store_true", help="also measure the memory used to construct every library")
+	parser.add_argument("--json", help="a file to save the results to as JSON")
+	parser.add_argument("--csv", help="a file to save the results to as csv")
+	parser.add_argument("--baseline", help="a JSON file saved by an earlier run to check the results against")
+	parser.add_argument("--compare", help="a JSON file saved by an earlier run to check against --baseline instead of running the suite")
+	parser.add_argument("--statistic", choices=RESULT_FIELDS[4:], default="p50_ns", help="the statistic compared with the baseline")
+	parser.add_argument("--threshold", type=float, default=0.25, help="how much slower (as a fraction) a measurement must be to be a regression")
+	arguments = parser.parse_args(arguments)
+
+	if arguments.compare is not None:
+		if arguments.baseline is None:
+			parser.error("--compare needs a --baseline")
+		results = load_json(arguments.compare)
+	else:
+		results = run_suite(arguments.sizes, arguments.backends, arguments.operations, arguments.lookups, arguments.constructions, arguments.seed, arguments.batch_size, print_result, arguments.memory)
+		if arguments.json is not None:
+			save_json(results, arguments.json, vars(arguments))
+		if arguments.csv is not None:
+			save_csv(results, arguments.csv)
+
+	if arguments.baseline is not None:
+		regressions = compare_results(load_json(arguments.baseline), results, arguments.statistic, arguments.threshold)
+		print_regressions(regressions, arguments.statistic)
+		return 1 if regressions else 0
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,570 @@
+"""
+Benchmarks comparing the library management systems and their building blocks.
+
+USAGE:
+
+python benchmarks.py <benchmark name> [<benchmark name> ...]
+
+Running the script without a benchmark name lists the available benchmarks.
+"""
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+
+from timer import *
+from memory_usage import BytesFormatter, measure_memory, library_memory_usage
+from book import Book
+from book_catalog import BookCatalog
+from binary_search_lms import BinarySearchLMS
+from sorted_blocks_lms import SortedBlocksLMS
+from linear_search_lms import LinearSearchLMS
+from hash_map_lms import HashMapLMS
+from library_management_system import CopyPolicy
+from title_normalisation import CASE_INSENSITIVE
+import title_keys
+import book_csv
+from library_snapshot import save_snapshot, load_snapshot
+from full_text_index import FullTextIndex
+from lookup_cache import CachedLMS, EvictionPolicy
+from self_organising_lms import SelfOrganisingLMS, OrganisingStrategy
+from concurrent_lms import ConcurrentLMS, StripedLMS
+from process_sharded_lms import ProcessShardedLMS
+
+##################################################
+################# BENCHMARK DATA #################
+##################################################
+
+def generate_books(amount_of_books, seed=0):
+	"""
+	Generates amount_of_books books with random titles and authors.
+	The same seed always generates the same books.
+
+	amount_of_books - the amount of books to generate.
+	seed (optional) - the seed of the random generator.
+	"""
+	generator = random.Random(seed)
+	letters = "abcdefghijklmnopqrstuvwxyz"
+	words = ["".join(generator.choices(letters, k=generator.randint(2, 9))).capitalize() for _ in range(5000)]
+	authors = [f"{generator.choice(words)} {generator.choice(words)}" for _ in range(max(1, amount_of_books // 10))]
+	books = []
+	for _ in range(amount_of_books):
+		title = " ".join(generator.choices(words, k=generator.randint(1, 6)))
+		author = generator.choice(authors) if generator.random() < 0.9 else None
+		books.append(Book(title, author))
+	return books
+
+def sample_titles(books, amount_of_titles, seed=0):
+	""" Returns amount_of_titles titles chosen randomly (with replacement) from books. """
+	generator = random.Random(seed)
+	return [generator.choice(books).title() for _ in range(amount_of_titles)]
+
+def sample_zipfian_titles(books, amount_of_titles, exponent=1.0, miss_ratio=0.05, seed=0):
+	"""
+	Returns amount_of_titles titles chosen from books with a Zipfian distribution (the title of rank r is chosen in proportion to 1 / r ** exponent),
+	like real lookup traffic where a few titles get most lookups.
+
+	miss_ratio (optional) - the fraction of titles that are not the title of any book (ranked like the other titles).
+	"""
+	generator = random.Random(seed)
+	amount_of_missing_titles = int(len(books) * miss_ratio)
+	titles = [book.title() for book in books] + [f"Missing title {index}" for index in range(amount_of_missing_titles)]
+	generator.shuffle(titles)
+	weights = [1 / rank ** exponent for rank in range(1, len(titles) + 1)]
+	return generator.choices(titles, weights=weights, k=amount_of_titles)
+
+def generate_csv_text(books):
+	""" Returns the contents of a csv file (with headers Title, Author) holding books. """
+	output = io.StringIO()
+	writer = csv.writer(output)
+	writer.writerow(["Title", "Author"])
+	for book in books:
+		writer.writerow([book.title()] if book.author() is None else [book.title(), book.author()])
+	return output.getvalue()
+
+def benchmark_calls(function, arguments, **measurement):
+	""" 
+	Calls function once for every argument in arguments and returns the benchmarker holding the times. 
+	measurement (optional) - keyword arguments choosing how the calls are measured (batch_size, warmup, disable_gc or subtract_overhead, see measure_calls).
+	"""
+	return measure_calls(function, [(argument,) for argument in arguments], **measurement)[1]
+
+##################################################
+################### BENCHMARKS ###################
+##################################################
+
+def lower_bound_binary_search(collection, target_key, key=lambda x: x):
+	""" 
+	Finds the first occurence of or where to insert target_key in collection (None if every key is smaller).
+	The search BinarySearchLMS used before it kept a key column, kept as the baseline of benchmark_binary_search_keys.
+
+	collection - the collection to search through.
+	target_key - the key of the desired object.
+	key (optional) - the function that generates keys from objects in the collection. 
+		If the keys are the objects themselves, there is no need to specify the key. 
+	"""
+	left = 0
+	right = len(collection) - 1
+	lower_bound = None
+	while left <= right:
+		middle = left + (right - left) // 2
+		if key(collection[middle]) < target_key:
+			left = middle + 1
+		else:
+			lower_bound = middle
+			right = middle - 1
+	return lower_bound
+
+def benchmark_binary_search_keys(sizes=(10_000, 100_000, 1_000_000), amount_of_lookups=10_000):
+	"""
+	Compares BinarySearchLMS lookups through the cached key column with the previous path,
+	which recomputed the key of every probed book with lower_bound_binary_search.
+	"""
+	for size in sizes:
+		books = generate_books(size)
+		library = BinarySearchLMS(books, key=title_keys.positional_ord)
+		titles = sample_titles(books, amount_of_lookups)
+
+		def find_by_recomputing_keys(title):
+			key = library._key
+			books = library._books
+			index = lower_bound_binary_search(books, key(title), lambda book: key(book.title()))
+			if index is None:
+				return None
+			first_occurence_key = key(books[index].title())
+			for index in range(index, len(books)):
+				if key(books[index].title()) != first_occurence_key:
+					return None
+				if books[index].title() == title:
+					return books[index]
+			return None
+
+		print(f"=== BinarySearchLMS (positional_ord) with {size} books ===")
+		print("--- recomputed keys (previous path) ---")
+		print(benchmark_calls(find_by_recomputing_keys, titles))
+		print("--- cached key column with bisect ---")
+		print(benchmark_calls(library.find, titles))
+
+def benchmark_sorted_blocks(sizes=(10_000, 100_000, 1_000_000), amount_of_operations=10_000):
+	""" Compares shelving, unshelving and finding in BinarySearchLMS (one sorted list) and SortedBlocksLMS (sorted blocks). """
+	for size in sizes:
+		books = generate_books(size)
+		new_books = generate_books(amount_of_operations, seed=1)
+		titles = sample_titles(books, amount_of_operations)
+		for library_type in (BinarySearchLMS, SortedBlocksLMS):
+			library = library_type(books)
+			print(f"=== {library_type.__name__} with {size} books ===")
+			print("--- shelve ---")
+			print(benchmark_calls(library.shelve, new_books))
+			print("--- find ---")
+			print(benchmark_calls(library.find, titles))
+			print("--- unshelve ---")
+			print(benchmark_calls(library.unshelve, titles))
+
+def benchmark_book_memory(sizes=(1_000_000,)):
+	"""
+	Compares the memory used to hold books parsed from csv as 
+	Book objects with an instance __dict__ (before __slots__), Book objects with __slots__, and a BookCatalog.
+	"""
+	class DictBook:
+		""" The Book class as it was before __slots__ were added. """
+		def __init__(self, title, author):
+			self._title = title
+			self._author = author
+
+	def read_rows(text):
+		rows = csv.reader(io.StringIO(text))
+		next(rows) # skip the header
+		return rows
+
+	def read_dict_books(text):
+		return [DictBook(row[0], row[1] if len(row) == 2 else None) for row in read_rows(text)]
+
+	def read_books(text):
+		return [Book(row[0], row[1] if len(row) == 2 else None) for row in read_rows(text)]
+
+	def read_catalog(text):
+		catalog = BookCatalog()
+		for row in read_rows(text):
+			catalog.add(row[0], row[1] if len(row) == 2 else None)
+		return catalog
+
+	for size in sizes:
+		text = generate_csv_text(generate_books(size))
+		print(f"=== memory for {size} books ===")
+		for name, read in (("Book with __dict__", read_dict_books), ("Book with __slots__", read_books), ("BookCatalog", read_catalog)):
+			result, retained, peak = measure_memory(read, text)
+			del result
+			print(f"{name:.<22} retained {retained / 2**20:8.1f} MiB ({retained / size:6.1f} bytes per book), peak {peak / 2**20:8.1f} MiB")
+
+def benchmark_memory_footprint(sizes=(10_000, 100_000, 1_000_000)):
+	""" Compares the memory used by every library (retained and peak while constructing, and per book) and the part used by the deep copy of the books. """
+	for size in sizes:
+		books = generate_books(size)
+		print(f"=== memory for {size} books ===")
+		for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+			memory_usage = library_memory_usage(library_type, books)
+			sizes_text = ", ".join(f"{name} {converted_size:7.1f} {converted_size_name}" for name, (converted_size, converted_size_name) in (
+				("retained", BytesFormatter.AUTO.convert(memory_usage["retained_bytes"])),
+				("peak", BytesFormatter.AUTO.convert(memory_usage["peak_bytes"])),
+				("deep copy", BytesFormatter.AUTO.convert(memory_usage["copy_bytes"])),
+				("deep copy peak", BytesFormatter.AUTO.convert(memory_usage["copy_peak_bytes"])),
+			))
+			print(f"{library_type.__name__:.<18} {memory_usage['bytes_per_book']:6.1f} bytes per book, {sizes_text}")
+
+def benchmark_copy_policies(sizes=(100_000, 1_000_000), amount_of_constructions=3):
+	""" Compares the construction time of every library with every copy policy. """
+	for size in sizes:
+		books = generate_books(size)
+		print(f"=== construction with {size} books ===")
+		for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+			for copy_policy in CopyPolicy:
+				benchmarker = Benchmarker()
+				for _ in range(amount_of_constructions):
+					owned_books = list(books) # borrowed lists are given away, so every construction gets its own
+					benchmarker.add_function_call(library_type)(owned_books, copy_policy=copy_policy)
+				average, average_name = SecondsFormatter.AUTO.convert(benchmarker.average())
+				print(f"{library_type.__name__ + ' ' + copy_policy.name:.<30} {average:8.3f} {average_name}")
+
+def benchmark_parallel_csv(size=1_000_000, amounts_of_workers=(1, 2, 4, 8)):
+	""" Compares reading a csv file of size books sequentially and with read_books_from_csv_file_in_parallel. """
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "books.csv")
+		with open(path, 'w', encoding='utf-8', newline='') as file:
+			file.write(generate_csv_text(generate_books(size)))
+		print(f"=== reading {size} books ({os.cpu_count()} CPUs available) ===")
+		_, sequential_ns = time_execution(book_csv.read_books_from_csv_file)(path)
+		sequential_time, sequential_time_name = SecondsFormatter.AUTO.convert(sequential_ns)
+		print(f"{'sequential':.<12} {sequential_time:8.3f} {sequential_time_name}")
+		for amount_of_workers in amounts_of_workers:
+			_, parallel_ns = time_execution(book_csv.read_books_from_csv_file_in_parallel)(path, amount_of_workers)
+			parallel_time, parallel_time_name = SecondsFormatter.AUTO.convert(parallel_ns)
+			print(f"{str(amount_of_workers) + ' workers':.<12} {parallel_time:8.3f} {parallel_time_name} (speedup {sequential_ns / parallel_ns:.2f}x)")
+
+def benchmark_snapshot_startup(size=1_000_000, amount_of_lookups=1000):
+	""" Compares starting a BinarySearchLMS from a csv file with loading it from a memory-mapped snapshot. """
+	books = generate_books(size)
+	titles = sample_titles(books, amount_of_lookups)
+	with tempfile.TemporaryDirectory() as directory:
+		csv_path = os.path.join(directory, "books.csv")
+		snapshot_path = os.path.join(directory, "books.snapshot")
+		with open(csv_path, 'w', encoding='utf-8', newline='') as file:
+			file.write(generate_csv_text(books))
+		save_snapshot(BinarySearchLMS(books, copy_policy=CopyPolicy.BORROW), snapshot_path)
+
+		def start_from_csv():
+			return BinarySearchLMS(book_csv.iter_books_from_csv_file(csv_path), copy_policy=CopyPolicy.BORROW)
+
+		print(f"=== starting a BinarySearchLMS with {size} books ===")
+		for name, start in (("csv", start_from_csv), ("snapshot", lambda: load_snapshot(snapshot_path))):
+			library, startup_ns = time_execution(start)()
+			startup_time, startup_time_name = SecondsFormatter.AUTO.convert(startup_ns)
+			print(f"--- from {name}: started in {startup_time:.3f} {startup_time_name}, lookups: ---")
+			print(benchmark_calls(library.find, titles))
+			del library
+
+def benchmark_batch_operations(size=100_000, batch_size=10_000):
+	""" Compares the batch operations (find_many, shelve_many, unshelve_many) with one call per title or book. """
+	books = generate_books(size)
+	new_books = generate_books(batch_size, seed=1)
+	titles = sample_titles(books, batch_size)
+	print(f"=== batches of {batch_size} with {size} books ===")
+	for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+		one_by_one = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		batched = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		for name, single, batch, arguments in (
+				("shelve", one_by_one.shelve, batched.shelve_many, new_books),
+				("find", one_by_one.find, batched.find_many, titles),
+				("unshelve", one_by_one.unshelve, batched.unshelve_many, titles)):
+			if library_type is LinearSearchLMS and name != "shelve":
+				arguments = arguments[:batch_size // 100] # one linear scan per title is too slow for the whole batch
+			_, single_ns = time_execution(lambda: [single(argument) for argument in arguments])()
+			_, batch_ns = time_execution(batch)(arguments)
+			single_time, single_time_name = SecondsFormatter.AUTO.convert(single_ns)
+			batch_time, batch_time_name = SecondsFormatter.AUTO.convert(batch_ns)
+			print(f"{library_type.__name__ + ' ' + name + ' x' + str(len(arguments)):.<36} one by one {single_time:8.3f} {single_time_name:<12} batched {batch_time:8.3f} {batch_time_name}")
+
+def benchmark_key_functions(sizes=(100_000, 1_000_000)):
+	""" Reports the collisions of every key function and compares computing keys one by one with title_keys.batch_keys. """
+	for size in sizes:
+		titles = [book.title() for book in generate_books(size)]
+		print(f"=== key functions with {size} titles (numpy {'installed' if title_keys.numpy is not None else 'not installed'}) ===")
+		title_keys.print_collision_report(titles)
+		for key in title_keys.KEY_FUNCTIONS:
+			_, one_by_one_ns = time_execution(lambda: [key(title) for title in titles])()
+			_, batch_ns = time_execution(title_keys.batch_keys)(titles, key)
+			one_by_one_time, one_by_one_time_name = SecondsFormatter.AUTO.convert(one_by_one_ns)
+			batch_time, batch_time_name = SecondsFormatter.AUTO.convert(batch_ns)
+			print(f"{key.__name__:.<20} one by one {one_by_one_time:8.3f} {one_by_one_time_name:<12} batch_keys {batch_time:8.3f} {batch_time_name}")
+
+def benchmark_prefix_search(sizes=(100_000, 1_000_000), amount_of_queries=1000, limit=10):
+	""" Compares find_prefix (prefix index) with scanning every book of a LinearSearchLMS for the first limit titles with a prefix. """
+	for size in sizes:
+		books = generate_books(size)
+		prefixes = [title[:3] for title in sample_titles(books, amount_of_queries)]
+		library = LinearSearchLMS(books, copy_policy=CopyPolicy.SHALLOW)
+
+		def scan_for_prefix(prefix):
+			return sorted((book for book in library._books if book.title().startswith(prefix)), key=lambda book: book.title())[:limit]
+
+		print(f"=== prefix search with {size} books ===")
+		_, build_ns = time_execution(library.find_prefix)("")
+		build_time, build_time_name = SecondsFormatter.AUTO.convert(build_ns)
+		print(f"(prefix index built in {build_time:.3f} {build_time_name})")
+		print("--- scan of LinearSearchLMS ---")
+		print(benchmark_calls(scan_for_prefix, prefixes[:max(1, amount_of_queries // 100)]))
+		print(f"--- find_prefix (limit {limit}) ---")
+		print(benchmark_calls(lambda prefix: library.find_prefix(prefix, limit), prefixes))
+
+def benchmark_author_index(size=1_000_000, amount_of_queries=1000):
+	""" Compares find_by_author with scanning every book, and reports the memory of the author index next to the primary index. """
+	books = generate_books(size)
+	authors = [book.author() for book in random.Random(0).choices(books, k=amount_of_queries)]
+	print(f"=== author search with {size} books ===")
+	for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+		library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		_, build_ns = time_execution(library.find_by_author)(None)
+		build_time, build_time_name = SecondsFormatter.AUTO.convert(build_ns)
+		memory_usage = ", ".join(f"{name} {size_in_bytes / 2**20:.1f} MiB" for name, size_in_bytes in library.index_memory_usage().items())
+		print(f"{library_type.__name__}: author index built in {build_time:.3f} {build_time_name}, memory: {memory_usage}")
+		print(f"--- {library_type.__name__}: scan of every book ---")
+		print(benchmark_calls(lambda author: [book for book in library if book.author() == author], authors[:max(1, amount_of_queries // 100)]))
+		print(f"--- {library_type.__name__}: find_by_author ---")
+		print(benchmark_calls(library.find_by_author, authors))
+
+def benchmark_fuzzy_search(sizes=(100_000, 1_000_000), amount_of_queries=200, seed=0):
+	""" Times building the fuzzy (trigram) index and find_fuzzy with titles that have one or two random typos. """
+	generator = random.Random(seed)
+
+	def misspell(title):
+		characters = list(title)
+		for _ in range(generator.randint(1, 2)):
+			position = generator.randrange(len(characters))
+			characters[position] = generator.choice("abcdefghijklmnopqrstuvwxyz")
+		return "".join(characters)
+
+	for size in sizes:
+		books = generate_books(size)
+		misspelled_titles = [misspell(title) for title in sample_titles(books, amount_of_queries)]
+		library = HashMapLMS(books, copy_policy=CopyPolicy.SHALLOW)
+		print(f"=== fuzzy search with {size} books ===")
+		_, build_ns = time_execution(library.find_fuzzy)("")
+		build_time, build_time_name = SecondsFormatter.AUTO.convert(build_ns)
+		print(f"(fuzzy index built in {build_time:.3f} {build_time_name}, {library.index_memory_usage()['FuzzyIndex'] / 2**20:.1f} MiB)")
+		print("--- find ---")
+		print(benchmark_calls(library.find, misspelled_titles))
+		print("--- find_fuzzy ---")
+		print(benchmark_calls(library.find_fuzzy, misspelled_titles))
+
+def benchmark_full_text_search(sizes=(100_000, 1_000_000), amount_of_queries=1000):
+	""" 
+	Times building the full-text index from a library and straight from a csv file, and compares its compressed posting lists 
+	with plain lists of ids. Then times two-word AND and OR queries. 
+	"""
+	for size in sizes:
+		books = generate_books(size)
+		queries = [" ".join(title.split()[:2]) for title in sample_titles(books, amount_of_queries)]
+		library = HashMapLMS(books, copy_policy=CopyPolicy.SHALLOW)
+		print(f"=== full-text search with {size} books ===")
+		_, build_ns = time_execution(library.find_words)("")
+		build_time, build_time_name = SecondsFormatter.AUTO.convert(build_ns)
+		index = library._secondary_indexes[FullTextIndex]
+		list_size = 0
+		for posting_list in index._postings.values():
+			book_ids = list(posting_list)
+			list_size += sys.getsizeof(book_ids) + sum(map(sys.getsizeof, book_ids))
+		print(f"(full-text index built in {build_time:.3f} {build_time_name}, posting lists use {index.size_in_bytes() / 2**20:.1f} MiB compressed vs {list_size / 2**20:.1f} MiB as lists of ints)")
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "books.csv")
+			with open(path, 'w', newline='', encoding='utf-8') as file:
+				file.write(generate_csv_text(books))
+			_, csv_build_ns = time_execution(FullTextIndex.from_csv_file)(path)
+		csv_build_time, csv_build_time_name = SecondsFormatter.AUTO.convert(csv_build_ns)
+		print(f"(full-text index built from the csv file in {csv_build_time:.3f} {csv_build_time_name})")
+		print("--- find_words (all words) ---")
+		print(benchmark_calls(library.find_words, queries))
+		print("--- find_words (any word) ---")
+		print(benchmark_calls(lambda query: library.find_words(query, match_all=False), queries))
+
+def benchmark_lookup_cache(sizes=(10_000, 1_000_000), amount_of_lookups=100_000, capacity=1000):
+	""" Compares find with and without a CachedLMS (every eviction policy) in front of every backend, under a Zipfian workload. """
+	for size in sizes:
+		books = generate_books(size)
+		titles = sample_zipfian_titles(books, amount_of_lookups)
+		print(f"=== lookup cache with {size} books, {amount_of_lookups} Zipfian lookups, capacity {capacity} ===")
+		for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+			library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+			# linear search is too slow to run every lookup on large libraries uncached
+			lookups = titles if library_type is not LinearSearchLMS or size <= 10_000 else titles[:amount_of_lookups // 100]
+			results = []
+			_, uncached_ns = time_execution(lambda: [library.find(title) for title in lookups])()
+			results.append(("uncached", uncached_ns, None))
+			for eviction_policy in EvictionPolicy:
+				cached_library = CachedLMS(library, capacity, eviction_policy)
+				_, cached_ns = time_execution(lambda: [cached_library.find(title) for title in lookups])()
+				results.append((eviction_policy.name, cached_ns, cached_library.hit_ratio()))
+			print(f"--- {library_type.__name__} ({len(lookups)} lookups) ---")
+			for name, total_ns, hit_ratio in results:
+				total_time, total_time_name = SecondsFormatter.AUTO.convert(total_ns)
+				hit_ratio_text = "" if hit_ratio is None else f", hit ratio {hit_ratio:.1%}"
+				print(f"{name:.<12} {total_time:8.3f} {total_time_name:<12} ({uncached_ns / total_ns:5.2f}x){hit_ratio_text}")
+
+def benchmark_self_organising(size=10_000, amount_of_lookups=100_000):
+	""" Compares the scan length and time of find in LinearSearchLMS and SelfOrganisingLMS (every strategy), under uniform and Zipfian lookups. """
+	books = generate_books(size)
+	workloads = {
+		"uniform": sample_titles(books, amount_of_lookups),
+		"zipfian": sample_zipfian_titles(books, amount_of_lookups),
+	}
+	for workload_name, titles in workloads.items():
+		print(f"=== {workload_name} lookups ({amount_of_lookups} lookups of {size} books) ===")
+		library = LinearSearchLMS(books, copy_policy=CopyPolicy.SHALLOW)
+		scanned_books = 0
+		for title in titles:
+			index = library._find_index(title)
+			scanned_books += len(library) if index is None else index + 1
+		_, total_ns = time_execution(lambda: [library.find(title) for title in titles])()
+		total_time, total_time_name = SecondsFormatter.AUTO.convert(total_ns)
+		print(f"{'LinearSearchLMS':.<20} average scan {scanned_books / len(titles):10.1f} books, {total_time:8.3f} {total_time_name}")
+		for strategy in OrganisingStrategy:
+			library = SelfOrganisingLMS(books, strategy, copy_policy=CopyPolicy.SHALLOW)
+			_, total_ns = time_execution(lambda: [library.find(title) for title in titles])()
+			total_time, total_time_name = SecondsFormatter.AUTO.convert(total_ns)
+			print(f"{strategy.name:.<20} average scan {library.average_scan_length():10.1f} books, {total_time:8.3f} {total_time_name}")
+
+def benchmark_concurrent_throughput(size=100_000, amount_of_threads=8, amount_of_operations_per_thread=20_000, read_ratios=(1.0, 0.99, 0.9, 0.5)):
+	""" 
+	Measures the throughput (operations per second) of threads sharing a ConcurrentLMS or a StripedLMS, at different ratios of lookups to changes.
+	Changes alternate between shelving a new book and unshelving it again, so the size of the library stays the same. 
+	"""
+	books = generate_books(size)
+	libraries = {
+		"ConcurrentLMS(HashMapLMS)": lambda: ConcurrentLMS(HashMapLMS(books, copy_policy=CopyPolicy.SHALLOW)),
+		"ConcurrentLMS(BinarySearchLMS)": lambda: ConcurrentLMS(BinarySearchLMS(books, copy_policy=CopyPolicy.SHALLOW)),
+		"StripedLMS(HashMapLMS)": lambda: StripedLMS(books, HashMapLMS, copy_policy=CopyPolicy.SHALLOW),
+		"StripedLMS(BinarySearchLMS)": lambda: StripedLMS(books, BinarySearchLMS, copy_policy=CopyPolicy.SHALLOW),
+	}
+	for read_ratio in read_ratios:
+		print(f"=== {amount_of_threads} threads, {read_ratio:.0%} lookups, {size} books ===")
+		for name, create_library in libraries.items():
+			library = create_library()
+
+			def run_thread(thread_index):
+				generator = random.Random(thread_index)
+				titles = sample_titles(books, amount_of_operations_per_thread, seed=thread_index)
+				new_book = None
+				for title in titles:
+					if generator.random() < read_ratio:
+						library.find(title)
+					elif new_book is None:
+						new_book = Book(f"Thread {thread_index} {title}", None)
+						library.shelve(new_book)
+					else:
+						library.unshelve(new_book.title())
+						new_book = None
+
+			threads = [threading.Thread(target=run_thread, args=(thread_index,)) for thread_index in range(amount_of_threads)]
+
+			def run_threads():
+				for thread in threads:
+					thread.start()
+				for thread in threads:
+					thread.join()
+
+			_, total_ns = time_execution(run_threads)()
+			operations_per_second = amount_of_threads * amount_of_operations_per_thread / (total_ns / 1e9)
+			print(f"{name:.<32} {operations_per_second:12,.0f} operations per second")
+
+def benchmark_process_sharding(size=1_000_000, amount_of_processes=(1, 2, 4, 8), batch_size=10_000, amount_of_batches=20):
+	""" 
+	Measures the lookup throughput of ProcessShardedLMS with 1 to 8 worker processes (find_many batches, so every worker works in parallel),
+	next to the same library in-process. 
+	"""
+	books = generate_books(size)
+	batches = [sample_titles(books, batch_size, seed=batch_index) for batch_index in range(amount_of_batches)]
+	print(f"=== process sharding with {size} books ({os.cpu_count()} cores), {amount_of_batches} batches of {batch_size} lookups ===")
+	for library_type in (BinarySearchLMS, HashMapLMS):
+		print(f"--- {library_type.__name__} ---")
+		library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		_, total_ns = time_execution(lambda: [library.find_many(batch) for batch in batches])()
+		print(f"{'in-process':.<16} {batch_size * amount_of_batches / (total_ns / 1e9):12,.0f} lookups per second")
+		for amount in amount_of_processes:
+			with ProcessShardedLMS(books, library_type, amount) as sharded_library:
+				_, total_ns = time_execution(lambda: [sharded_library.find_many(batch) for batch in batches])()
+			print(f"{f'{amount} processes':.<16} {batch_size * amount_of_batches / (total_ns / 1e9):12,.0f} lookups per second")
+
+def benchmark_timer_overhead(size=100_000, amount_of_lookups=100_000, batch_size=100):
+	""" Compares the find times of HashMapLMS and BinarySearchLMS measured with add_function_call and with measure_calls (warmup, no GC, batches, overhead subtracted). """
+	books = generate_books(size)
+	titles = sample_titles(books, amount_of_lookups)
+	arguments = [(title,) for title in titles]
+	print(f"=== timer overhead with {size} books ===")
+	print(f"measured overhead per call: {measure_overhead(arguments[:batch_size]) / batch_size:.1f} nanoseconds (batches of {batch_size})")
+	for library_type in (HashMapLMS, BinarySearchLMS):
+		library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		naive_benchmarker = Benchmarker()
+		for title in titles:
+			naive_benchmarker.add_function_call(library.find)(title)
+		_, precise_benchmarker = measure_calls(library.find, arguments[:1000] + arguments, batch_size=batch_size, warmup=1000, disable_gc=True, subtract_overhead=True)
+		for name, benchmarker in (("add_function_call", naive_benchmarker), ("measure_calls", precise_benchmarker)):
+			average, average_name = SecondsFormatter.AUTO.convert(benchmarker.average())
+			p50, p50_name = SecondsFormatter.AUTO.convert(benchmarker.percentile(50))
+			print(f"{library_type.__name__ + ' ' + name:.<40} avg {average:8.3f} {average_name:<12} p50 {p50:8.3f} {p50_name}")
+
+def benchmark_title_normalisation(size=100_000, amount_of_lookups=100_000):
+	"""
+	Compares find with the default (exact) normaliser, which skips normalising, with the same library calling the exact normaliser
+	on every lookup (the path every lookup took before exact titles skipped it), and with CASE_INSENSITIVE.
+	"""
+	books = generate_books(size)
+	titles = sample_titles(books, amount_of_lookups)
+	arguments = [(title,) for title in titles]
+	measurement = dict(warmup=1000, disable_gc=True, subtract_overhead=True)
+	print(f"=== find with {size} books ===")
+	for library_type in (HashMapLMS, BinarySearchLMS, SortedBlocksLMS):
+		exact_library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		normalising_library = library_type(books, copy_policy=CopyPolicy.SHALLOW)
+		normalising_library._exact = False
+		case_insensitive_library = library_type(books, copy_policy=CopyPolicy.SHALLOW, normaliser=CASE_INSENSITIVE)
+		for name, library in (("exact (default)", exact_library), ("exact, normaliser called", normalising_library), ("CASE_INSENSITIVE", case_insensitive_library)):
+			_, benchmarker = measure_calls(library.find, arguments[:1000] + arguments, **measurement)
+			average, average_name = SecondsFormatter.AUTO.convert(benchmarker.average())
+			p50, p50_name = SecondsFormatter.AUTO.convert(benchmarker.percentile(50))
+			print(f"{library_type.__name__ + ' ' + name:.<45} avg {average:8.3f} {average_name:<12} p50 {p50:8.3f} {p50_name}")
+
+BENCHMARKS = {
+	"binary_search_keys": benchmark_binary_search_keys,
+	"sorted_blocks": benchmark_sorted_blocks,
+	"book_memory": benchmark_book_memory,
+	"memory_footprint": benchmark_memory_footprint,
+	"copy_policies": benchmark_copy_policies,
+	"parallel_csv": benchmark_parallel_csv,
+	"snapshot_startup": benchmark_snapshot_startup,
+	"batch_operations": benchmark_batch_operations,
+	"key_functions": benchmark_key_functions,
+	"prefix_search": benchmark_prefix_search,
+	"author_index": benchmark_author_index,
+	"fuzzy_search": benchmark_fuzzy_search,
+	"full_text_search": benchmark_full_text_search,
+	"lookup_cache": benchmark_lookup_cache,
+	"self_organising": benchmark_self_organising,
+	"concurrent_throughput": benchmark_concurrent_throughput,
+	"process_sharding": benchmark_process_sharding,
+	"timer_overhead": benchmark_timer_overhead,
+	"title_normalisation": benchmark_title_normalisation,
+}
+
+def main(benchmark_names):
+	if not benchmark_names:
+		print("Available benchmarks: " + ", ".join(BENCHMARKS))
+	for benchmark_name in benchmark_names:
+		if benchmark_name not in BENCHMARKS:
+			print(f"Unknown benchmark {benchmark_name}. Available benchmarks: " + ", ".join(BENCHMARKS))
+			continue
+		BENCHMARKS[benchmark_name]()
+
+if __name__ == "__main__":
+	main(sys.argv[1:])
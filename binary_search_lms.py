@@ -1,83 +1,170 @@
-import math
+import bisect
+import sys
 
-from library_management_system import LibraryManagementSystem
-from title_keys import basic_key
+from library_management_system import LibraryManagementSystem, CopyPolicy
+from title_keys import basic_key, batch_keys
+from title_normalisation import EXACT
 
 class BinarySearchLMS(LibraryManagementSystem):
     """ 
     A library that uses binary search to find books. 
 
-    Insertion and searching is O(log n). 
+    Searching is O(log n). 
+    Insertion and deletion find the position in O(log n) but shift the books after it, so they are O(n) -- the shift is a fast memory move, 
+    but it dominates once the library holds tens of thousands of books (see complexity_analysis.py). 
     """
 
-    def __init__(self, books, key=basic_key):
+    def __init__(self, books, key=basic_key, copy_policy=CopyPolicy.DEEP, normaliser=EXACT):
         """ 
         Creates a new library with the specified books. 
-        Makes a deep copy of the books. 
+        Makes a deep copy of the books unless another copy policy is specified. 
         Sorts books for binary search. 
 
         books - the books to initialize the library with. 
-        key (optional) - the key function used to sort and search through the library. 
+        key (optional) - the key function used to sort and search through the library. Keys are generated from the normalised titles. 
+        copy_policy (optional) - how the books are copied (see CopyPolicy). 
+        normaliser (optional) - which titles are treated as equal (see TitleNormaliser). Titles are compared exactly by default. 
 
         """
-        super().__init__(books)
-        self._books.sort(key=lambda book: key(book.title()))
+        super().__init__(books, copy_policy, normaliser)
         self._key = key
+        # keys are kept in a parallel list (sorted alongside the books) so that searching never recomputes the key of a shelved book
+        keys = batch_keys(self._titles, key)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._books = [self._books[index] for index in order]
+        self._titles = [self._titles[index] for index in order]
+        self._keys = [keys[index] for index in order]
+
+    def empty(self):
+        """ 
+        Removes every book from the library. 
+        The empty method is overriden to also remove the keys.
+        """
+        super().empty()
+        self._keys = []
 
     def shelve(self, book): 
         """ Adds the specified book to the library. """
-        insert_at_index = lower_bound_binary_search(self._books, self._key(book.title()), lambda book: self._key(book.title()))
-        if insert_at_index is None:
-            self._books.append(book)
-        else:
-            self._books.insert(insert_at_index, book)
+        self._ensure_lists()
+        title = book.title() if self._exact else self._normalise(book.title())
+        book_key = self._key(title)
+        insert_at_index = bisect.bisect_left(self._keys, book_key)
+        self._keys.insert(insert_at_index, book_key)
+        self._titles.insert(insert_at_index, title)
+        self._books.insert(insert_at_index, book)
+        self._index_shelved(book, title)
+
+    def unshelve(self, title):
+        """ 
+        Removes and returns the book in the library with title. 
+        The unshelve method is overriden to update the books, titles and keys.
+        """
+        index = self._find_index(title)
+        if index is None:
+            return None
+        self._ensure_lists()
+        del self._keys[index]
+        book = self._books.pop(index)
+        self._index_unshelved(book, self._titles.pop(index))
+        return book
+
+    def shelve_many(self, books):
+        """ 
+        Adds the specified books to the library. 
+        Sorts the batch by key and merges it with the library in one pass -- O(n + k log k) instead of one O(n) insertion per book. 
+        """
+        self._ensure_lists()
+        books = list(books)
+        new_titles = [self._normalise(book.title()) for book in books]
+        new_keys = batch_keys(new_titles, self._key)
+        # shelve puts every book before the books with an equal key, so among equal keys later books of the batch come first --
+        # sorting the positions backwards (sorted is stable) keeps them in that order
+        order = sorted(range(len(new_keys) - 1, -1, -1), key=new_keys.__getitem__)
+        merged_books = []
+        merged_titles = []
+        merged_keys = []
+        previous_index = 0
+        for new_index in order:
+            new_key = new_keys[new_index]
+            # like shelve, new books go before the books with an equal key
+            insert_at_index = bisect.bisect_left(self._keys, new_key, previous_index)
+            merged_books.extend(self._books[previous_index:insert_at_index])
+            merged_titles.extend(self._titles[previous_index:insert_at_index])
+            merged_keys.extend(self._keys[previous_index:insert_at_index])
+            merged_books.append(books[new_index])
+            merged_titles.append(new_titles[new_index])
+            merged_keys.append(new_key)
+            previous_index = insert_at_index
+        merged_books.extend(self._books[previous_index:])
+        merged_titles.extend(self._titles[previous_index:])
+        merged_keys.extend(self._keys[previous_index:])
+        self._books = merged_books
+        self._titles = merged_titles
+        self._keys = merged_keys
+        for book, title in zip(books, new_titles):
+            self._index_shelved(book, title)
+
+    def unshelve_many(self, titles):
+        """ 
+        Removes the books with the specified titles, as if unshelve was called for every title in order. 
+        Finds every book first then rebuilds the library in one pass -- O(n + k log n) instead of one O(n) deletion per book. 
+        Returns the removed book (or None) for every title, in the same order as titles. 
+        """
+        self._ensure_lists()
+        removed_indexes = set()
+        removed_books = []
+        for title in titles:
+            index = self._find_index(title, skip_indexes=removed_indexes)
+            if index is None:
+                removed_books.append(None)
+            else:
+                removed_indexes.add(index)
+                removed_books.append(self._books[index])
+                self._index_unshelved(self._books[index], self._titles[index])
+        if removed_indexes:
+            self._books = [book for index, book in enumerate(self._books) if index not in removed_indexes]
+            self._titles = [title for index, title in enumerate(self._titles) if index not in removed_indexes]
+            self._keys = [key for index, key in enumerate(self._keys) if index not in removed_indexes]
+        return removed_books
+
+    def _ensure_lists(self):
+        """ 
+        Copies the books, titles and keys into lists if they are read-only sequences (e.g. a memory-mapped snapshot). 
+        Must be called before the library is changed. 
+        """
+        if not isinstance(self._books, list):
+            self._books = list(self._books)
+            self._titles = list(self._titles)
+            self._keys = list(self._keys)
+            # the lists hold new book objects, so indexes built from the read-only books are rebuilt on their next use
+            self._secondary_indexes.clear()
+
+    def _primary_index_size(self):
+        """ Returns the memory used by the books, titles and keys lists (including the keys) in bytes. """
+        return super()._primary_index_size() + sys.getsizeof(self._keys) + sum(map(sys.getsizeof, self._keys))
 
-    def _find_index(self, title):
+    def _find_index(self, title, skip_indexes=()):
         """ 
         Finds and returns the index of the book in the library with title. 
         Uses binary search to find the books with the same keys then linearly searches for the book with the correct title. 
+
+        skip_indexes (optional) - indexes of books that should be treated as already removed. 
         
         Average case -- O(log n) -- Reasonable key function and different books.
         Worst case -- O(n) -- Would only occur if the key function was extremely bad or the same book had n occurences in the library. 
         
-        NOTE -- CASE-SENSITIVE (even if key is not case-sensitive)
+        NOTE -- CASE-SENSITIVE (even if key is not case-sensitive), unless the library's normaliser ignores case
         """
-        first_occurence_index = lower_bound_binary_search(self._books, self._key(title), lambda book: self._key(book.title()))
-        if first_occurence_index is None:
-            return None
-        first_occurence_key = self._key(self._books[first_occurence_index].title())
-        index = first_occurence_index
-        for index in range(first_occurence_index, len(self)): 
-            book = self._books[index]   
-            book_key = self._key(book.title())
-            # if the key no longer matches, then the book does not exist in the library
-            if book_key != first_occurence_key: 
-                return None
-            # if the book title matches, the book was found in the library
-            if book.title() == title:
+        keys = self._keys
+        titles = self._titles
+        if not self._exact:
+            title = self._normalise(title)
+        target_key = self._key(title)
+        index = bisect.bisect_left(keys, target_key)
+        while index < len(keys) and keys[index] == target_key:
+            # if the (stored, normalised) title matches, the book was found in the library
+            if titles[index] == title and index not in skip_indexes:
                 return index
+            index += 1
+        # if the key no longer matches, then the book does not exist in the library
         return None
-
-def lower_bound_binary_search(collection, target_key, key=lambda x: x):
-    """ 
-    Finds the first occurence of or where to insert target_key in collection.  
-    Note -- in the case of duplicate keys, this function finds the first occurence.
-    
-    collection - the collection to search through.
-    target_key - the key of the desired object.
-    key (optional) - the function that generates keys from objects in the collection. 
-        If the keys are the objects themselves, there is no need to specify the key. 
-    """
-    left = 0
-    right = len(collection) - 1
-    lower_bound = None;
-
-    while left <= right:
-        middle = left + math.floor((right - left) / 2)
-        if key(collection[middle]) < target_key:
-            left = middle + 1
-        else:
-            lower_bound = middle
-            right = middle - 1
-
-    return lower_bound
\ No newline at end of file
@@ -1,6 +1,9 @@
 class Book:
 	""" A class that represents a book. """
 
+	# no per-instance __dict__ -- a library can hold millions of books
+	__slots__ = ("_title", "_author")
+
 	def __init__(self, title, author):
 		""" 
 		Creates a book with the specified title and author. 
@@ -11,6 +14,10 @@ class Book:
 		self._title = title
 		self._author = author
 
+	def __reduce__(self):
+		""" Pickles the book as its title and author (much smaller and faster than the default for classes with __slots__). """
+		return (Book, (self._title, self._author))
+
 	def title(self):
 		""" Returns the title of the book. """
 		return self._title
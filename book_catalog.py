@@ -0,0 +1,73 @@
+from array import array
+import sys
+
+from book import Book
+
+class BookCatalog:
+	"""
+	A compact, columnar collection of books.
+
+	Instead of one Book object per book, the catalog keeps a list of (interned) titles,
+	a table holding every distinct author once, and an array with the author number of every book.
+	Book objects are only created when a book is accessed, so they can be thrown away after use.
+	"""
+
+	_NO_AUTHOR = -1
+
+	def __init__(self, books=()):
+		"""
+		Creates a new catalog with the specified books.
+
+		books (optional) - the books to add to the catalog.
+		"""
+		self._titles = []
+		self._author_numbers = array('l')
+		self._authors = []
+		self._author_number_by_name = dict()
+		for book in books:
+			self.add(book.title(), book.author())
+
+	def add(self, title, author):
+		"""
+		Adds a book with the specified title and author to the end of the catalog.
+
+		title - the title of the book.
+		author - the author of the book. If the book has no author, None can be used.
+		"""
+		if author is None:
+			author_number = BookCatalog._NO_AUTHOR
+		else:
+			author_number = self._author_number_by_name.get(author)
+			if author_number is None:
+				author_number = len(self._authors)
+				self._authors.append(sys.intern(author))
+				self._author_number_by_name[self._authors[-1]] = author_number
+		self._titles.append(sys.intern(title))
+		self._author_numbers.append(author_number)
+
+	def append(self, book):
+		""" Adds the specified book to the end of the catalog. """
+		self.add(book.title(), book.author())
+
+	def title(self, index):
+		""" Returns the title of the book at index without creating a Book. """
+		return self._titles[index]
+
+	def author(self, index):
+		""" Returns the author of the book at index without creating a Book. If the book has no author, returns None. """
+		author_number = self._author_numbers[index]
+		if author_number == BookCatalog._NO_AUTHOR:
+			return None
+		return self._authors[author_number]
+
+	def __len__(self):
+		return len(self._titles)
+
+	def __getitem__(self, index):
+		""" Returns a new Book for the book at index. """
+		return Book(self.title(index), self.author(index))
+
+	def __iter__(self):
+		""" Iterates over the catalog, creating a new Book for every book. """
+		for index in range(len(self._titles)):
+			yield self[index]
@@ -1,40 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
 import csv
+import io
+import mmap
+import os
 from book import Book
 
 class BookCsvFormatError(Exception):
 	""" Exception raised when encountering a formatting error in book csv files. """
 
-def read_books_from_csv_file(path):
-	""" Reads book objects from a csv file with headers Title, Author. """
-	books = []
+def iter_books_from_csv_file(path):
+	"""
+	Lazily reads book objects from a csv file with headers Title, Author.
+	Books are yielded one at a time, so memory use does not grow with the size of the file.
+
+	Libraries can be built straight from the stream (without first holding a separate list), e.g.
+		HashMapLMS(iter_books_from_csv_file(path), copy_policy=CopyPolicy.BORROW)
+	"""
 	with open(path, 'r', encoding='utf-8') as file:
 		file_reader = csv.reader(file)
-		next(file_reader) # skip the header
+		next(file_reader, None) # skip the header
+		# line_num is the line a record ends on, so a record starts on the line after the previous record (quoted fields can span lines)
+		line_number = file_reader.line_num + 1
 		for row in file_reader:
-			if len(row) == 1: # book name only
-				book = Book(row[0], None)
-			elif len(row) == 2: # book name and author name
-				book = Book(row[0], row[1])
-			else:
-				raise BookCsvFormatError(f"Invalid row format: {row} found. Format should be Title, Author or equivalent.")
-			books.append(book)
-	return books
+			yield _book_from_row(row, line_number)
+			line_number = file_reader.line_num + 1
+
+def iter_book_batches_from_csv_file(path, batch_size):
+	"""
+	Lazily reads book objects from a csv file with headers Title, Author in lists of batch_size books.
+	The last batch may hold fewer books.
+	"""
+	if batch_size <= 0:
+		raise ValueError("batch_size must be greater or equal to 1")
+	with closing(iter_books_from_csv_file(path)) as books:
+		while batch := list(islice(books, batch_size)):
+			yield batch
+
+def read_books_from_csv_file(path):
+	""" Reads book objects from a csv file with headers Title, Author. """
+	return list(iter_books_from_csv_file(path))
 
 def read_n_books_from_csv_file(path, amount_of_books_to_read):
 	""" Reads a specific amount of book objects from a csv file with headers Title, Author. """
+	with closing(iter_books_from_csv_file(path)) as books:
+		return list(islice(books, max(0, amount_of_books_to_read)))
+
+def read_books_from_csv_file_in_parallel(path, amount_of_workers=None, amount_of_books_to_read=None):
+	"""
+	Reads book objects from a csv file with headers Title, Author using a pool of worker processes.
+	The file is split into byte ranges that end on record boundaries and every range is parsed by a worker.
+	Books are returned in the same order as in the file.
+
+	path - the path of the csv file.
+	amount_of_workers (optional) - the amount of worker processes. Defaults to the amount of CPUs.
+	amount_of_books_to_read (optional) - the maximum amount of books to read. Reads every book by default.
+
+	Like read_n_books_from_csv_file, a BookCsvFormatError is only raised for rows that would have been read.
+	NOTE -- record boundaries are found by counting quotes, so quotes must only appear in quoted fields (as csv writers produce them).
+	"""
+	if amount_of_workers is None:
+		amount_of_workers = os.cpu_count() or 1
+	if amount_of_workers <= 0:
+		raise ValueError("amount_of_workers must be greater or equal to 1")
+	if amount_of_books_to_read is not None and amount_of_books_to_read <= 0:
+		return []
+
+	# a few shards per worker keeps the workers busy and lets the read stop early when a limit is given
+	shards = _split_csv_file_into_shards(path, amount_of_workers * 4)
 	books = []
-	with open(path, 'r', encoding='utf-8') as file:
-		file_reader = csv.reader(file)
-		next(file_reader) # skip the header
-		for amount_read, row in enumerate(file_reader):
-			if amount_read >= amount_of_books_to_read:
-				return books
-
-			if len(row) == 1: # book name only
-				book = Book(row[0], None)
-			elif len(row) == 2: # book name and author name
-				book = Book(row[0], row[1])
+	with ProcessPoolExecutor(amount_of_workers) as executor:
+		futures = [executor.submit(_read_csv_shard, path, start, end, first_line, amount_of_books_to_read) for start, end, first_line in shards]
+		try:
+			for future in futures:
+				titles, authors, error = future.result()
+				books.extend(map(Book, titles, authors))
+				if amount_of_books_to_read is not None and len(books) >= amount_of_books_to_read:
+					del books[amount_of_books_to_read:]
+					return books
+				if error is not None:
+					raise error
+		finally:
+			for future in futures:
+				future.cancel()
+	return books
+
+def _split_csv_file_into_shards(path, amount_of_shards):
+	"""
+	Splits the records of a csv file (after the header) into at most amount_of_shards byte ranges of similar size.
+	Returns a list of (start byte, end byte, line number of the start byte).
+
+	Ranges always end right after a newline that is outside quotes, so quoted fields spanning lines are never cut.
+	"""
+	file_size = os.path.getsize(path)
+	if file_size == 0:
+		return []
+	with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+		position = 0
+		quotes = 0 # quotes before position, an odd count means position is inside a quoted field
+		line = 1 # line number of position
+
+		def advance(to):
+			nonlocal position, quotes, line
+			chunk = data[position:to]
+			quotes += chunk.count(b'"')
+			line += chunk.count(b'\n')
+			position = to
+
+		def advance_to_record_end():
+			newline = data.find(b'\n', position)
+			while newline != -1:
+				advance(newline + 1)
+				if quotes % 2 == 0:
+					return
+				newline = data.find(b'\n', position)
+			advance(file_size)
+
+		advance_to_record_end() # skip the header
+		shards = []
+		for shard in range(1, amount_of_shards + 1):
+			start, first_line = position, line
+			target = file_size * shard // amount_of_shards
+			if target <= start:
+				continue
+			if shard < amount_of_shards:
+				advance(target)
+				advance_to_record_end()
 			else:
-				raise BookCsvFormatError(f"Invalid row format: {row} found. Format should be Title, Author or equivalent.")
-			books.append(book)
-	return books
\ No newline at end of file
+				advance(file_size)
+			shards.append((start, position, first_line))
+	return shards
+
+def _read_csv_shard(path, start, end, first_line, amount_of_books_to_read):
+	"""
+	Parses the csv records between the start and end bytes of the file (used by worker processes).
+	Returns (titles, authors, error), where error is the BookCsvFormatError that stopped the parse or None.
+	"""
+	with open(path, 'rb') as file:
+		file.seek(start)
+		text = file.read(end - start).decode('utf-8')
+	titles = []
+	authors = []
+	file_reader = csv.reader(io.StringIO(text, newline=None))
+	# the line every record starts on (see iter_books_from_csv_file)
+	line_number = first_line
+	try:
+		for row in file_reader:
+			if amount_of_books_to_read is not None and len(titles) >= amount_of_books_to_read:
+				break
+			book = _book_from_row(row, line_number)
+			titles.append(book.title())
+			authors.append(book.author())
+			line_number = first_line + file_reader.line_num
+	except BookCsvFormatError as error:
+		return (titles, authors, error)
+	return (titles, authors, None)
+
+def _book_from_row(row, line_number):
+	""" Creates a book from a parsed csv row starting on line_number. """
+	if len(row) == 1: # book name only
+		return Book(row[0], None)
+	elif len(row) == 2: # book name and author name
+		return Book(row[0], row[1])
+	raise BookCsvFormatError(f"Invalid row format: {row} found on line {line_number}. Format should be Title, Author or equivalent.")
@@ -0,0 +1,240 @@
+"""
+Measures how the operations of every library backend scale and checks the result against the documented complexity.
+
+Every operation of the benchmark suite (see benchmark_suite.py) is measured over a geometric series of library sizes.
+The growth of every operation is then fitted twice:
+	- the growth exponent -- the slope of a least squares line through (log size, log time), e.g. 0 for O(1) and 1 for O(n).
+	- the complexity class -- the simplest of COMPLEXITY_CLASSES that fits the times (plus a constant cost) about as well as the best fitting class.
+An operation matches the class claimed in the backend's docstring (DOCUMENTED_COMPLEXITIES) only if the growth exponent of that class
+over the same sizes is at most EXPONENT_TOLERANCE away from the measured growth exponent -- otherwise it is flagged.
+A constant cost lowers the growth exponent of small sizes, so neighbouring classes (e.g. O(1) and O(log n)) can both be within the tolerance.
+Such ties are broken by the fit -- the documented class must then also fit the times about as well as the best fitting of the tied classes.
+
+USAGE:
+
+python complexity_analysis.py --report scaling.md                       # measure every backend and write a markdown report
+python complexity_analysis.py --backends hash binary-fnv1a_64 --min-size 1000 --steps 8
+python complexity_analysis.py --results results.json --report scaling.md # analyse a run saved by benchmark_suite.py --json
+
+NOTE -- times below a microsecond are dominated by the interpreter, so O(1) and O(log n) operations can be hard to tell apart.
+	Lookups in large libraries also get slower as the library outgrows the CPU caches, which adds up to about 0.2 to the growth exponent.
+"""
+import argparse
+import math
+
+from timer import *
+from benchmark_suite import BACKENDS, OPERATIONS, run_suite, load_json, print_result
+
+##################################################
+############### COMPLEXITY CLASSES ###############
+##################################################
+
+# simplest first -- when several classes fit equally well the simplest one is chosen
+COMPLEXITY_CLASSES = {
+	"O(1)": lambda n: 1,
+	"O(log n)": lambda n: math.log2(n),
+	"O(sqrt n)": lambda n: math.sqrt(n),
+	"O(n)": lambda n: n,
+	"O(n log n)": lambda n: n * math.log2(n),
+	"O(n^2)": lambda n: n * n,
+}
+
+# the complexity claimed by the docstring of every backend (operations the docstrings do not mention are left out)
+DOCUMENTED_COMPLEXITIES = {
+	"linear": {"find_hit": "O(n)", "find_miss": "O(n)", "shelve": "O(1)"},
+	"binary": {"find_hit": "O(log n)", "find_miss": "O(log n)", "shelve": "O(n)", "unshelve": "O(n)"},
+	"hash": {"find_hit": "O(1)", "find_miss": "O(1)", "shelve": "O(1)", "unshelve": "O(1)"},
+}
+
+# a class fits about as well as the best fitting class if its error is at most this many times the best error (plus a small absolute error)
+FIT_TOLERANCE = 1.5
+ABSOLUTE_FIT_TOLERANCE = 0.01
+# how far the growth exponent may be from the exponent of the documented class (cache effects and a constant cost move it by up to about 0.2)
+EXPONENT_TOLERANCE = 0.3
+
+##################################################
+#################### FITTING #####################
+##################################################
+
+def fit_growth_exponent(sizes, times):
+	""" Returns the slope of the least squares line through (log size, log time) -- the k of a time growing like n ** k. """
+	log_sizes = [math.log(size) for size in sizes]
+	log_times = [math.log(max(time, 1)) for time in times]
+	mean_log_size = sum(log_sizes) / len(log_sizes)
+	mean_log_time = sum(log_times) / len(log_times)
+	covariance = sum((log_size - mean_log_size) * (log_time - mean_log_time) for log_size, log_time in zip(log_sizes, log_times))
+	variance = sum((log_size - mean_log_size) ** 2 for log_size in log_sizes)
+	return covariance / variance
+
+def fit_complexity(sizes, times, growth):
+	"""
+	Fits time = constant + factor * growth(size) (with a constant and a factor that are not negative) and returns the root mean square relative error.
+	The constant stands for the cost that does not depend on the size (e.g. calling the method), which hides the growth of small sizes.
+	Errors are relative to the times, so small and large sizes count the same.
+	"""
+	growths = [growth(size) for size in sizes]
+	weights = [1 / max(time, 1) ** 2 for time in times]
+	constant, factor = _weighted_least_squares(growths, times, weights)
+	if factor < 0:
+		constant, factor = sum(weight * time for weight, time in zip(weights, times)) / sum(weights), 0
+	elif constant < 0:
+		constant, factor = 0, sum(weight * growth * time for weight, growth, time in zip(weights, growths, times)) / sum(weight * growth ** 2 for weight, growth in zip(weights, growths))
+	squared_errors = [((constant + factor * growth) / max(time, 1) - 1) ** 2 for growth, time in zip(growths, times)]
+	return math.sqrt(sum(squared_errors) / len(squared_errors))
+
+def _weighted_least_squares(xs, ys, weights):
+	""" Returns (intercept, slope) of the weighted least squares line through (x, y). """
+	total_weight = sum(weights)
+	mean_x = sum(weight * x for weight, x in zip(weights, xs)) / total_weight
+	mean_y = sum(weight * y for weight, y in zip(weights, ys)) / total_weight
+	variance = sum(weight * (x - mean_x) ** 2 for weight, x in zip(weights, xs))
+	if variance == 0:
+		return (mean_y, 0)
+	slope = sum(weight * (x - mean_x) * (y - mean_y) for weight, x, y in zip(weights, xs, ys)) / variance
+	return (mean_y - slope * mean_x, slope)
+
+def classify(sizes, times):
+	"""
+	Returns (the fitted complexity class, the error of every class).
+	The fitted class is the simplest class with an error within FIT_TOLERANCE of the best fitting class.
+	"""
+	errors = {name: fit_complexity(sizes, times, growth) for name, growth in COMPLEXITY_CLASSES.items()}
+	fitted_class = next(name for name in errors if _fits(errors, name))
+	return (fitted_class, errors)
+
+def _fits(errors, complexity_class):
+	""" Returns True if complexity_class fits about as well as the best fitting class (see classify). """
+	return errors[complexity_class] <= min(errors.values()) * FIT_TOLERANCE + ABSOLUTE_FIT_TOLERANCE
+
+def expected_exponent(complexity_class, sizes):
+	""" Returns the growth exponent of complexity_class over sizes (e.g. about 0.1 for O(log n) over sizes from 2,000 to 128,000). """
+	growth = COMPLEXITY_CLASSES[complexity_class]
+	return fit_growth_exponent(sizes, [growth(size) for size in sizes])
+
+def documented_complexity(backend_name, operation):
+	""" Returns the complexity of operation claimed by the docstring of the backend (or None). """
+	return DOCUMENTED_COMPLEXITIES.get(backend_name.split("-")[0], {}).get(operation)
+
+def _matches(sizes, exponent, errors, documented_class):
+	"""
+	Returns True if the growth exponent is within EXPONENT_TOLERANCE of the exponent of documented_class over sizes,
+	and documented_class fits about as well as the best fitting of the classes within the tolerance (which only matters if there are several).
+	"""
+	tied_classes = [name for name in COMPLEXITY_CLASSES if abs(exponent - expected_exponent(name, sizes)) <= EXPONENT_TOLERANCE]
+	if documented_class not in tied_classes:
+		return False
+	return errors[documented_class] <= min(errors[name] for name in tied_classes) * FIT_TOLERANCE + ABSOLUTE_FIT_TOLERANCE
+
+def analyse(results, statistic="p50_ns"):
+	"""
+	Fits the growth of every (backend, operation) in results (as returned by benchmark_suite.run_suite) measured for at least 3 sizes.
+	Returns a list of dictionaries with the backend, operation, sizes, times, growth exponent, fitted class, documented class (and its exponent)
+	and whether the growth matches the documented class.
+	"""
+	times_by_operation = dict()
+	for result in results:
+		times_by_operation.setdefault((result["backend"], result["operation"]), []).append((result["size"], result[statistic]))
+	analyses = []
+	for (backend_name, operation), measurements in times_by_operation.items():
+		measurements.sort()
+		if len(measurements) < 3:
+			continue
+		sizes = [size for size, _ in measurements]
+		times = [time for _, time in measurements]
+		fitted_class, errors = classify(sizes, times)
+		exponent = fit_growth_exponent(sizes, times)
+		documented_class = documented_complexity(backend_name, operation)
+		documented_exponent = None if documented_class is None else expected_exponent(documented_class, sizes)
+		analyses.append({
+			"backend": backend_name,
+			"operation": operation,
+			"sizes": sizes,
+			"times": times,
+			"exponent": exponent,
+			"fitted_class": fitted_class,
+			"errors": errors,
+			"documented_class": documented_class,
+			"documented_exponent": documented_exponent,
+			"matches": documented_class is None or _matches(sizes, exponent, errors, documented_class),
+		})
+	return analyses
+
+##################################################
+#################### REPORTING ###################
+##################################################
+
+def format_time(nanoseconds):
+	converted_time, converted_time_name = SecondsFormatter.AUTO.convert(nanoseconds)
+	return f"{converted_time:.3f} {converted_time_name}"
+
+def markdown_report(analyses, statistic="p50_ns"):
+	""" Returns a markdown report of the analyses, with the mismatches first and the measured times of every operation. """
+	lines = ["# Scaling report", ""]
+	mismatches = [analysis for analysis in analyses if not analysis["matches"]]
+	if mismatches:
+		lines.append(f"{len(mismatches)} operations do not scale as documented:")
+		lines.append("")
+		for analysis in mismatches:
+			lines.append(f"- **{analysis['backend']} {analysis['operation']}** is documented as {analysis['documented_class']} (growth exponent {analysis['documented_exponent']:.2f}) "
+				f"but grows with exponent {analysis['exponent']:.2f} and fits {analysis['fitted_class']} best")
+	else:
+		lines.append("Every documented operation scales as documented.")
+	lines.append("")
+	lines.append(f"## Fitted complexity ({statistic})")
+	lines.append("")
+	lines.append("| backend | operation | documented | documented exponent | growth exponent | best fitting class | |")
+	lines.append("|---|---|---|---|---|---|---|")
+	for analysis in analyses:
+		if analysis["documented_class"] is None:
+			documented, documented_exponent, status = "-", "-", ""
+		else:
+			documented, documented_exponent = analysis["documented_class"], f"{analysis['documented_exponent']:.2f}"
+			status = "ok" if analysis["matches"] else "**MISMATCH**"
+		lines.append(f"| {analysis['backend']} | {analysis['operation']} | {documented} | {documented_exponent} | {analysis['exponent']:.2f} | {analysis['fitted_class']} | {status} |")
+	lines.append("")
+	lines.append(f"## Measured times ({statistic})")
+	lines.append("")
+	sizes = sorted({size for analysis in analyses for size in analysis["sizes"]})
+	lines.append("| backend | operation | " + " | ".join(f"n = {size:,}" for size in sizes) + " |")
+	lines.append("|---|---|" + "---|" * len(sizes))
+	for analysis in analyses:
+		times_by_size = dict(zip(analysis["sizes"], analysis["times"]))
+		lines.append(f"| {analysis['backend']} | {analysis['operation']} | " + " | ".join(format_time(times_by_size[size]) if size in times_by_size else "-" for size in sizes) + " |")
+	lines.append("")
+	return "\n".join(lines)
+
+##################################################
+###################### MAIN ######################
+##################################################
+
+def main(arguments=None):
+	parser = argparse.ArgumentParser(description="Measures how the library backends scale and flags operations that do not scale as documented.")
+	parser.add_argument("--min-size", type=int, default=2_000, help="the smallest library size")
+	parser.add_argument("--factor", type=int, default=2, help="how many times larger every next size is")
+	parser.add_argument("--steps", type=int, default=7, help="the amount of sizes")
+	parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+	parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+	parser.add_argument("--lookups", type=int, default=200, help="the amount of finds, shelves and unshelves measured for every backend and size")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--statistic", choices=("mean_ns", "p50_ns", "min_ns"), default="p50_ns", help="the statistic fitted")
+	parser.add_argument("--results", help="a JSON file saved by benchmark_suite.py to analyse instead of measuring")
+	parser.add_argument("--report", help="a file to write the markdown report to (printed by default)")
+	arguments = parser.parse_args(arguments)
+
+	if arguments.steps < 3:
+		parser.error("--steps must be at least 3 to fit a growth")
+	if arguments.results is not None:
+		results = load_json(arguments.results)
+	else:
+		sizes = [arguments.min_size * arguments.factor ** step for step in range(arguments.steps)]
+		results = run_suite(sizes, arguments.backends, arguments.operations, arguments.lookups, 1, arguments.seed, progress=print_result)
+	report = markdown_report(analyse(results, arguments.statistic), arguments.statistic)
+	if arguments.report is None:
+		print(report)
+	else:
+		with open(arguments.report, "w") as report_file:
+			report_file.write(report)
+		print(f"Report written to {arguments.report}")
+
+if __name__ == "__main__":
+	main()
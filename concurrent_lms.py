@@ -0,0 +1,311 @@
+from contextlib import contextmanager
+import random
+import threading
+import zlib
+
+from author_index import AuthorIndex
+from full_text_index import FullTextIndex
+from fuzzy_index import FuzzyIndex
+from prefix_index import PrefixIndex
+from title_normalisation import EXACT
+
+class ReadWriteLock:
+    """
+    A lock that lets any amount of readers hold it at the same time, or a single writer.
+    Waiting writers are preferred, so a steady stream of readers cannot keep a writer waiting forever.
+    The lock is not reentrant -- a thread holding it must not acquire it again.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        """ Waits until there is no writer (holding the lock or waiting for it), then acquires the lock for reading. """
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """ Releases the lock acquired with acquire_read. """
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """ Waits until there are no readers and no writer, then acquires the lock for writing. """
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        """ Releases the lock acquired with acquire_write. """
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """ A context manager holding the lock for reading. """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """ A context manager holding the lock for writing. """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+class ConcurrentLMS:
+    """
+    A library management system that can be shared between threads, wrapping another library with a ReadWriteLock.
+
+    Lookups hold the lock for reading, so they never block each other.
+    Changes (shelve, unshelve, their batch forms and empty) hold the lock for writing, so no lookup ever sees a half-made change.
+    A secondary index (e.g. for find_prefix) is built while holding the lock for writing the first time it is used.
+
+    The wrapped library must not be used directly while it is shared.
+    """
+
+    def __init__(self, library, exclusive_reads=False):
+        """
+        Creates a thread-safe library wrapping library.
+
+        library - the library to share between threads.
+        exclusive_reads (optional) - must be True if lookups change the library (e.g. SelfOrganisingLMS or CachedLMS),
+            so lookups hold the lock for writing instead.
+        """
+        self._library = library
+        self._lock = ReadWriteLock()
+        self._read_locked = self._lock.write_locked if exclusive_reads else self._lock.read_locked
+
+    def find(self, title):
+        """ Finds and returns the book in the library with title (or None). """
+        with self._read_locked():
+            return self._library.find(title)
+
+    def find_many(self, titles):
+        """ Finds the books in the library with the specified titles (see LibraryManagementSystem.find_many). """
+        with self._read_locked():
+            return self._library.find_many(titles)
+
+    def find_prefix(self, prefix, limit=10, cursor=None):
+        """ Finds the books in the library with titles that start with prefix (see LibraryManagementSystem.find_prefix). """
+        return self._read_secondary_index(PrefixIndex, lambda: self._library.find_prefix(prefix, limit, cursor))
+
+    def find_by_author(self, author):
+        """ Finds the books in the library by author (see LibraryManagementSystem.find_by_author). """
+        return self._read_secondary_index(AuthorIndex, lambda: self._library.find_by_author(author))
+
+    def find_fuzzy(self, title, max_results=10, max_distance=2):
+        """ Finds the books in the library with titles similar to title (see LibraryManagementSystem.find_fuzzy). """
+        return self._read_secondary_index(FuzzyIndex, lambda: self._library.find_fuzzy(title, max_results, max_distance))
+
+    def find_words(self, query, match_all=True):
+        """ Finds the books in the library with titles or authors containing the words of query (see LibraryManagementSystem.find_words). """
+        return self._read_secondary_index(FullTextIndex, lambda: self._library.find_words(query, match_all))
+
+    def shelve(self, book):
+        """ Adds the specified book to the library. """
+        with self._lock.write_locked():
+            self._library.shelve(book)
+
+    def unshelve(self, title):
+        """ Removes and returns the book in the library with title (or None). """
+        with self._lock.write_locked():
+            return self._library.unshelve(title)
+
+    def shelve_many(self, books):
+        """ Adds the specified books to the library as one change. """
+        with self._lock.write_locked():
+            self._library.shelve_many(books)
+
+    def unshelve_many(self, titles):
+        """ Removes the books in the library with the specified titles as one change (see LibraryManagementSystem.unshelve_many). """
+        with self._lock.write_locked():
+            return self._library.unshelve_many(titles)
+
+    def empty(self):
+        """ Removes every book from the library. """
+        with self._lock.write_locked():
+            self._library.empty()
+
+    def normalise_title(self, title):
+        """ Returns title as the library compares it (see TitleNormaliser). """
+        return self._library.normalise_title(title)
+
+    def random_book(self):
+        with self._read_locked():
+            return self._library.random_book()
+
+    def __len__(self):
+        with self._read_locked():
+            return len(self._library)
+
+    def __str__(self):
+        with self._read_locked():
+            return str(self._library)
+
+    def _read_secondary_index(self, index_type, query):
+        """ Runs query holding the lock for reading if the library's index_type index is built, otherwise holding it for writing (to build it). """
+        with self._read_locked():
+            if index_type in self._library._secondary_indexes:
+                return query()
+        with self._lock.write_locked():
+            return query()
+
+class StripedLMS:
+    """
+    A library management system that can be shared between threads, split into shards with a lock each (lock striping).
+
+    Every title belongs to one shard (chosen from the CRC-32 of its normalised title), so lookups and changes
+    of titles in different shards never wait for each other, and lookups in the same shard only wait for changes.
+    Every shard is an independent library of the same type.
+
+    Lookups that rank books across the whole library (find_prefix and find_fuzzy) are not supported -- use ConcurrentLMS instead.
+    """
+
+    def __init__(self, books, library_type, amount_of_shards=16, **library_arguments):
+        """
+        Creates a new striped library with the specified books.
+
+        books - the books to initialize the library with.
+        library_type - the type of every shard (e.g. HashMapLMS).
+        amount_of_shards (optional) - the amount of shards (and locks).
+        library_arguments (optional) - keyword arguments passed to library_type for every shard (e.g. normaliser or copy_policy).
+            Every shard is created with its books, so they are copied as copy_policy says. Like in every library, shelved books are not copied.
+        """
+        if amount_of_shards <= 0:
+            raise ValueError("amount_of_shards must be greater or equal to 1")
+        self._normalise = library_arguments.get("normaliser", EXACT)
+        self._amount_of_shards = amount_of_shards
+        books_of_shards = [[] for _ in range(amount_of_shards)]
+        for book in books:
+            books_of_shards[self._shard_index(book.title())].append(book)
+        self._shards = [library_type(books_of_shard, **library_arguments) for books_of_shard in books_of_shards]
+        self._locks = [ReadWriteLock() for _ in range(amount_of_shards)]
+
+    def find(self, title):
+        """ Finds and returns the book in the library with title (or None). """
+        shard_index = self._shard_index(title)
+        with self._locks[shard_index].read_locked():
+            return self._shards[shard_index].find(title)
+
+    def find_many(self, titles):
+        """ Finds the books in the library with the specified titles, with one find_many call per shard. """
+        titles = list(titles)
+        books = [None] * len(titles)
+        for shard_index, positions in self._group_by_shard(titles).items():
+            with self._locks[shard_index].read_locked():
+                found_books = self._shards[shard_index].find_many([titles[position] for position in positions])
+            for position, book in zip(positions, found_books):
+                books[position] = book
+        return books
+
+    def find_by_author(self, author):
+        """ Finds the books in the library by author, from every shard (see LibraryManagementSystem.find_by_author). """
+        return self._query_every_shard(lambda shard: shard.find_by_author(author), AuthorIndex)
+
+    def find_words(self, query, match_all=True):
+        """ Finds the books in the library with titles or authors containing the words of query, from every shard (see LibraryManagementSystem.find_words). """
+        return self._query_every_shard(lambda shard: shard.find_words(query, match_all), FullTextIndex)
+
+    def shelve(self, book):
+        """ Adds the specified book to the library. """
+        shard_index = self._shard_index(book.title())
+        with self._locks[shard_index].write_locked():
+            self._shards[shard_index].shelve(book)
+
+    def unshelve(self, title):
+        """ Removes and returns the book in the library with title (or None). """
+        shard_index = self._shard_index(title)
+        with self._locks[shard_index].write_locked():
+            return self._shards[shard_index].unshelve(title)
+
+    def shelve_many(self, books):
+        """ Adds the specified books to the library, with one shelve_many call per shard. """
+        books = list(books)
+        for shard_index, positions in self._group_by_shard([book.title() for book in books]).items():
+            with self._locks[shard_index].write_locked():
+                self._shards[shard_index].shelve_many([books[position] for position in positions])
+
+    def unshelve_many(self, titles):
+        """ Removes the books in the library with the specified titles, with one unshelve_many call per shard (see LibraryManagementSystem.unshelve_many). """
+        titles = list(titles)
+        books = [None] * len(titles)
+        for shard_index, positions in self._group_by_shard(titles).items():
+            with self._locks[shard_index].write_locked():
+                removed_books = self._shards[shard_index].unshelve_many([titles[position] for position in positions])
+            for position, book in zip(positions, removed_books):
+                books[position] = book
+        return books
+
+    def empty(self):
+        """ Removes every book from the library (holding every shard's lock, always in the same order). """
+        for lock in self._locks:
+            lock.acquire_write()
+        try:
+            for shard in self._shards:
+                shard.empty()
+        finally:
+            for lock in self._locks:
+                lock.release_write()
+
+    def normalise_title(self, title):
+        """ Returns title as the library compares it (see TitleNormaliser). """
+        return self._normalise(title)
+
+    def random_book(self):
+        """
+        Returns a random book, choosing the shard in proportion to its amount of books.
+        Raises an IndexError if the library is empty (like LibraryManagementSystem.random_book).
+        """
+        lengths = [len(shard) for shard in self._shards]
+        if not any(lengths):
+            raise IndexError("Cannot choose from an empty library")
+        shard_index = random.choices(range(len(self._shards)), weights=lengths)[0]
+        with self._locks[shard_index].read_locked():
+            return self._shards[shard_index].random_book()
+
+    def __len__(self):
+        """ Returns the amount of books in the library (shards are counted one after another, so changes made meanwhile may or may not be counted). """
+        return sum(len(shard) for shard in self._shards)
+
+    def __str__(self):
+        return "\n".join(filter(None, (str(shard) for shard in self._shards)))
+
+    def _shard_index(self, title):
+        """ Returns the index of the shard holding the books with title. """
+        return zlib.crc32(self._normalise(title).encode('utf-8')) % self._amount_of_shards
+
+    def _group_by_shard(self, titles):
+        """ Returns a dictionary from shard index to the positions of the titles belonging to the shard (in order). """
+        positions_by_shard = dict()
+        for position, title in enumerate(titles):
+            positions_by_shard.setdefault(self._shard_index(title), []).append(position)
+        return positions_by_shard
+
+    def _query_every_shard(self, query, index_type):
+        """ Runs query on every shard (building the shard's index_type index while holding its lock for writing) and returns every book found. """
+        books = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock.read_locked():
+                if index_type in shard._secondary_indexes:
+                    books.extend(query(shard))
+                    continue
+            with lock.write_locked():
+                books.extend(query(shard))
+        return books
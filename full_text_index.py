@@ -0,0 +1,181 @@
+import re
+import sys
+
+import book_csv
+
+# the smallest amount of removed books before the index is compacted
+_MINIMUM_REMOVED_TO_COMPACT = 1024
+
+_WORD = re.compile(r"\w+")
+
+class PostingList:
+    """
+    The ids of the books containing a word, in increasing order.
+
+    Ids are stored as the differences between consecutive ids, each encoded as a variable-length integer
+    (7 bits per byte, the high bit is set on every byte but the last), so most ids take a single byte.
+    """
+
+    __slots__ = ("_data", "_last_id", "_length")
+
+    def __init__(self):
+        self._data = bytearray()
+        self._last_id = -1
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def append(self, book_id):
+        """ Adds book_id to the end of the list. book_id must be greater than every id in the list. """
+        delta = book_id - self._last_id
+        while delta >= 0x80:
+            self._data.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        self._data.append(delta)
+        self._last_id = book_id
+        self._length += 1
+
+    def __iter__(self):
+        """ Decodes and yields the ids in increasing order. """
+        book_id = -1
+        delta = 0
+        shift = 0
+        for byte in self._data:
+            delta |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                book_id += delta
+                yield book_id
+                delta = 0
+                shift = 0
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the list in bytes. """
+        return sys.getsizeof(self) + sys.getsizeof(self._data)
+
+class FullTextIndex:
+    """
+    A secondary index from the words of every title and author to the books containing them (an inverted index).
+    Words are compared ignoring case (e.g. "machine learning" finds "Machine Learning for Beginners").
+
+    Every word keeps a compressed PostingList of book ids.
+    Queries matching every word decode the shortest posting list first and only keep the ids found in every other list,
+    so the amount of candidates only ever shrinks.
+
+    Adding a book is O(words in the book). Removing a book is O(length of its rarest word's posting list) --
+    removed books are only marked, and the index is compacted once more than half of its books are removed.
+    """
+
+    def __init__(self, books=(), titles=None):
+        """
+        Creates a new full-text index holding the specified books.
+        titles is accepted like the other secondary indexes, but books are indexed by the words of their title and author.
+        """
+        self._postings = dict()
+        # the book of every id (None once the book is removed)
+        self._books = []
+        self._amount_removed = 0
+        self.add_many(books)
+
+    @classmethod
+    def from_csv_file(cls, path, batch_size=10_000):
+        """
+        Creates a full-text index of the books in a csv file with headers Title, Author.
+        The books are read and indexed in batches, so the file is never held in memory as a whole.
+        """
+        index = cls()
+        for books in book_csv.iter_book_batches_from_csv_file(path, batch_size):
+            index.add_many(books)
+        return index
+
+    def add(self, book, title=None):
+        """ Adds the specified book to the index. """
+        self.add_many((book,))
+
+    def add_many(self, books):
+        """ Adds the specified books to the index. """
+        postings = self._postings
+        for book in books:
+            words = _book_words(book)
+            # books without any words can never be found, so they are not indexed
+            if not words:
+                continue
+            book_id = len(self._books)
+            self._books.append(book)
+            for word in words:
+                posting_list = postings.get(word)
+                if posting_list is None:
+                    posting_list = postings[word] = PostingList()
+                posting_list.append(book_id)
+
+    def remove(self, book, title=None):
+        """ Removes the specified book (the same object that was added) from the index. """
+        words = _book_words(book)
+        if not words:
+            return
+        rarest_posting_list = min((self._postings.get(word, ()) for word in words), key=len)
+        for book_id in rarest_posting_list:
+            if self._books[book_id] is book:
+                self._books[book_id] = None
+                self._amount_removed += 1
+                break
+        if self._amount_removed >= _MINIMUM_REMOVED_TO_COMPACT and self._amount_removed * 2 > len(self._books):
+            self._compact()
+
+    def find_words(self, query, match_all=True):
+        """
+        Finds the books with titles or authors containing the words of query.
+        Returns a list of the books, in the order they were added.
+
+        query - the words to find (e.g. "machine learning"). Punctuation and case are ignored.
+        match_all (optional) - if True, books must contain every word (AND), otherwise any of the words (OR).
+        """
+        words = set(_words(query))
+        if not words:
+            return []
+        posting_lists = sorted((self._postings.get(word, ()) for word in words), key=len)
+        if match_all:
+            book_ids = list(posting_lists[0])
+            for posting_list in posting_lists[1:]:
+                if not book_ids:
+                    break
+                book_ids = _intersect(book_ids, posting_list)
+        else:
+            book_ids = sorted(set().union(*posting_lists))
+        books = self._books
+        return [books[book_id] for book_id in book_ids if books[book_id] is not None]
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the index itself in bytes (the books and words are shared with the library and not counted). """
+        return (sys.getsizeof(self._postings) + sum(posting_list.size_in_bytes() for posting_list in self._postings.values())
+            + sys.getsizeof(self._books))
+
+    def _compact(self):
+        """ Rebuilds the index without the removed books. """
+        books = [book for book in self._books if book is not None]
+        self.__init__(books)
+
+def _intersect(book_ids, posting_list):
+    """ Returns the ids of book_ids (in increasing order) that are also in posting_list. Stops decoding once posting_list passes the last id. """
+    wanted_ids = set(book_ids)
+    last_id = book_ids[-1]
+    found_ids = []
+    for book_id in posting_list:
+        if book_id > last_id:
+            break
+        if book_id in wanted_ids:
+            found_ids.append(book_id)
+    return found_ids
+
+def _words(text):
+    """ Returns the words of text, ignoring case. """
+    return _WORD.findall(text.casefold())
+
+def _book_words(book):
+    """ Returns the set of words in the title and author of book. """
+    words = set(_words(book.title()))
+    if book.author() is not None:
+        words.update(_words(book.author()))
+    return words
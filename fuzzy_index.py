@@ -0,0 +1,167 @@
+from array import array
+from collections import Counter
+from itertools import chain
+import sys
+
+# the length of the grams titles are split into
+GRAM_LENGTH = 3
+
+# the smallest amount of removed books before the index is compacted
+_MINIMUM_REMOVED_TO_COMPACT = 1024
+
+class FuzzyIndex:
+    """
+    A secondary index of the trigrams of every title, used to find books with misspelled titles.
+
+    Every title is padded and split into trigrams (e.g. "Dune" has "  D", " Du", "Dun", "une", "ne ", "e  "),
+    and every trigram keeps the ids of the books with that trigram (a posting list).
+    A title within k edits of the query shares all but at most 3k of the query's trigrams,
+    so only books sharing enough of the rarest trigrams are compared with the query (by edit distance).
+
+    Searching is O(total length of the 3k + 2 shortest posting lists of the query + candidates * title length * k).
+    Adding a book is O(title length). Removing a book is O(length of its rarest trigram's posting list) --
+    removed books are only marked, and the index is compacted once more than half of its books are removed.
+    """
+
+    def __init__(self, books=(), titles=None):
+        """
+        Creates a new fuzzy index holding the specified books.
+
+        books (optional) - the books to index.
+        titles (optional) - the titles to index the books by (e.g. normalised titles), in the same order as books. Defaults to the titles of the books.
+        """
+        # the book and title of every id (None once the book is removed)
+        self._books = list(books)
+        self._titles = [book.title() for book in self._books] if titles is None else list(titles)
+        self._amount_removed = 0
+        # the posting lists are gathered in lists first, then packed into arrays (4 bytes per id)
+        postings = dict()
+        for book_id, title in enumerate(self._titles):
+            for gram in _grams(title):
+                book_ids = postings.get(gram)
+                if book_ids is None:
+                    postings[gram] = [book_id]
+                else:
+                    book_ids.append(book_id)
+        self._postings = {gram: array('I', book_ids) for gram, book_ids in postings.items()}
+
+    def add(self, book, title=None):
+        """ Adds the specified book to the index under title (defaults to the title of the book). """
+        if title is None:
+            title = book.title()
+        book_id = len(self._books)
+        self._books.append(book)
+        self._titles.append(title)
+        for gram in _grams(title):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(book_id)
+
+    def remove(self, book, title=None):
+        """ Removes the specified book (the same object that was added) from the index. title must be the title the book was added under. """
+        if title is None:
+            title = book.title()
+        rarest_postings = min((self._postings.get(gram, ()) for gram in _grams(title)), key=len)
+        for book_id in rarest_postings:
+            if self._books[book_id] is book:
+                self._books[book_id] = None
+                self._titles[book_id] = None
+                self._amount_removed += 1
+                break
+        if self._amount_removed >= _MINIMUM_REMOVED_TO_COMPACT and self._amount_removed * 2 > len(self._books):
+            self._compact()
+
+    def find_fuzzy(self, title, max_results=10, max_distance=2):
+        """
+        Finds the books indexed under titles within max_distance edits (insertions, deletions or substitutions) of title.
+        Returns a list of at most max_results books, closest first (books at the same distance are in title order).
+
+        title - the (possibly misspelled) title to find.
+        max_results (optional) - the maximum amount of books to return.
+        max_distance (optional) - the maximum edit distance of the books found.
+            Short titles share too few trigrams to tell typos apart, so max_distance is lowered for them.
+        """
+        if max_results <= 0:
+            raise ValueError("max_results must be greater or equal to 1")
+        grams = _grams(title)
+        # a title within max_distance edits shares at least len(grams) - GRAM_LENGTH * max_distance of the trigrams
+        max_distance = min(max_distance, (len(grams) - 1) // GRAM_LENGTH)
+        minimum_shared_grams = len(grams) - GRAM_LENGTH * max_distance
+        # so it shares at least 2 of the len(grams) - minimum_shared_grams + 2 rarest trigrams,
+        # and only the (short) posting lists of the rarest trigrams have to be counted
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        minimum_shared_rare_grams = min(2, minimum_shared_grams)
+        rare_postings = postings[:len(grams) - minimum_shared_grams + minimum_shared_rare_grams]
+        shared_grams = Counter(chain.from_iterable(rare_postings))
+
+        found = []
+        # several books can have the same title, so the distance of every title is only computed once
+        distances = dict()
+        for book_id in [book_id for book_id, amount_shared in shared_grams.items() if amount_shared >= minimum_shared_rare_grams]:
+            indexed_title = self._titles[book_id]
+            # the title is None if the book was removed
+            if indexed_title is None or abs(len(indexed_title) - len(title)) > max_distance:
+                continue
+            if indexed_title in distances:
+                distance = distances[indexed_title]
+            # counting every shared trigram is much cheaper than the edit distance
+            elif len(grams.intersection(_grams(indexed_title))) < minimum_shared_grams:
+                distance = distances[indexed_title] = None
+            else:
+                distance = distances[indexed_title] = bounded_edit_distance(title, indexed_title, max_distance)
+            if distance is not None:
+                found.append((distance, indexed_title, book_id))
+        found.sort()
+        return [self._books[book_id] for _, _, book_id in found[:max_results]]
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the index itself in bytes (the books and titles are shared with the library and not counted). """
+        return (sys.getsizeof(self._postings) + sum(map(sys.getsizeof, self._postings.keys())) + sum(map(sys.getsizeof, self._postings.values()))
+            + sys.getsizeof(self._books) + sys.getsizeof(self._titles))
+
+    def _compact(self):
+        """ Rebuilds the index without the removed books. """
+        books = [book for book in self._books if book is not None]
+        titles = [title for title in self._titles if title is not None]
+        self.__init__(books, titles)
+
+def bounded_edit_distance(first, second, max_distance):
+    """
+    Returns the edit distance (Levenshtein distance) between first and second, or None if it is greater than max_distance.
+    Only the cells within max_distance of the diagonal are computed, and the computation stops as soon as every cell of a row is too far.
+
+    Runs in O(len(first) * max_distance).
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return None
+    too_far = max_distance + 1
+    previous_row = [column if column <= max_distance else too_far for column in range(len(second) + 1)]
+    for row, first_character in enumerate(first, 1):
+        first_column = max(1, row - max_distance)
+        last_column = min(len(second), row + max_distance)
+        current_row = [too_far] * (len(second) + 1)
+        if row <= max_distance:
+            current_row[0] = row
+        row_minimum = current_row[0]
+        for column in range(first_column, last_column + 1):
+            if first_character == second[column - 1]:
+                distance = previous_row[column - 1]
+            else:
+                distance = 1 + min(previous_row[column - 1], previous_row[column], current_row[column - 1])
+            if distance > max_distance:
+                distance = too_far
+            current_row[column] = distance
+            if distance < row_minimum:
+                row_minimum = distance
+        if row_minimum > max_distance:
+            return None
+        previous_row = current_row
+    distance = previous_row[len(second)]
+    return distance if distance <= max_distance else None
+
+def _grams(title):
+    """ Returns the set of trigrams of title (padded with spaces, so the start and end of the title have their own trigrams). """
+    padding = " " * (GRAM_LENGTH - 1)
+    padded_title = padding + title + padding
+    return {padded_title[start:start + GRAM_LENGTH] for start in range(len(padded_title) - GRAM_LENGTH + 1)}
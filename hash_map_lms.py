@@ -1,42 +1,105 @@
-from library_management_system import LibraryManagementSystem
+import sys
+
+from library_management_system import LibraryManagementSystem, CopyPolicy
+from title_normalisation import EXACT
 
 class HashMapLMS(LibraryManagementSystem):
 	""" 
     A library that uses a hash map to find books. 
 
     Insertion and searching is O(1).
-    Memory usage is much higher than other variations.  
+    Memory usage is higher than LinearSearchLMS and BinarySearchLMS -- about 120 bytes per book (deep copies included) against about 65 and 105 
+    (see the memory_footprint benchmark). 
     """
 
-	def __init__(self, books):
+	def __init__(self, books, copy_policy=CopyPolicy.DEEP, normaliser=EXACT):
 		"""
 		Creates a new library with the specified books.
-        Makes a deep copy of the books. 
+		Makes a deep copy of the books unless another copy policy is specified. 
+
+		books - the books to initialize the library with.  
+		copy_policy (optional) - how the books are copied (see CopyPolicy).
+		normaliser (optional) - which titles are treated as equal (see TitleNormaliser). Titles are compared exactly by default.
+		"""
+		super().__init__(books, copy_policy, normaliser)
+		# the hashmap is keyed by the normalised titles
+		self._hashmap = dict()
+		for index, title in enumerate(self._titles):
+			self._hashmap[title] = index
 
-	    books - the books to initialize the library with.  
+	def empty(self):
+		""" 
+		Removes every book from the library. 
+		The empty method is overriden to also empty the hashmap.
 		"""
-		super().__init__(books)
+		super().empty()
 		self._hashmap = dict()
-		for index, book in enumerate(self._books):
-			self._hashmap[book.title()] = index
 
 	def shelve(self, book):
 		""" Adds the specified book to the library. """
+		title = book.title() if self._exact else self._normalise(book.title())
 		self._books.append(book)
+		self._titles.append(title)
 		index = len(self._books) - 1
-		self._hashmap[book.title()] = index
+		self._hashmap[title] = index
+		self._index_shelved(book, title)
 
 	def unshelve(self, title):
 		""" 
-		Removes the book with the specified title from the library. 
+		Removes and returns the book with the specified title from the library. 
+		If the book is not in the library, None is returned and the library is not changed.
 		The unshelve method is overriden to update both the books and hashmap.
+
+		Runs in O(1) -- the last book is moved into the removed book's slot (instead of shifting every book after it),
+			so only the moved book's index has to be updated in the hashmap.
 		"""
-		super().unshelve(title)
-		del self._hashmap[title]
+		if not self._exact:
+			title = self._normalise(title)
+		index = self._hashmap.pop(title, None)
+		if index is None:
+			return None
+		book = self._books[index]
+		last_book = self._books.pop()
+		last_title = self._titles.pop()
+		last_index = len(self._books)
+		if index != last_index:
+			self._books[index] = last_book
+			self._titles[index] = last_title
+			# only redirect the moved book's title if the hashmap pointed at it (a shadowed duplicate title keeps its mapping)
+			if self._hashmap.get(last_title) == last_index:
+				self._hashmap[last_title] = index
+		self._index_unshelved(book, title)
+		return book
+
+	def find_many(self, titles):
+		""" 
+		Finds the books with the specified titles. 
+		Returns the book (or None) for every title, in the same order as titles. 
+		"""
+		books = self._books
+		if not self._exact:
+			titles = map(self._normalise, titles)
+		return [None if index is None else books[index] for index in map(self._hashmap.get, titles)]
+
+	def shelve_many(self, books):
+		""" Adds the specified books to the library with one bulk update of the books and the hashmap. """
+		first_index = len(self._books)
+		self._books.extend(books)
+		self._titles.extend(self._normalise(book.title()) for book in self._books[first_index:])
+		self._hashmap.update(zip(self._titles[first_index:], range(first_index, len(self._books))))
+		for book, title in zip(self._books[first_index:], self._titles[first_index:]):
+			self._index_shelved(book, title)
+
+	def _primary_index_size(self):
+		""" Returns the memory used by the books and titles lists and the hashmap (including the indexes it holds) in bytes. """
+		return super()._primary_index_size() + sys.getsizeof(self._hashmap) + sum(map(sys.getsizeof, self._hashmap.values()))
 
 	def _find_index(self, title):
 		"""
 		Returns the index of the book with title. 
 		If the title is not in the library, None is returned. 
+		NOTE -- CASE-SENSITIVE (unless the library's normaliser ignores case)
 		"""
-		return self._hashmap.get(title)
\ No newline at end of file
+		if self._exact:
+			return self._hashmap.get(title)
+		return self._hashmap.get(self._normalise(title))
\ No newline at end of file
@@ -1,6 +1,36 @@
 from abc import ABC, abstractmethod
+from enum import Enum
 import copy
 import random
+import sys
+
+from author_index import AuthorIndex
+from full_text_index import FullTextIndex
+from fuzzy_index import FuzzyIndex
+from prefix_index import PrefixIndex
+from title_normalisation import EXACT
+
+class CopyPolicy(Enum):
+    """ 
+    An enum used to choose how a library takes ownership of the books it is created with. 
+
+    CopyPolicy.DEEP copies the list and every book, so the library never shares anything with the caller. Should be used as the default. 
+    CopyPolicy.SHALLOW copies the list but shares the books. Libraries never change books, so one loaded list can build several libraries. 
+    CopyPolicy.BORROW takes the list as is, without copying. The caller gives the list away and must not change it afterwards. 
+
+    Iterables that are not lists (e.g. generators or catalogs) are always gathered into a new list first. 
+    """
+    DEEP = "deep"
+    SHALLOW = "shallow"
+    BORROW = "borrow"
+
+    def apply(self, books):
+        """ Returns the list of books a library should hold when created with books. """
+        if self is CopyPolicy.DEEP:
+            return copy.deepcopy(books if isinstance(books, list) else list(books))
+        if self is CopyPolicy.SHALLOW or not isinstance(books, list):
+            return list(books)
+        return books
 
 class LibraryManagementSystem(ABC):
     """ 
@@ -9,20 +39,47 @@ class LibraryManagementSystem(ABC):
     Different frameworks (linear, binary, etc.) must implement insertion (shelve) and index resolution (_find_index)
     """
 
-    def __init__(self, books):
+    def __init__(self, books, copy_policy=CopyPolicy.DEEP, normaliser=EXACT):
         """ 
         Creates a new library management system with the specified books. 
-        Makes a deep copy of the books. 
+        Makes a deep copy of the books unless another copy policy is specified. 
+
+        books - the books to initialize the library with. 
+        copy_policy (optional) - how the books are copied (see CopyPolicy). 
+        normaliser (optional) - which titles are treated as equal (see TitleNormaliser). Titles are compared exactly by default. 
         """
-        self._books = copy.deepcopy(books)
+        self._books = copy_policy.apply(books)
+        self._normalise = normaliser
+        # calling even the exact normaliser costs more than a dict lookup, so the hot paths (find, shelve, unshelve) skip it when titles are compared exactly
+        self._exact = normaliser.is_exact()
+        # the normalised title of every book (in the same order as the books), so lookups never normalise shelved titles again
+        if self._exact:
+            self._titles = [book.title() for book in self._books]
+        else:
+            self._titles = [normaliser(book.title()) for book in self._books]
+        # secondary indexes (e.g. for prefix search) are built on first use, then kept up to date by shelving and unshelving
+        self._secondary_indexes = dict()
 
     def empty(self):
-        """ Creates an empty library with no books. """
-        self.__init__([])
+        """ 
+        Removes every book from the library. 
+        The library keeps its settings (e.g. its normaliser). 
+        """
+        self._books = []
+        self._titles = []
+        self._secondary_indexes = dict()
+
+    def normalise_title(self, title):
+        """ Returns title as the library compares it (see TitleNormaliser). """
+        return self._normalise(title)
 
     def __len__(self):
         return len(self._books)
 
+    def __iter__(self):
+        """ Iterates over the books in the library, in the order the library keeps them. """
+        return iter(self._books)
+
     @abstractmethod
     def shelve(self, book): 
         """ A method that should add a book to the library. """
@@ -38,6 +95,7 @@ class LibraryManagementSystem(ABC):
         if index is None:
             return None
         book = self._books.pop(index)
+        self._index_unshelved(book, self._titles.pop(index))
         return book
 
     def find(self, title):
@@ -51,11 +109,124 @@ class LibraryManagementSystem(ABC):
         book = self._books[index]
         return book
 
+    def find_many(self, titles):
+        """ 
+        Finds the books in the library with the specified titles. 
+        Returns a list holding the book (or None, if the book is not in the library) for every title, in the same order as titles. 
+
+        Libraries override this when they can answer a whole batch faster than one find per title.
+        """
+        return [self.find(title) for title in titles]
+
+    def shelve_many(self, books):
+        """ 
+        Adds the specified books to the library. 
+
+        Libraries override this when they can add a whole batch faster than one shelve per book.
+        """
+        for book in books:
+            self.shelve(book)
+
+    def unshelve_many(self, titles):
+        """ 
+        Removes the books in the library with the specified titles, as if unshelve was called for every title in order. 
+        Returns a list holding the removed book (or None) for every title, in the same order as titles. 
+
+        Libraries override this when they can remove a whole batch faster than one unshelve per title.
+        """
+        return [self.unshelve(title) for title in titles]
+
+    def find_prefix(self, prefix, limit=10, cursor=None):
+        """ 
+        Finds the books in the library with titles that start with prefix, in title order. 
+        Returns (books, next_cursor) -- at most limit books and the cursor to pass back for the next page (None if there are no more books). 
+
+        The prefix index is built the first time this is called -- O(n log n) -- and then kept up to date by shelving and unshelving. 
+        Queries are O(log n + limit). 
+
+        The prefix is normalised like titles, so prefix search is case-sensitive unless the library's normaliser ignores case. 
+        """
+        return self._secondary_index(PrefixIndex).find_prefix(self._normalise(prefix), limit, cursor)
+
+    def find_by_author(self, author):
+        """ 
+        Finds the books in the library by author. 
+        Returns a list of the books (empty if there are none). If author is None, returns the books without an author. 
+
+        The author index is built the first time this is called -- O(n) -- and then kept up to date by shelving and unshelving. 
+
+        NOTE -- CASE-SENSITIVE
+        """
+        return self._secondary_index(AuthorIndex).find(author)
+
+    def find_fuzzy(self, title, max_results=10, max_distance=2):
+        """ 
+        Finds the books in the library with titles similar to title (e.g. misspelled titles). 
+        Returns a list of at most max_results books with titles within max_distance edits of title, closest first. 
+
+        The fuzzy (trigram) index is built the first time this is called -- O(total length of the titles) -- and then kept up to date by shelving and unshelving. 
+        Titles are compared after normalisation, so fuzzy search is case-sensitive unless the library's normaliser ignores case. 
+        """
+        return self._secondary_index(FuzzyIndex).find_fuzzy(self._normalise(title), max_results, max_distance)
+
+    def find_words(self, query, match_all=True):
+        """ 
+        Finds the books in the library with titles or authors containing the words of query (e.g. "machine learning"). 
+        Returns a list of the books. If match_all is False, books containing any of the words are returned instead of books containing all of them. 
+
+        The full-text index is built the first time this is called -- O(total amount of words) -- and then kept up to date by shelving and unshelving. 
+        Words are compared ignoring case and punctuation. 
+        """
+        return self._secondary_index(FullTextIndex).find_words(query, match_all)
+
+    def index_memory_usage(self):
+        """ 
+        Returns a dictionary with the memory used by every index of the library in bytes. 
+        "primary" is the structure used by find, followed by every secondary index built so far (e.g. "AuthorIndex"). 
+        Books and their titles/authors are shared by all indexes and are not counted. 
+        """
+        memory_usage = {"primary": self._primary_index_size()}
+        for index_type, index in self._secondary_indexes.items():
+            memory_usage[index_type.__name__] = index.size_in_bytes()
+        return memory_usage
+
     @abstractmethod
     def _find_index(self, title):
         """ A method that should find the position of the book with the given title. """
         ...
 
+    def _primary_index_size(self):
+        """ Returns the memory used by the structures used by find in bytes. Libraries with more structures than the book and title lists override this. """
+        return sys.getsizeof(self._books) + sys.getsizeof(self._titles)
+
+    def _stored_titles(self):
+        """ Returns the normalised titles of the books, in the same order as iterating over the books. """
+        return self._titles
+
+    def _secondary_index(self, index_type):
+        """ Returns the library's secondary index of type index_type, building it from the books in the library if needed. """
+        index = self._secondary_indexes.get(index_type)
+        if index is None:
+            index = index_type(self._books, self._stored_titles())
+            self._secondary_indexes[index_type] = index
+        return index
+
+    def _index_shelved(self, book, title):
+        """ 
+        Adds the shelved book to every secondary index. Must be called whenever a book is added to the library. 
+        title is the normalised title of the book. 
+        """
+        for index in self._secondary_indexes.values():
+            index.add(book, title)
+
+    def _index_unshelved(self, book, title):
+        """ 
+        Removes the unshelved book from every secondary index. Must be called whenever a book is removed from the library. 
+        title is the normalised title of the book. 
+        """
+        for index in self._secondary_indexes.values():
+            index.remove(book, title)
+
     def random_book(self):
         return random.choice(self._books)
 
@@ -0,0 +1,399 @@
+"""
+An asyncio TCP server for a library speaking line-delimited JSON, and a load generator with a latency report.
+
+PROTOCOL:
+
+Every request and response is one JSON object on its own line (UTF-8).
+Requests name an "op" and may hold an "id", which is copied into the response:
+	{"id": 1, "op": "find", "title": "Data Smart"}
+	{"id": 2, "op": "shelve", "title": "Data Smart", "author": "John Foreman"}
+	{"id": 3, "op": "unshelve", "title": "Data Smart"}
+	{"id": 4, "op": "random_book"}
+	{"id": 5, "op": "len"}
+Responses hold "ok" and the result (or an "error"):
+	{"id": 1, "ok": true, "book": {"title": "Data Smart", "author": "John Foreman"}}     ("book" is null if there is no such book)
+	{"id": 2, "ok": true}
+	{"id": 5, "ok": true, "len": 1}
+	{"id": 6, "ok": false, "error": "unknown op 'lend'"}
+Responses are sent in the order of the requests of their connection, so clients may send more requests before reading (pipelining).
+
+USAGE:
+
+python library_server.py serve [--backend hash] [--csv books.csv] [--host 127.0.0.1] [--port 8765]
+python library_server.py load [--host 127.0.0.1] [--port 8765] [--connections 32] [--requests 20000] [--pipeline 8] [--write-ratio 0.0]
+python library_server.py demo [--backend hash] [--books 100000]     (runs a server and the load generator in one process)
+"""
+import argparse
+import asyncio
+import collections
+import json
+import random
+import time
+
+from timer import *
+from book import Book
+from binary_search_lms import BinarySearchLMS
+from hash_map_lms import HashMapLMS
+from linear_search_lms import LinearSearchLMS
+from sorted_blocks_lms import SortedBlocksLMS
+from library_management_system import CopyPolicy
+import book_csv
+
+BACKENDS = {
+	"linear": LinearSearchLMS,
+	"binary": BinarySearchLMS,
+	"hash": HashMapLMS,
+	"blocks": SortedBlocksLMS,
+}
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+##################################################
+##################### SERVER #####################
+##################################################
+
+class LibraryService:
+	"""
+	Serves one library to every connection.
+
+	Requests from every connection go through one bounded queue and are run in the order they arrive.
+	Lookups waiting in the queue together are answered with a single find_many call (micro-batching),
+	so a busy server makes fewer, larger passes over the library.
+
+	Backpressure -- when the queue is full, connections stop reading requests until it has room,
+	and a connection that has too many responses waiting to be sent stops reading too.
+	"""
+
+	def __init__(self, library, max_batch_size=256, max_batch_delay=0.0, max_queued_requests=4096, max_pipelined_requests=64):
+		"""
+		library - the library to serve.
+		max_batch_size (optional) - the maximum amount of requests run together.
+		max_batch_delay (optional) - how long (in seconds) to wait for more requests before running a batch that is not full.
+			Requests that arrive while a batch runs are batched anyway, so no delay is needed to batch under load.
+		max_queued_requests (optional) - the maximum amount of requests waiting to be run (from every connection).
+		max_pipelined_requests (optional) - the maximum amount of responses of one connection waiting to be sent.
+		"""
+		self._library = library
+		self._max_batch_size = max_batch_size
+		self._max_batch_delay = max_batch_delay
+		self._max_queued_requests = max_queued_requests
+		self._max_pipelined_requests = max_pipelined_requests
+		self._requests = None
+		self._batch_task = None
+		self._server = None
+		self._connection_tasks = set()
+		self.amount_of_batches = 0
+		self.amount_of_requests = 0
+
+	async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+		""" Starts serving on host and port. Returns the asyncio server (its sockets hold the port if port is 0). """
+		self._requests = asyncio.Queue(self._max_queued_requests)
+		self._batch_task = asyncio.create_task(self._run_batches())
+		self._server = await asyncio.start_server(self._handle_connection, host, port)
+		return self._server
+
+	async def close(self):
+		""" Stops accepting connections, closes the open connections and stops running requests. """
+		self._server.close()
+		for connection_task in list(self._connection_tasks):
+			connection_task.cancel()
+		await asyncio.gather(*self._connection_tasks, return_exceptions=True)
+		await self._server.wait_closed()
+		self._batch_task.cancel()
+		try:
+			await self._batch_task
+		except asyncio.CancelledError:
+			pass
+
+	async def _handle_connection(self, reader, writer):
+		""" Reads the requests of a connection and queues them, while a second task sends the responses in order. """
+		connection_task = asyncio.current_task()
+		self._connection_tasks.add(connection_task)
+		responses = asyncio.Queue(self._max_pipelined_requests)
+		send_task = asyncio.create_task(self._send_responses(responses, writer))
+		try:
+			try:
+				while True:
+					line = await reader.readline()
+					if not line:
+						break
+					await responses.put(await self._submit(line))
+			except (ConnectionError, ValueError):
+				# the connection was lost or a line was too long -- the connection is closed
+				pass
+			await responses.put(None)
+			await send_task
+		except asyncio.CancelledError:
+			# the service is closing, so the responses that are not sent yet are dropped
+			send_task.cancel()
+		finally:
+			self._connection_tasks.discard(connection_task)
+			writer.close()
+
+	async def _send_responses(self, responses, writer):
+		""" Sends the response of every request of a connection in order, until None is received. """
+		broken = False
+		while True:
+			future = await responses.get()
+			if future is None:
+				return
+			response = await future
+			if broken:
+				continue
+			try:
+				writer.write(json.dumps(response).encode('utf-8') + b"\n")
+				await writer.drain()
+			except ConnectionError:
+				# keep taking responses, so the reading side never waits for room
+				broken = True
+
+	async def _submit(self, line):
+		""" Queues the request in line and returns the future of its response (already done if the request is invalid). """
+		future = asyncio.get_running_loop().create_future()
+		try:
+			request = json.loads(line)
+		except ValueError as error:
+			future.set_result({"ok": False, "error": f"invalid JSON: {error}"})
+			return future
+		if not isinstance(request, dict):
+			future.set_result({"ok": False, "error": "requests must be JSON objects"})
+			return future
+		await self._requests.put((request, future))
+		return future
+
+	async def _run_batches(self):
+		""" Takes every request waiting in the queue (up to max_batch_size) and runs them together, forever. """
+		while True:
+			batch = [await self._requests.get()]
+			deadline = time.perf_counter() + self._max_batch_delay
+			while len(batch) < self._max_batch_size:
+				if not self._requests.empty():
+					batch.append(self._requests.get_nowait())
+					continue
+				remaining_delay = deadline - time.perf_counter()
+				if remaining_delay <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self._requests.get(), remaining_delay))
+				except asyncio.TimeoutError:
+					break
+			self._run_batch(batch)
+			self.amount_of_batches += 1
+			self.amount_of_requests += len(batch)
+
+	def _run_batch(self, batch):
+		""" Runs a batch of requests in order, answering every run of consecutive lookups with one find_many call. """
+		lookups = []
+		for request, future in batch:
+			if request.get("op") == "find" and isinstance(request.get("title"), str):
+				lookups.append((request, future))
+				continue
+			self._run_lookups(lookups)
+			lookups = []
+			try:
+				response = self._run_request(request)
+			except Exception as error:
+				response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+			_respond(future, request, response)
+		self._run_lookups(lookups)
+
+	def _run_lookups(self, lookups):
+		""" Answers the lookups with one find_many call. """
+		if not lookups:
+			return
+		try:
+			books = self._library.find_many([request["title"] for request, _ in lookups])
+		except Exception as error:
+			# every lookup of the batch is answered with the error, like a single request that fails
+			for request, future in lookups:
+				_respond(future, request, {"ok": False, "error": f"{type(error).__name__}: {error}"})
+			return
+		for (request, future), book in zip(lookups, books):
+			_respond(future, request, {"ok": True, "book": _book_to_json(book)})
+
+	def _run_request(self, request):
+		""" Runs a single request that is not a lookup and returns its response. """
+		operation = request.get("op")
+		if operation in ("find", "shelve", "unshelve") and not isinstance(request.get("title"), str):
+			return {"ok": False, "error": f"{operation} needs a string title"}
+		if operation == "shelve":
+			author = request.get("author")
+			if author is not None and not isinstance(author, str):
+				return {"ok": False, "error": "author must be a string or null"}
+			self._library.shelve(Book(request["title"], author))
+			return {"ok": True}
+		if operation == "unshelve":
+			return {"ok": True, "book": _book_to_json(self._library.unshelve(request["title"]))}
+		if operation == "random_book":
+			return {"ok": True, "book": _book_to_json(self._library.random_book() if len(self._library) else None)}
+		if operation == "len":
+			return {"ok": True, "len": len(self._library)}
+		return {"ok": False, "error": f"unknown op {operation!r}"}
+
+def _respond(future, request, response):
+	""" Completes future with response (copying the id of request). """
+	if "id" in request:
+		response["id"] = request["id"]
+	if not future.done():
+		future.set_result(response)
+
+def _book_to_json(book):
+	""" Returns book as a JSON object (None if book is None). """
+	if book is None:
+		return None
+	return {"title": book.title(), "author": book.author()}
+
+##################################################
+################# LOAD GENERATOR #################
+##################################################
+
+async def fetch_titles(amount_of_titles, host=DEFAULT_HOST, port=DEFAULT_PORT):
+	""" Asks the server for amount_of_titles random books and returns their titles (to build a workload of existing titles). """
+	reader, writer = await asyncio.open_connection(host, port)
+	for _ in range(amount_of_titles):
+		writer.write(b'{"op": "random_book"}\n')
+	await writer.drain()
+	titles = []
+	for _ in range(amount_of_titles):
+		book = json.loads(await reader.readline()).get("book")
+		if book is not None:
+			titles.append(book["title"])
+	writer.close()
+	await writer.wait_closed()
+	return titles
+
+async def run_load(titles, host=DEFAULT_HOST, port=DEFAULT_PORT, amount_of_connections=32, amount_of_requests=20_000, pipeline_depth=8, write_ratio=0.0, seed=0):
+	"""
+	Sends amount_of_requests requests over amount_of_connections connections, each keeping up to pipeline_depth requests in flight.
+	Requests look up random titles, except for write_ratio of them, which shelve and unshelve a book of their own.
+	Returns (a Benchmarker holding the latency of every request, the total time in nanoseconds).
+	"""
+	latencies = Benchmarker()
+
+	async def run_connection(connection_index, amount_of_connection_requests):
+		generator = random.Random(seed + connection_index)
+		reader, writer = await asyncio.open_connection(host, port)
+		in_flight = asyncio.Semaphore(pipeline_depth)
+		send_times = collections.deque()
+
+		async def receive():
+			for _ in range(amount_of_connection_requests):
+				line = await reader.readline()
+				if not line:
+					raise ConnectionError("the server closed the connection")
+				latencies.add_time(time.perf_counter_ns() - send_times.popleft())
+				in_flight.release()
+				if not json.loads(line)["ok"]:
+					raise RuntimeError(f"request failed: {line!r}")
+
+		async def send():
+			shelved_title = None
+			for request_index in range(amount_of_connection_requests):
+				if generator.random() >= write_ratio:
+					request = {"id": request_index, "op": "find", "title": generator.choice(titles)}
+				elif shelved_title is None:
+					shelved_title = f"Load connection {connection_index} book {request_index}"
+					request = {"id": request_index, "op": "shelve", "title": shelved_title, "author": None}
+				else:
+					request = {"id": request_index, "op": "unshelve", "title": shelved_title}
+					shelved_title = None
+				await in_flight.acquire()
+				send_times.append(time.perf_counter_ns())
+				writer.write(json.dumps(request).encode('utf-8') + b"\n")
+				await writer.drain()
+
+		tasks = (asyncio.create_task(send()), asyncio.create_task(receive()))
+		try:
+			# if either side fails (e.g. a failed response or a closed connection) the other side is cancelled, instead of waiting forever
+			done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+			for task in done:
+				task.result()
+		finally:
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			writer.close()
+			try:
+				await writer.wait_closed()
+			except ConnectionError:
+				pass
+
+	requests_per_connection = [amount_of_requests // amount_of_connections + (index < amount_of_requests % amount_of_connections) for index in range(amount_of_connections)]
+	start = time.perf_counter_ns()
+	await asyncio.gather(*(run_connection(index, amount) for index, amount in enumerate(requests_per_connection)))
+	return (latencies, time.perf_counter_ns() - start)
+
+def print_latency_report(latencies, total_ns):
+	""" Prints the throughput and latency statistics (min, average, percentiles and max) of a load run (latencies is the Benchmarker returned by run_load). """
+	print(latencies)
+	print(f"throughput {latencies.count() / (total_ns / 1e9):,.0f} requests per second")
+
+##################################################
+###################### MAIN ######################
+##################################################
+
+def create_library(backend, csv_path=None, books=None):
+	""" Creates a library of the backend type with the books of the csv file at csv_path (or books, or no books). """
+	if csv_path is not None:
+		books = book_csv.iter_books_from_csv_file(csv_path)
+	return BACKENDS[backend](books if books is not None else [], copy_policy=CopyPolicy.BORROW)
+
+async def serve_forever(library, host, port):
+	service = LibraryService(library)
+	server = await service.start(host, port)
+	print(f"Serving {len(library)} books on {', '.join(str(socket.getsockname()) for socket in server.sockets)}")
+	await server.serve_forever()
+
+async def load(host, port, amount_of_connections, amount_of_requests, pipeline_depth, write_ratio, histogram_path=None):
+	titles = await fetch_titles(1000, host, port)
+	if not titles:
+		titles = ["Missing title"]
+	latencies, total_ns = await run_load(titles, host, port, amount_of_connections, amount_of_requests, pipeline_depth, write_ratio)
+	print_latency_report(latencies, total_ns)
+	if histogram_path is not None:
+		# the histograms of several load generators can be merged with LatencyHistogram.from_json and merge
+		with open(histogram_path, "w") as histogram_file:
+			histogram_file.write(latencies.histogram().to_json())
+
+async def demo(backend, amount_of_books, amount_of_connections, amount_of_requests, pipeline_depth, write_ratio):
+	from benchmarks import generate_books
+	library = create_library(backend, books=generate_books(amount_of_books))
+	service = LibraryService(library)
+	server = await service.start(DEFAULT_HOST, 0)
+	port = server.sockets[0].getsockname()[1]
+	print(f"=== {backend} library with {amount_of_books} books, {amount_of_connections} connections, pipeline depth {pipeline_depth} ===")
+	await load(DEFAULT_HOST, port, amount_of_connections, amount_of_requests, pipeline_depth, write_ratio)
+	print(f"average batch size {service.amount_of_requests / max(1, service.amount_of_batches):.1f} requests")
+	await service.close()
+
+def main(arguments=None):
+	parser = argparse.ArgumentParser(description="Serves a library over TCP (line-delimited JSON) or generates load against a server.")
+	commands = parser.add_subparsers(dest="command", required=True)
+	serve_parser = commands.add_parser("serve", help="serve a library")
+	serve_parser.add_argument("--backend", choices=BACKENDS, default="hash")
+	serve_parser.add_argument("--csv", help="a csv file (headers Title, Author) with the books to serve")
+	load_parser = commands.add_parser("load", help="generate load against a running server and print a latency report")
+	load_parser.add_argument("--histogram", help="a file to write the latency histogram to (as JSON)")
+	demo_parser = commands.add_parser("demo", help="serve generated books and generate load against them in one process")
+	demo_parser.add_argument("--backend", choices=BACKENDS, default="hash")
+	demo_parser.add_argument("--books", type=int, default=100_000)
+	for command_parser in (serve_parser, load_parser):
+		command_parser.add_argument("--host", default=DEFAULT_HOST)
+		command_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+	for command_parser in (load_parser, demo_parser):
+		command_parser.add_argument("--connections", type=int, default=32)
+		command_parser.add_argument("--requests", type=int, default=20_000)
+		command_parser.add_argument("--pipeline", type=int, default=8)
+		command_parser.add_argument("--write-ratio", type=float, default=0.0)
+	arguments = parser.parse_args(arguments)
+
+	if arguments.command == "serve":
+		asyncio.run(serve_forever(create_library(arguments.backend, arguments.csv), arguments.host, arguments.port))
+	elif arguments.command == "load":
+		asyncio.run(load(arguments.host, arguments.port, arguments.connections, arguments.requests, arguments.pipeline, arguments.write_ratio, arguments.histogram))
+	else:
+		asyncio.run(demo(arguments.backend, arguments.books, arguments.connections, arguments.requests, arguments.pipeline, arguments.write_ratio))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,199 @@
+"""
+Binary snapshots of built libraries, so a process can start serving lookups without re-reading csv files.
+
+A snapshot of a BinarySearchLMS holds, in this order (integers are little-endian):
+	header ..... magic (8 bytes), format version (u32), normaliser options (u32 bit flags), key function name length (u32), amount of books (u64)
+	key name ... the name of the title_keys function, padded with zeros to a multiple of 8 bytes
+	keys ....... the sort key of every book in sorted order (u64 each)
+	offsets .... where every book's record starts in the records section, plus the end of the last record (u64 each)
+	records .... every book in sorted order as a length-prefixed title, a length-prefixed author and a length-prefixed normalised title
+				(lengths are u32 byte counts, an author length of 0xFFFFFFFF means the book has no author
+				and a normalised title length of 0xFFFFFFFE means the normalised title is the title)
+
+Loading maps the file into memory -- keys are searched in place and books are only decoded when they are accessed.
+"""
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from book import Book
+from binary_search_lms import BinarySearchLMS
+from library_management_system import CopyPolicy
+import title_keys
+from title_normalisation import TitleNormaliser
+
+_MAGIC = b"LMSSNAP1"
+_VERSION = 2
+_HEADER = struct.Struct("<8sIIIQ")
+_LENGTH = struct.Struct("<I")
+_NO_AUTHOR = 0xFFFFFFFF
+_SAME_AS_TITLE = 0xFFFFFFFE
+_ALIGNMENT = 8
+# the normaliser option stored in every bit of the header's flags (the first option is the lowest bit)
+_NORMALISER_OPTIONS = ("nfkc", "casefold", "collapse_whitespace")
+
+class LibrarySnapshotError(Exception):
+	""" Exception raised when a snapshot cannot be written or read. """
+
+class MappedBooks:
+	""" A read-only sequence of the books in a snapshot. Books are decoded from the mapped file when they are accessed. """
+
+	def __init__(self, data, offsets, records_start):
+		"""
+		data - the mapped snapshot file.
+		offsets - the record offsets of the books.
+		records_start - the position of the records section in data.
+		"""
+		self._data = data
+		self._offsets = offsets
+		self._records_start = records_start
+
+	def __len__(self):
+		return len(self._offsets) - 1
+
+	def __getitem__(self, index):
+		""" Decodes and returns the book at index. """
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("snapshot book index out of range")
+		position = self._records_start + self._offsets[index]
+		title, position = self._read_string(position)
+		author, _ = self._read_string(position)
+		return Book(title, author)
+
+	def __iter__(self):
+		for index in range(len(self)):
+			yield self[index]
+
+	def _read_string(self, position):
+		""" Reads the length-prefixed string at position. Returns (string or None, position after the string). """
+		(length,) = _LENGTH.unpack_from(self._data, position)
+		position += _LENGTH.size
+		if length == _NO_AUTHOR or length == _SAME_AS_TITLE:
+			return (None, position)
+		return (str(self._data[position:position + length], 'utf-8'), position + length)
+
+class MappedTitles(MappedBooks):
+	""" A read-only sequence of the normalised titles of the books in a snapshot, decoded from the mapped file when they are accessed. """
+
+	def __getitem__(self, index):
+		""" Decodes and returns the normalised title of the book at index. """
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("snapshot title index out of range")
+		position = self._records_start + self._offsets[index]
+		title, position = self._read_string(position)
+		_, position = self._read_string(position)
+		normalised_title, _ = self._read_string(position)
+		return title if normalised_title is None else normalised_title
+
+def save_snapshot(library, path):
+	"""
+	Writes a snapshot of the specified BinarySearchLMS to path.
+	The snapshot is written to a temporary file first, so an existing snapshot at path is replaced only once the new one is complete.
+
+	Raises a LibrarySnapshotError if the library's key function is not a title_keys function, its normaliser is not a TitleNormaliser
+	or its keys are not 64-bit unsigned integers.
+	"""
+	if not isinstance(library, BinarySearchLMS):
+		raise LibrarySnapshotError("only BinarySearchLMS libraries can be saved as snapshots")
+	if not isinstance(library._normalise, TitleNormaliser):
+		raise LibrarySnapshotError("the library's normaliser must be a TitleNormaliser to be saved in a snapshot")
+	options = library._normalise.options()
+	normaliser_flags = sum(1 << bit for bit, option in enumerate(_NORMALISER_OPTIONS) if options[option])
+	key_name = library._key.__name__
+	if getattr(title_keys, key_name, None) is not library._key:
+		raise LibrarySnapshotError(f"key function {key_name} must be defined in title_keys to be saved in a snapshot")
+	try:
+		keys = array('Q', library._keys)
+	except OverflowError as error:
+		raise LibrarySnapshotError("keys must be 64-bit unsigned integers to be saved in a snapshot") from error
+
+	offsets = array('Q')
+	records = bytearray()
+	for book, normalised_title in zip(library._books, library._titles):
+		offsets.append(len(records))
+		title = book.title().encode('utf-8')
+		records += _LENGTH.pack(len(title))
+		records += title
+		if book.author() is None:
+			records += _LENGTH.pack(_NO_AUTHOR)
+		else:
+			author = book.author().encode('utf-8')
+			records += _LENGTH.pack(len(author))
+			records += author
+		if normalised_title == book.title():
+			records += _LENGTH.pack(_SAME_AS_TITLE)
+		else:
+			normalised_title = normalised_title.encode('utf-8')
+			records += _LENGTH.pack(len(normalised_title))
+			records += normalised_title
+	offsets.append(len(records))
+	if sys.byteorder != 'little':
+		keys.byteswap()
+		offsets.byteswap()
+
+	encoded_key_name = key_name.encode('utf-8')
+	temporary_path = f"{path}.tmp"
+	with open(temporary_path, 'wb') as file:
+		file.write(_HEADER.pack(_MAGIC, _VERSION, normaliser_flags, len(encoded_key_name), len(keys)))
+		file.write(encoded_key_name)
+		file.write(bytes(_padding(_HEADER.size + len(encoded_key_name))))
+		file.write(keys)
+		file.write(offsets)
+		file.write(records)
+	os.replace(temporary_path, path)
+
+def load_snapshot(path):
+	"""
+	Loads the snapshot at path as a BinarySearchLMS (with the key function and normaliser of the saved library).
+
+	The file is memory-mapped, so loading takes about the same time for any amount of books.
+	Lookups search the mapped keys and only decode the books they touch.
+	The library copies the books into lists the first time it is changed (shelve or unshelve).
+
+	Raises a LibrarySnapshotError if the file is not a valid snapshot.
+	"""
+	with open(path, 'rb') as file:
+		if os.fstat(file.fileno()).st_size < _HEADER.size:
+			raise LibrarySnapshotError(f"{path} is not a library snapshot")
+		data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+	magic, version, normaliser_flags, key_name_length, amount_of_books = _HEADER.unpack_from(data, 0)
+	if magic != _MAGIC:
+		raise LibrarySnapshotError(f"{path} is not a library snapshot")
+	if version != _VERSION:
+		raise LibrarySnapshotError(f"unsupported snapshot version {version}")
+	key_name = str(data[_HEADER.size:_HEADER.size + key_name_length], 'utf-8')
+	key = getattr(title_keys, key_name, None)
+	if key is None:
+		raise LibrarySnapshotError(f"unknown key function {key_name}")
+
+	keys_start = _HEADER.size + key_name_length + _padding(_HEADER.size + key_name_length)
+	offsets_start = keys_start + 8 * amount_of_books
+	records_start = offsets_start + 8 * (amount_of_books + 1)
+	if len(data) < records_start:
+		raise LibrarySnapshotError(f"{path} is truncated")
+	view = memoryview(data)
+	keys = view[keys_start:offsets_start].cast('Q')
+	offsets = view[offsets_start:records_start].cast('Q')
+	if sys.byteorder != 'little':
+		keys = array('Q', keys)
+		keys.byteswap()
+		offsets = array('Q', offsets)
+		offsets.byteswap()
+
+	normaliser = TitleNormaliser(**{option: bool(normaliser_flags >> bit & 1) for bit, option in enumerate(_NORMALISER_OPTIONS)})
+
+	library = BinarySearchLMS([], key=key, copy_policy=CopyPolicy.BORROW, normaliser=normaliser)
+	library._books = MappedBooks(data, offsets, records_start)
+	library._titles = MappedTitles(data, offsets, records_start)
+	library._keys = keys
+	return library
+
+def _padding(size):
+	""" Returns the amount of zero bytes needed after size bytes to reach the next multiple of the alignment. """
+	return -size % _ALIGNMENT
@@ -1,3 +1,6 @@
+from collections import Counter, defaultdict, deque
+from itertools import compress
+
 from library_management_system import LibraryManagementSystem
 
 class LinearSearchLMS(LibraryManagementSystem):
@@ -9,14 +12,75 @@ class LinearSearchLMS(LibraryManagementSystem):
 
     def shelve(self, book): 
         """ Shelves the book at the end of the library. """
+        title = book.title() if self._exact else self._normalise(book.title())
         self._books.append(book)
+        self._titles.append(title)
+        self._index_shelved(book, title)
 
     def _find_index(self, title):
         """ 
         Searches linearly for the position of the book with title -- runs in O(n).
-        NOTE -- CASE-SENSITIVE
+        Compares the stored normalised titles, so shelved titles are never normalised again.
+        NOTE -- CASE-SENSITIVE (unless the library's normaliser ignores case)
+        """
+        try:
+            return self._titles.index(title if self._exact else self._normalise(title))
+        except ValueError:
+            return None
+
+    def find_many(self, titles):
+        """ 
+        Finds the books with the specified titles in a single scan of the library -- O(n + k) instead of O(n * k). 
+        Returns the book (or None) for every title, in the same order as titles. 
+        """
+        titles = [self._normalise(title) for title in titles]
+        wanted_titles = set(titles)
+        found_books = dict()
+        for title, book in zip(self._titles, self._books):
+            if title in wanted_titles and title not in found_books:
+                found_books[title] = book
+                if len(found_books) == len(wanted_titles):
+                    break
+        return [found_books.get(title) for title in titles]
+
+    def shelve_many(self, books):
+        """ Shelves the books at the end of the library. """
+        first_index = len(self._books)
+        self._books.extend(books)
+        self._titles.extend(self._normalise(book.title()) for book in self._books[first_index:])
+        for book, title in zip(self._books[first_index:], self._titles[first_index:]):
+            self._index_shelved(book, title)
+
+    def unshelve_many(self, titles):
+        """ 
+        Removes the books with the specified titles in a single scan of the library -- O(n + k) instead of O(n * k). 
+        Like unshelve, every title removes the first remaining book with that title. 
+        Returns the removed book (or None) for every title, in the same order as titles. 
+        """
+        titles = [self._normalise(title) for title in titles]
+        removed_books = self._remove_in_one_scan(titles)
+        return [removed_books[title].popleft() if removed_books.get(title) else None for title in titles]
+
+    def _columns(self):
+        """ Returns the names of the lists holding one item per book, in the order of the books (subclasses that keep more add theirs). """
+        return ("_books", "_titles")
+
+    def _remove_in_one_scan(self, titles):
+        """ 
+        Removes the first remaining book for every (normalised) title in a single scan, removing the same rows from every column (see _columns). 
+        Returns a dictionary from every title to a deque of the books removed with it, in the order they were found. 
         """
-        for index, book in enumerate(self._books):
-            if book.title() == title:
-                return index
-        return None
+        remaining_removals = Counter(titles)
+        removed_books = defaultdict(deque)
+        kept_rows = []
+        for title, book in zip(self._titles, self._books):
+            if remaining_removals.get(title, 0) > 0:
+                remaining_removals[title] -= 1
+                removed_books[title].append(book)
+                self._index_unshelved(book, title)
+                kept_rows.append(False)
+            else:
+                kept_rows.append(True)
+        for column in self._columns():
+            setattr(self, column, list(compress(getattr(self, column), kept_rows)))
+        return removed_books
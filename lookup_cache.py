@@ -0,0 +1,316 @@
+from array import array
+from collections import OrderedDict
+from enum import Enum
+
+# returned by caches for keys they do not hold (None is a valid cached value -- a book that is not in the library)
+MISSING = object()
+
+class LRUCache:
+    """ A bounded cache that evicts the least recently used key. Every operation is O(1). """
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._values = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key):
+        """ Returns the value cached for key (and marks key as the most recently used), or MISSING. """
+        value = self._values.get(key, MISSING)
+        if value is not MISSING:
+            self._values.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """ Caches value for key, evicting the least recently used key if the cache is full. """
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self._capacity:
+            self._values.popitem(last=False)
+
+    def discard(self, key):
+        """ Removes key from the cache (if it is cached). """
+        self._values.pop(key, None)
+
+    def clear(self):
+        """ Removes every key from the cache. """
+        self._values.clear()
+
+class LFUCache:
+    """
+    A bounded cache that evicts the least frequently used key (the least recently used one among equally frequent keys).
+    Keys are kept in one bucket per use count, so every operation is O(1).
+    """
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        # key -> [value, use count]
+        self._entries = dict()
+        # use count -> keys used that many times, least recently used first
+        self._buckets = dict()
+        self._minimum_count = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Returns the value cached for key (and counts the use), or MISSING. """
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        self._count_use(key, entry)
+        return entry[0]
+
+    def put(self, key, value):
+        """ Caches value for key, evicting the least frequently used key if the cache is full. """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] = value
+            self._count_use(key, entry)
+            return
+        if len(self._entries) >= self._capacity:
+            evicted_key, _ = self._buckets[self._minimum_count].popitem(last=False)
+            if not self._buckets[self._minimum_count]:
+                del self._buckets[self._minimum_count]
+            del self._entries[evicted_key]
+        self._entries[key] = [value, 1]
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._minimum_count = 1
+
+    def discard(self, key):
+        """ Removes key from the cache (if it is cached). """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        bucket = self._buckets[entry[1]]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[entry[1]]
+            if self._buckets and entry[1] == self._minimum_count:
+                self._minimum_count = min(self._buckets)
+
+    def clear(self):
+        """ Removes every key from the cache. """
+        self._entries.clear()
+        self._buckets.clear()
+        self._minimum_count = 0
+
+    def _count_use(self, key, entry):
+        """ Moves key to the bucket of its next use count. """
+        count = entry[1]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._minimum_count == count:
+                self._minimum_count = count + 1
+        entry[1] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+class TinyLFUCache(LRUCache):
+    """
+    An LRU cache that only admits a new key if it was used more often (recently) than the key it would evict.
+    Use counts of every key looked up (cached or not) are estimated with a count-min sketch -- 4 small counters per key,
+    halved every 10 * capacity uses so that old popularity fades.
+
+    Keeps popular keys cached when a burst of one-off lookups would flush an LRU cache.
+    """
+
+    # _positions gives one position per row
+    _ROWS = 4
+    _MAXIMUM_COUNT = 15
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        width = 1
+        while width < 2 * capacity:
+            width *= 2
+        self._width_mask = width - 1
+        self._counters = [array('B', bytes(width)) for _ in range(self._ROWS)]
+        self._uses_before_aging = 10 * capacity
+        self._uses = 0
+
+    def get(self, key):
+        """ Returns the value cached for key, or MISSING. Counts the use either way. """
+        self._count_use(key)
+        return super().get(key)
+
+    def put(self, key, value):
+        """ Caches value for key if the cache has room or key is used more often than the least recently used key. """
+        if key not in self._values and len(self._values) >= self._capacity:
+            victim = next(iter(self._values))
+            if self._estimate(key) <= self._estimate(victim):
+                return
+        super().put(key, value)
+
+    def clear(self):
+        """ Removes every key from the cache and forgets every use count. """
+        super().clear()
+        for row in self._counters:
+            row[:] = array('B', bytes(len(row)))
+        self._uses = 0
+
+    def _positions(self, key):
+        """ Returns the counter position of key in every row of the sketch (double hashing -- one hash gives every position). """
+        key_hash = hash(key)
+        width_mask = self._width_mask
+        first = key_hash & width_mask
+        step = (key_hash >> 32) & width_mask | 1
+        return (first, (first + step) & width_mask, (first + 2 * step) & width_mask, (first + 3 * step) & width_mask)
+
+    def _estimate(self, key):
+        """ Returns the estimated use count of key (never lower than the real count since the last aging). """
+        return min(map(array.__getitem__, self._counters, self._positions(key)))
+
+    def _count_use(self, key):
+        """ Counts a use of key in the sketch, halving every counter once enough uses have been counted. """
+        for row, position in zip(self._counters, self._positions(key)):
+            count = row[position]
+            if count < self._MAXIMUM_COUNT:
+                row[position] = count + 1
+        self._uses += 1
+        if self._uses >= self._uses_before_aging:
+            for row in self._counters:
+                row[:] = array('B', (count >> 1 for count in row))
+            self._uses //= 2
+
+class EvictionPolicy(Enum):
+    """
+    An enum used to choose which titles a CachedLMS forgets when its cache is full.
+
+    EvictionPolicy.LRU forgets the least recently used title. Should be used as the default.
+    EvictionPolicy.LFU forgets the least frequently used title. Suits traffic with popular titles that stay popular.
+    EvictionPolicy.TINY_LFU is an LRU cache that only admits titles used more often than the title they would replace.
+    """
+    LRU = "lru"
+    LFU = "lfu"
+    TINY_LFU = "tiny_lfu"
+
+    def create_cache(self, capacity):
+        """ Returns a new, empty cache holding at most capacity titles. """
+        if self is EvictionPolicy.LFU:
+            return LFUCache(capacity)
+        if self is EvictionPolicy.TINY_LFU:
+            return TinyLFUCache(capacity)
+        return LRUCache(capacity)
+
+class CachedLMS:
+    """
+    A library management system that caches the results of find in front of another library.
+    Results for titles that are not in the library are cached too, so repeated misses are also answered from the cache.
+
+    Changes go through the cache: shelving or unshelving a book forgets its title and emptying the library forgets every title.
+    The wrapped library must not be changed directly while it is cached.
+    Other methods (e.g. find_prefix) are passed to the wrapped library.
+    """
+
+    def __init__(self, library, capacity=1024, eviction_policy=EvictionPolicy.LRU):
+        """
+        Creates a cache in front of library.
+
+        library - the library to cache.
+        capacity (optional) - the maximum amount of titles cached.
+        eviction_policy (optional) - which titles are forgotten when the cache is full (see EvictionPolicy).
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be greater or equal to 1")
+        self._library = library
+        self._cache = eviction_policy.create_cache(capacity)
+        self._hits = 0
+        self._misses = 0
+
+    def find(self, title):
+        """
+        Finds and returns the book in the library with title.
+        If the book is not in the library, None is returned.
+        """
+        key = self._library.normalise_title(title)
+        book = self._cache.get(key)
+        if book is not MISSING:
+            self._hits += 1
+            return book
+        self._misses += 1
+        book = self._library.find(title)
+        self._cache.put(key, book)
+        return book
+
+    def find_many(self, titles):
+        """
+        Finds the books in the library with the specified titles.
+        Titles that are not cached are found with one find_many call to the library.
+        """
+        titles = list(titles)
+        keys = [self._library.normalise_title(title) for title in titles]
+        books = [self._cache.get(key) for key in keys]
+        missed_positions = [position for position, book in enumerate(books) if book is MISSING]
+        self._hits += len(books) - len(missed_positions)
+        self._misses += len(missed_positions)
+        if missed_positions:
+            found_books = self._library.find_many([titles[position] for position in missed_positions])
+            for position, book in zip(missed_positions, found_books):
+                books[position] = book
+                self._cache.put(keys[position], book)
+        return books
+
+    def shelve(self, book):
+        """ Adds the specified book to the library. """
+        self._library.shelve(book)
+        self._cache.discard(self._library.normalise_title(book.title()))
+
+    def unshelve(self, title):
+        """
+        Removes and returns the book in the library with title.
+        If the book is not in the library, None is returned and the library is not changed.
+        """
+        book = self._library.unshelve(title)
+        self._cache.discard(self._library.normalise_title(title))
+        return book
+
+    def shelve_many(self, books):
+        """ Adds the specified books to the library. """
+        books = list(books)
+        self._library.shelve_many(books)
+        for book in books:
+            self._cache.discard(self._library.normalise_title(book.title()))
+
+    def unshelve_many(self, titles):
+        """ Removes the books in the library with the specified titles (see LibraryManagementSystem.unshelve_many). """
+        titles = list(titles)
+        books = self._library.unshelve_many(titles)
+        for title in titles:
+            self._cache.discard(self._library.normalise_title(title))
+        return books
+
+    def empty(self):
+        """ Removes every book from the library. """
+        self._library.empty()
+        self._cache.clear()
+
+    def hits(self):
+        """ Returns the amount of lookups answered from the cache. """
+        return self._hits
+
+    def misses(self):
+        """ Returns the amount of lookups passed to the library. """
+        return self._misses
+
+    def hit_ratio(self):
+        """ Returns the fraction of lookups answered from the cache (0 if there were no lookups). """
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0
+
+    def reset_statistics(self):
+        """ Sets the hit and miss counters back to 0. """
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._library)
+
+    def __getattr__(self, name):
+        """ Passes every other method (e.g. find_prefix or random_book) to the wrapped library. """
+        return getattr(self._library, name)
+
+    def __str__(self):
+        return str(self._library)
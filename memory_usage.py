@@ -0,0 +1,176 @@
+import sys
+import math
+import tracemalloc
+from enum import Enum
+from array import array
+from types import ModuleType, FunctionType, BuiltinFunctionType, MethodType
+
+from library_management_system import CopyPolicy
+
+##################################################
+############# MEMORY UTILITY CLASSES #############
+##################################################
+
+class BytesFormatter(Enum):
+	"""
+	An enum used to convert bytes between binary prefixes.
+
+	BytesFormatter.BYTES represents bytes,
+	BytesFormatter.KIBIBYTES represents kibibytes (1024 bytes),
+	BytesFormatter.MEBIBYTES represents mebibytes,
+	BytesFormatter.GIBIBYTES represents gibibytes, and
+	BytesFormatter.AUTO automatically selects the most human-readable conversion and should be used as the default.
+	"""
+	BYTES = 0
+	KIBIBYTES = 10
+	MEBIBYTES = 20
+	GIBIBYTES = 30
+	AUTO = None
+
+	def convert(self, amount_of_bytes):
+		converted_form = self
+		if self is BytesFormatter.AUTO:
+			power = math.floor(math.log2(abs(amount_of_bytes))) if amount_of_bytes else 0
+			if power < 10:
+				converted_form = BytesFormatter.BYTES
+			elif power < 20:
+				converted_form = BytesFormatter.KIBIBYTES
+			elif power < 30:
+				converted_form = BytesFormatter.MEBIBYTES
+			else:
+				converted_form = BytesFormatter.GIBIBYTES
+		converted_size = amount_of_bytes / 2**converted_form.value
+		converted_size_name = converted_form.name.lower()
+		return (converted_size, converted_size_name)
+
+##################################################
+############### MEASURING MEMORY #################
+##################################################
+
+# objects shared by the whole program, which are never counted as part of a measured object
+_SHARED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+def deep_getsizeof(obj):
+	"""
+	Returns the size in bytes of obj and of every object reachable from it (as measured by sys.getsizeof).
+
+	Lists, tuples, sets, dictionaries, instance __dict__s and __slots__ are followed.
+	Every object is counted once, even if it is reachable in several ways (e.g. a title shared by a book and a key column).
+	Classes, modules and functions are not counted, since they are shared by the whole program.
+	"""
+	seen = set()
+	size = 0
+	pending = [obj]
+	while pending:
+		current = pending.pop()
+		if id(current) in seen or isinstance(current, _SHARED_TYPES):
+			continue
+		seen.add(id(current))
+		size += sys.getsizeof(current)
+		if isinstance(current, (str, bytes, bytearray, int, float, array)):
+			continue
+		if isinstance(current, dict):
+			pending.extend(current.keys())
+			pending.extend(current.values())
+		elif isinstance(current, (list, tuple, set, frozenset)):
+			pending.extend(current)
+		if hasattr(current, "__dict__"):
+			pending.append(current.__dict__)
+		for cls in type(current).__mro__:
+			for slot in cls.__dict__.get("__slots__", ()):
+				if slot not in ("__dict__", "__weakref__") and hasattr(current, slot):
+					pending.append(getattr(current, slot))
+	return size
+
+def measure_memory(function, *args, **kwargs):
+	"""
+	Calls function with args and returns (result, retained bytes, peak bytes) as measured by tracemalloc.
+	Retained bytes are still allocated when function returns (e.g. the result), peak bytes are the most allocated at once during the call.
+	Can be nested -- if tracemalloc is already tracing, only the allocations of this call are counted (and the outer peak is reset).
+
+	NOTE -- tracemalloc slows allocations down, so memory should be measured separately from time.
+	"""
+	was_tracing = tracemalloc.is_tracing()
+	if not was_tracing:
+		tracemalloc.start()
+	baseline, _ = tracemalloc.get_traced_memory()
+	tracemalloc.reset_peak()
+	try:
+		result = function(*args, **kwargs)
+		retained, peak = tracemalloc.get_traced_memory()
+	finally:
+		if not was_tracing:
+			tracemalloc.stop()
+	return (result, retained - baseline, peak - baseline)
+
+##################################################
+############## MEMORY DECORATORS #################
+##################################################
+
+def print_memory_usage(formatter=BytesFormatter.AUTO, deep_size=True):
+	"""
+	A decorator used to print the memory used by the given function with the specified formatting.
+
+	formatter (optional) - the format to print the sizes with (e.g. BytesFormatter.MEBIBYTES will print the sizes in mebibytes).
+	deep_size (optional) - if True, the deep size of the result (see deep_getsizeof) is printed too.
+
+	USAGE:
+
+	#################### METHOD 1 ####################
+	Will always print the memory usage whenever the function is called.
+
+	@print_memory_usage() # note the empty parentheses
+	def measure_this(arg_1, arg_2):
+		# doing something here
+
+	def main():
+		result = measure_this(arg_1_value, arg_2_value)
+
+	--- OUTPUT ---
+	"--- measure_this memory usage ---
+	retained ... 14.236 mebibytes
+	peak ....... 14.240 mebibytes
+	deep size .. 14.102 mebibytes"
+
+	#################### METHOD 2 ####################
+	Can be used to selectively print memory usage.
+
+	def main():
+		library = print_memory_usage()(HashMapLMS)(books) # note the empty parentheses
+
+	"""
+	def print_memory_usage_decorator(function):
+		def print_memory_usage_wrapper(*args, **kwargs):
+			result, retained, peak = measure_memory(function, *args, **kwargs)
+			print(f"--- {getattr(function, '__name__', type(function).__name__)} memory usage ---")
+			for name, amount_of_bytes in (("retained", retained), ("peak", peak)) + ((("deep size", deep_getsizeof(result)),) if deep_size else ()):
+				converted_size, converted_size_name = formatter.convert(amount_of_bytes)
+				print(f"{name + ' ':.<12} {converted_size:.3f} {converted_size_name}")
+			return result
+		return print_memory_usage_wrapper
+	return print_memory_usage_decorator
+
+def library_memory_usage(library_type, books, **library_arguments):
+	"""
+	Constructs a library_type with books (and library_arguments) and returns a dictionary with the memory it used:
+
+	retained_bytes - the bytes still allocated once the library is constructed (including the copies of the books).
+	peak_bytes - the most bytes allocated at once while constructing the library.
+	deep_bytes - the deep size of the library (see deep_getsizeof), counting the books and titles it shares with books too.
+	bytes_per_book - retained_bytes divided by the amount of books.
+	copy_bytes - the bytes retained by copying the books as the library's copy policy does (see CopyPolicy), part of retained_bytes.
+	copy_peak_bytes - the most bytes allocated at once while copying the books (copy.deepcopy also remembers every copied object until it returns).
+	"""
+	books = books if isinstance(books, list) else list(books)
+	copy_policy = library_arguments.get("copy_policy", CopyPolicy.DEEP)
+	copied_books, copy_bytes, copy_peak = measure_memory(copy_policy.apply, books)
+	del copied_books
+	library, retained, peak = measure_memory(library_type, books, **library_arguments)
+	return {
+		"retained_bytes": retained,
+		"peak_bytes": peak,
+		"deep_bytes": deep_getsizeof(library),
+		"bytes_per_book": retained / len(books) if books else 0,
+		"copy_bytes": copy_bytes,
+		"copy_peak_bytes": copy_peak,
+	}
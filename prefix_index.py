@@ -0,0 +1,73 @@
+from sorted_block_list import SortedBlockList
+
+class PrefixIndex:
+    """
+    A secondary index that keeps books sorted by title to answer "titles starting with" queries.
+
+    The books with a prefix are next to each other in title order, so a query is one binary search followed by reading the results -- O(log n + limit).
+    Adding and removing books is O(sqrt n) (see SortedBlockList).
+    """
+
+    def __init__(self, books=(), titles=None):
+        """ 
+        Creates a new prefix index holding the specified books. 
+
+        books (optional) - the books to index.
+        titles (optional) - the titles to index the books by (e.g. normalised titles), in the same order as books. Defaults to the titles of the books.
+        """
+        books = list(books)
+        titles = [book.title() for book in books] if titles is None else list(titles)
+        order = sorted(range(len(titles)), key=titles.__getitem__)
+        self._books = SortedBlockList([titles[index] for index in order], [books[index] for index in order])
+
+    def add(self, book, title=None):
+        """ Adds the specified book to the index under title (defaults to the title of the book). """
+        self._books.insert(book.title() if title is None else title, book)
+
+    def remove(self, book, title=None):
+        """ Removes the specified book (the same object that was added) from the index. title must be the title the book was added under. """
+        if title is None:
+            title = book.title()
+        first_index = self._books.bisect_left(title)
+        for index, (indexed_title, indexed_book) in enumerate(self._books.items_from(first_index), first_index):
+            if indexed_title != title:
+                break
+            if indexed_book is book:
+                self._books.pop(index)
+                return
+
+    def find_prefix(self, prefix, limit=10, cursor=None):
+        """
+        Finds the books indexed under titles that start with prefix, in title order.
+        Returns (books, next_cursor) -- at most limit books and the cursor of the next page (None if there are no more books).
+
+        prefix - the start of the titles to find.
+        limit (optional) - the maximum amount of books to return.
+        cursor (optional) - the next_cursor returned with the previous page. Starts at the first page by default.
+        """
+        if limit <= 0:
+            raise ValueError("limit must be greater or equal to 1")
+        if cursor is None:
+            start = self._books.bisect_left(prefix)
+        else:
+            # the cursor holds the last title returned and how many books with that title were returned,
+            # so pages stay correct even if books are shelved or unshelved between pages
+            last_title, amount_with_last_title = cursor
+            start = self._books.bisect_left(last_title) + amount_with_last_title
+
+        books = []
+        next_cursor = None
+        last_title = None
+        for title, book in self._books.items_from(start):
+            if not title.startswith(prefix):
+                break
+            if len(books) == limit:
+                next_cursor = (last_title, start + len(books) - self._books.bisect_left(last_title))
+                break
+            books.append(book)
+            last_title = title
+        return (books, next_cursor)
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the index itself in bytes (the books and titles are shared with the library and not counted). """
+        return self._books.size_in_bytes()
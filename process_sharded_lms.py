@@ -0,0 +1,210 @@
+import multiprocessing
+import random
+import threading
+import zlib
+
+from library_management_system import CopyPolicy
+from title_normalisation import EXACT
+
+class ProcessShardedLMS:
+    """
+    A library management system split into shards, each held by its own worker process, so lookups can use every core.
+
+    Every title belongs to one shard (chosen from the CRC-32 of its normalised title). Requests are sent to the workers over pipes.
+    Batch calls (find_many, shelve_many, unshelve_many) send one request to every shard involved before waiting for any answer,
+    so the shards work on their part of the batch in parallel.
+
+    Books are copied (pickled) to and from the workers, so a found book is equal to -- but not the same object as -- the shelved book.
+    Every request costs a round trip to a worker, so single lookups are slower than in-process ones -- batches are what scale.
+    The library must be closed (or used as a context manager) to stop the workers.
+    """
+
+    def __init__(self, books, library_type, amount_of_processes=4, **library_arguments):
+        """
+        Creates a new sharded library with the specified books and starts its worker processes.
+
+        books - the books to initialize the library with.
+        library_type - the type of the library held by every worker (e.g. HashMapLMS).
+        amount_of_processes (optional) - the amount of shards (and worker processes).
+        library_arguments (optional) - keyword arguments passed to library_type in every worker (e.g. normaliser). Must be picklable.
+            Workers borrow their books unless another copy_policy is given, since every worker already has its own copy of the books.
+        """
+        if amount_of_processes <= 0:
+            raise ValueError("amount_of_processes must be greater or equal to 1")
+        library_arguments.setdefault("copy_policy", CopyPolicy.BORROW)
+        self._normalise = library_arguments.get("normaliser", EXACT)
+        self._amount_of_shards = amount_of_processes
+        books_of_shards = [[] for _ in range(amount_of_processes)]
+        for book in books:
+            books_of_shards[self._shard_index(book.title())].append(book)
+        self._connections = []
+        self._processes = []
+        # a lock per worker, so the library can be shared between threads without mixing up answers
+        self._locks = [threading.Lock() for _ in range(amount_of_processes)]
+        for books_of_shard in books_of_shards:
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_worker, args=(worker_connection, library_type, books_of_shard, library_arguments), daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def find(self, title):
+        """ Finds and returns (a copy of) the book in the library with title (or None). """
+        return self._call(self._shard_index(title), "find", title)
+
+    def find_many(self, titles):
+        """ Finds the books in the library with the specified titles, with one find_many request per shard (run in parallel). """
+        return self._scatter("find_many", list(titles), lambda title: title)
+
+    def find_by_author(self, author):
+        """ Finds the books in the library by author, from every shard (see LibraryManagementSystem.find_by_author). """
+        return [book for books in self._call_every_shard("find_by_author", author) for book in books]
+
+    def find_words(self, query, match_all=True):
+        """ Finds the books in the library with titles or authors containing the words of query, from every shard (see LibraryManagementSystem.find_words). """
+        return [book for books in self._call_every_shard("find_words", query, match_all) for book in books]
+
+    def shelve(self, book):
+        """ Adds the specified book to the library. """
+        self._call(self._shard_index(book.title()), "shelve", book)
+
+    def unshelve(self, title):
+        """ Removes and returns (a copy of) the book in the library with title (or None). """
+        return self._call(self._shard_index(title), "unshelve", title)
+
+    def shelve_many(self, books):
+        """ Adds the specified books to the library, with one shelve_many request per shard (run in parallel). """
+        self._scatter("shelve_many", list(books), lambda book: book.title())
+
+    def unshelve_many(self, titles):
+        """ Removes the books in the library with the specified titles, with one unshelve_many request per shard (see LibraryManagementSystem.unshelve_many). """
+        return self._scatter("unshelve_many", list(titles), lambda title: title)
+
+    def empty(self):
+        """ Removes every book from the library. """
+        self._call_every_shard("empty")
+
+    def normalise_title(self, title):
+        """ Returns title as the library compares it (see TitleNormaliser). """
+        return self._normalise(title)
+
+    def random_book(self):
+        """
+        Returns (a copy of) a random book, choosing the shard in proportion to its amount of books.
+        Raises an IndexError if the library is empty (like LibraryManagementSystem.random_book).
+        """
+        lengths = self._call_every_shard("__len__")
+        if not any(lengths):
+            raise IndexError("Cannot choose from an empty library")
+        shard_index = random.choices(range(len(lengths)), weights=lengths)[0]
+        return self._call(shard_index, "random_book")
+
+    def close(self):
+        """ Stops the worker processes. The library cannot be used afterwards. """
+        for connection, process in zip(self._connections, self._processes):
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+    def __len__(self):
+        return sum(self._call_every_shard("__len__"))
+
+    def __str__(self):
+        return "\n".join(filter(None, self._call_every_shard("__str__")))
+
+    def _shard_index(self, title):
+        """ Returns the index of the shard holding the books with title. """
+        return zlib.crc32(self._normalise(title).encode('utf-8')) % self._amount_of_shards
+
+    def _call(self, shard_index, method_name, *arguments):
+        """ Calls method_name of the library of a shard and returns the result (raising the exception raised by the worker). """
+        with self._locks[shard_index]:
+            connection = self._connections[shard_index]
+            connection.send((method_name, arguments))
+            return _unwrap(connection.recv())
+
+    def _call_every_shard(self, method_name, *arguments):
+        """ Calls method_name of the library of every shard (in parallel) and returns the results in shard order. """
+        return self._call_shards({shard_index: arguments for shard_index in range(self._amount_of_shards)}, method_name)
+
+    def _call_shards(self, arguments_by_shard, method_name):
+        """
+        Calls method_name of the library of every shard in arguments_by_shard with its arguments, in parallel.
+        Returns the results in the order of arguments_by_shard.
+        """
+        # locks are always taken in shard order, so two batches never wait for each other's locks
+        shard_indexes = sorted(arguments_by_shard)
+        for shard_index in shard_indexes:
+            self._locks[shard_index].acquire()
+        sent_shard_indexes = []
+        results = dict()
+        try:
+            for shard_index in shard_indexes:
+                self._connections[shard_index].send((method_name, arguments_by_shard[shard_index]))
+                sent_shard_indexes.append(shard_index)
+            for shard_index in shard_indexes:
+                results[shard_index] = self._connections[shard_index].recv()
+        except BaseException:
+            # if sending to a later shard failed (e.g. an argument could not be pickled), the shards that got a request still answer it --
+            # the answers are read here, so the next call on their pipes does not read them as its own
+            for shard_index in sent_shard_indexes:
+                if shard_index not in results:
+                    try:
+                        self._connections[shard_index].recv()
+                    except (EOFError, OSError):
+                        pass
+            raise
+        finally:
+            for shard_index in shard_indexes:
+                self._locks[shard_index].release()
+        return [_unwrap(results[shard_index]) for shard_index in arguments_by_shard]
+
+    def _scatter(self, method_name, items, title_of):
+        """
+        Sends every shard the items (books or titles) belonging to it as one method_name call, in parallel.
+        Returns the result for every item, in the same order as items (method_name must return one result per item, or None).
+        """
+        positions_by_shard = dict()
+        for position, item in enumerate(items):
+            positions_by_shard.setdefault(self._shard_index(title_of(item)), []).append(position)
+        arguments_by_shard = {shard_index: ([items[position] for position in positions],) for shard_index, positions in positions_by_shard.items()}
+        results = [None] * len(items)
+        for positions, shard_results in zip(positions_by_shard.values(), self._call_shards(arguments_by_shard, method_name)):
+            if shard_results is not None:
+                for position, result in zip(positions, shard_results):
+                    results[position] = result
+        return results
+
+def _unwrap(answer):
+    """ Returns the result in a worker's answer, or raises the exception in it. """
+    succeeded, result = answer
+    if not succeeded:
+        raise result
+    return result
+
+def _run_worker(connection, library_type, books, library_arguments):
+    """ Holds the library of a shard and answers the requests received over connection, until None is received. """
+    library = library_type(books, **library_arguments)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        method_name, arguments = request
+        try:
+            answer = (True, getattr(library, method_name)(*arguments))
+        except Exception as error:
+            answer = (False, error)
+        connection.send(answer)
@@ -0,0 +1,130 @@
+from bisect import bisect_right
+from enum import Enum
+
+from library_management_system import CopyPolicy
+from linear_search_lms import LinearSearchLMS
+from title_normalisation import EXACT
+
+class OrganisingStrategy(Enum):
+    """
+    An enum used to choose how a SelfOrganisingLMS moves the books that are found.
+
+    OrganisingStrategy.MOVE_TO_FRONT moves a found book to the front. Adapts quickly when the popular titles change. Should be used as the default.
+    OrganisingStrategy.TRANSPOSE swaps a found book with the book in front of it. Popular books move forward slowly but one-off lookups barely disturb the order.
+    OrganisingStrategy.COUNT keeps the books ordered by how often they were found. Best for popularity that does not change, but remembers old popularity.
+    """
+    MOVE_TO_FRONT = "move_to_front"
+    TRANSPOSE = "transpose"
+    COUNT = "count"
+
+class SelfOrganisingLMS(LinearSearchLMS):
+    """
+    A library that uses linear search to find books and moves found books towards the front,
+    so the titles looked up most often are found after scanning only a few books.
+
+    Inserting is O(1).
+    Searching is O(n), but only O(position of the book) -- which is small for popular books under skewed lookups.
+    """
+
+    def __init__(self, books, strategy=OrganisingStrategy.MOVE_TO_FRONT, copy_policy=CopyPolicy.DEEP, normaliser=EXACT):
+        """
+        Creates a new library with the specified books.
+        Makes a deep copy of the books unless another copy policy is specified.
+
+        books - the books to initialize the library with.
+        strategy (optional) - how found books are moved (see OrganisingStrategy).
+        copy_policy (optional) - how the books are copied (see CopyPolicy).
+        normaliser (optional) - which titles are treated as equal (see TitleNormaliser). Titles are compared exactly by default.
+        """
+        super().__init__(books, copy_policy, normaliser)
+        self._strategy = strategy
+        # how often every book was found, negated so the list is in increasing order (only kept in order by OrganisingStrategy.COUNT)
+        self._negated_counts = [0] * len(self._books)
+        self._searches = 0
+        self._scanned_books = 0
+
+    def empty(self):
+        """
+        Removes every book from the library.
+        The empty method is overriden to also remove the counts.
+        """
+        super().empty()
+        self._negated_counts = []
+
+    def find(self, title):
+        """
+        Finds and returns the book in the library with title, then moves it as chosen by the library's strategy.
+        If the book is not in the library, None is returned.
+        """
+        index = self._find_index(title)
+        self._searches += 1
+        self._scanned_books += len(self._books) if index is None else index + 1
+        if index is None:
+            return None
+        book = self._books[index]
+        self._reorganise(index)
+        return book
+
+    def find_many(self, titles):
+        """
+        Finds the books in the library with the specified titles, one find per title.
+        The find_many method is overriden because the single scan of LinearSearchLMS.find_many would neither move the found books nor count the scans.
+        """
+        return [self.find(title) for title in titles]
+
+    def shelve(self, book):
+        """ Shelves the book at the end of the library. """
+        super().shelve(book)
+        self._negated_counts.append(0)
+
+    def unshelve(self, title):
+        """
+        Removes and returns the book in the library with title.
+        The unshelve method is overriden to also remove the count of the book.
+        """
+        index = self._find_index(title)
+        if index is None:
+            return None
+        del self._negated_counts[index]
+        book = self._books.pop(index)
+        self._index_unshelved(book, self._titles.pop(index))
+        return book
+
+    def shelve_many(self, books):
+        """ Shelves the books at the end of the library. """
+        super().shelve_many(books)
+        self._negated_counts.extend([0] * (len(self._books) - len(self._negated_counts)))
+
+    def average_scan_length(self):
+        """ Returns the average amount of books scanned per find so far (0 if there were no finds). Scans done to unshelve books are not counted. """
+        return self._scanned_books / self._searches if self._searches else 0
+
+    def reset_statistics(self):
+        """ Sets the search and scanned book counters back to 0. """
+        self._searches = 0
+        self._scanned_books = 0
+
+    def _columns(self):
+        """ Returns the names of the lists holding one item per book -- the counts are kept in the order of the books too. """
+        return super()._columns() + ("_negated_counts",)
+
+    def _reorganise(self, index):
+        """ Moves the found book at index as chosen by the library's strategy. """
+        if self._strategy is OrganisingStrategy.MOVE_TO_FRONT:
+            # removing and inserting shifts the list in C, so this is fast even though it is O(index)
+            for column in (self._books, self._titles, self._negated_counts):
+                column.insert(0, column.pop(index))
+        elif self._strategy is OrganisingStrategy.TRANSPOSE:
+            if index > 0:
+                self._swap(index, index - 1)
+        else:
+            # every book between the new position and index has the old count of the found book,
+            # so swapping the found book with the first of them keeps the counts in order
+            negated_count = self._negated_counts[index] - 1
+            self._negated_counts[index] = negated_count
+            self._swap(index, bisect_right(self._negated_counts, negated_count, 0, index))
+
+    def _swap(self, first_index, second_index):
+        """ Swaps the books (and their titles and counts) at first_index and second_index. """
+        for column in (self._books, self._titles, self._negated_counts):
+            column[first_index], column[second_index] = column[second_index], column[first_index]
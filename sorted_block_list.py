@@ -0,0 +1,184 @@
+import bisect
+from itertools import accumulate
+import sys
+
+DEFAULT_BLOCK_SIZE = 1000
+
+class SortedBlockList:
+    """
+    A sequence of (key, value) pairs kept sorted by key.
+    The pairs are stored in a list of bounded-size sorted blocks, similar to the leaves of a B+ tree.
+
+    Searching is O(log n).
+    Inserting and removing only shift the items of one block and the block offsets -- O(sqrt n) when block_size is close to sqrt n.
+    """
+
+    def __init__(self, keys=(), values=(), block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Creates a new sorted block list.
+
+        keys (optional) - the keys of the initial items. Must already be sorted.
+        values (optional) - the values of the initial items, in the same order as keys.
+        block_size (optional) - the amount of items a block holds before it is split in two.
+        """
+        if block_size < 4:
+            raise ValueError("block_size must be at least 4")
+        keys = list(keys)
+        values = list(values)
+        if len(keys) != len(values):
+            raise ValueError("keys and values must have the same length")
+        self._block_size = block_size
+        self._key_blocks = [keys[start:start + block_size] for start in range(0, len(keys), block_size)]
+        self._value_blocks = [values[start:start + block_size] for start in range(0, len(values), block_size)]
+        # the last (largest) key of every block, used to find which block a key belongs to
+        self._maxes = [key_block[-1] for key_block in self._key_blocks]
+        # the global index of the first item of every block, used to resolve positions
+        self._offsets = []
+        self._length = len(keys)
+        self._update_offsets(0)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        """ Returns the value at the specified position. """
+        block, offset = self._locate(index)
+        return self._value_blocks[block][offset]
+
+    def __iter__(self):
+        """ Iterates over the values in key order. """
+        for value_block in self._value_blocks:
+            yield from value_block
+
+    def keys(self):
+        """ Iterates over the keys in order. """
+        for key_block in self._key_blocks:
+            yield from key_block
+
+    def key_at(self, index):
+        """ Returns the key at the specified position. """
+        block, offset = self._locate(index)
+        return self._key_blocks[block][offset]
+
+    def bisect_left(self, key):
+        """ Returns the position of the first item with a key that is not less than key. """
+        block = bisect.bisect_left(self._maxes, key)
+        if block == len(self._maxes):
+            return self._length
+        return self._offsets[block] + bisect.bisect_left(self._key_blocks[block], key)
+
+    def bisect_right(self, key):
+        """ Returns the position of the first item with a key that is greater than key. """
+        block = bisect.bisect_right(self._maxes, key)
+        if block == len(self._maxes):
+            return self._length
+        return self._offsets[block] + bisect.bisect_right(self._key_blocks[block], key)
+
+    def items_from(self, index):
+        """ Iterates over the (key, value) pairs in key order, starting at the specified position. """
+        if index >= self._length:
+            return
+        block, offset = self._locate(index)
+        while block < len(self._key_blocks):
+            key_block = self._key_blocks[block]
+            value_block = self._value_blocks[block]
+            for position in range(offset, len(key_block)):
+                yield (key_block[position], value_block[position])
+            block += 1
+            offset = 0
+
+    def size_in_bytes(self):
+        """ Returns the memory used by the blocks and block indexes in bytes (the keys and values themselves are not counted). """
+        blocks = self._key_blocks + self._value_blocks
+        return sum(map(sys.getsizeof, blocks)) + sum(map(sys.getsizeof, (self._key_blocks, self._value_blocks, self._maxes, self._offsets)))
+
+    def insert(self, key, value):
+        """ Inserts value with key, before any items with an equal key. """
+        if not self._key_blocks:
+            self._key_blocks.append([key])
+            self._value_blocks.append([value])
+            self._maxes.append(key)
+            self._offsets.append(0)
+            self._length = 1
+            return
+
+        block = bisect.bisect_left(self._maxes, key)
+        if block == len(self._maxes):
+            # the key is larger than every key, so it goes at the end of the last block
+            block -= 1
+        key_block = self._key_blocks[block]
+        offset = bisect.bisect_left(key_block, key)
+        key_block.insert(offset, key)
+        self._value_blocks[block].insert(offset, value)
+        self._maxes[block] = key_block[-1]
+        self._length += 1
+
+        if len(key_block) > self._block_size:
+            self._split(block)
+        self._update_offsets(block)
+
+    def pop(self, index):
+        """ Removes and returns the value at the specified position. """
+        block, offset = self._locate(index)
+        key_block = self._key_blocks[block]
+        del key_block[offset]
+        value = self._value_blocks[block].pop(offset)
+        self._length -= 1
+
+        if not key_block:
+            del self._key_blocks[block]
+            del self._value_blocks[block]
+            del self._maxes[block]
+            del self._offsets[block]
+            block = max(0, block - 1)
+        else:
+            self._maxes[block] = key_block[-1]
+            if len(key_block) < self._block_size // 4 and len(self._key_blocks) > 1:
+                block = self._merge(block)
+        self._update_offsets(block)
+        return value
+
+    def _locate(self, index):
+        """ Converts a global position into a (block, offset) pair. """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("SortedBlockList index out of range")
+        block = bisect.bisect_right(self._offsets, index) - 1
+        return (block, index - self._offsets[block])
+
+    def _split(self, block):
+        """ Splits the specified block into two halves. """
+        key_block = self._key_blocks[block]
+        value_block = self._value_blocks[block]
+        half = len(key_block) // 2
+        self._key_blocks.insert(block + 1, key_block[half:])
+        self._value_blocks.insert(block + 1, value_block[half:])
+        del key_block[half:]
+        del value_block[half:]
+        self._maxes[block] = key_block[-1]
+        self._maxes.insert(block + 1, self._key_blocks[block + 1][-1])
+        self._offsets.insert(block + 1, 0) # fixed by _update_offsets
+
+    def _merge(self, block):
+        """
+        Merges the specified (underfull) block with a neighbouring block.
+        Returns the index of the first block whose offset may have changed.
+        """
+        if block == len(self._key_blocks) - 1:
+            block -= 1
+        self._key_blocks[block].extend(self._key_blocks.pop(block + 1))
+        self._value_blocks[block].extend(self._value_blocks.pop(block + 1))
+        self._maxes.pop(block + 1)
+        self._offsets.pop(block + 1)
+        self._maxes[block] = self._key_blocks[block][-1]
+        if len(self._key_blocks[block]) > self._block_size:
+            self._split(block)
+        return block
+
+    def _update_offsets(self, block):
+        """ Recomputes the offsets of every block from the specified block onwards. """
+        if block >= len(self._key_blocks):
+            return
+        start = self._offsets[block] if block > 0 else 0
+        self._offsets[block:] = accumulate(map(len, self._key_blocks[block:-1]), initial=start)
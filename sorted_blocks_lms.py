@@ -0,0 +1,90 @@
+import sys
+
+from library_management_system import LibraryManagementSystem, CopyPolicy
+from sorted_block_list import SortedBlockList, DEFAULT_BLOCK_SIZE
+from title_keys import basic_key, batch_keys
+from title_normalisation import EXACT
+
+class SortedBlocksLMS(LibraryManagementSystem):
+    """
+    A library that keeps its books sorted in bounded-size blocks (similar to a B+ tree).
+
+    Searching is O(log n).
+    Insertion and deletion are O(sqrt n) -- only one block is shifted instead of the whole library.
+    """
+
+    def __init__(self, books, key=basic_key, block_size=DEFAULT_BLOCK_SIZE, copy_policy=CopyPolicy.DEEP, normaliser=EXACT):
+        """
+        Creates a new library with the specified books.
+        Makes a deep copy of the books unless another copy policy is specified.
+        Sorts books into blocks for binary search.
+
+        books - the books to initialize the library with.
+        key (optional) - the key function used to sort and search through the library.
+        block_size (optional) - the amount of books each block holds before it is split in two.
+        copy_policy (optional) - how the books are copied (see CopyPolicy).
+        normaliser (optional) - which titles are treated as equal (see TitleNormaliser). Titles are compared exactly by default.
+        """
+        super().__init__(books, copy_policy, normaliser)
+        self._key = key
+        self._block_size = block_size
+        # the blocks are keyed by (key, normalised title), so the normalised titles are kept in the blocks instead of a separate list
+        titles = self._titles
+        keys = list(zip(batch_keys(titles, key), titles))
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._books = SortedBlockList([keys[index] for index in order], [self._books[index] for index in order], block_size)
+        self._titles = None
+
+    def empty(self):
+        """ 
+        Removes every book from the library. 
+        The empty method is overriden to keep the books in (empty) blocks.
+        """
+        super().empty()
+        self._books = SortedBlockList([], [], self._block_size)
+        self._titles = None
+
+    def shelve(self, book):
+        """ Adds the specified book to the library. """
+        title = book.title() if self._exact else self._normalise(book.title())
+        self._books.insert((self._key(title), title), book)
+        self._index_shelved(book, title)
+
+    def unshelve(self, title):
+        """ 
+        Removes and returns the book in the library with title. 
+        If the book is not in the library, None is returned and the library is not changed.
+        The unshelve method is overriden because the normalised titles are kept in the blocks.
+        """
+        index = self._find_index(title)
+        if index is None:
+            return None
+        _, title = self._books.key_at(index)
+        book = self._books.pop(index)
+        self._index_unshelved(book, title)
+        return book
+
+    def _primary_index_size(self):
+        """ Returns the memory used by the blocks (including the keys) in bytes. """
+        return self._books.size_in_bytes() + sum(sys.getsizeof(key) + sys.getsizeof(key[0]) for key in self._books.keys())
+
+    def _stored_titles(self):
+        """ Returns the normalised titles of the books (from the block keys). """
+        return [title for _, title in self._books.keys()]
+
+    def _find_index(self, title):
+        """
+        Finds and returns the index of the book in the library with title.
+        The blocks are sorted by (key, normalised title), so one binary search finds the first book with the title.
+
+        Runs in O(log n) -- books with the same key are ordered by title, so a bad key function no longer causes a linear search.
+
+        NOTE -- CASE-SENSITIVE (unless the library's normaliser ignores case)
+        """
+        if not self._exact:
+            title = self._normalise(title)
+        target_key = (self._key(title), title)
+        index = self._books.bisect_left(target_key)
+        if index < len(self._books) and self._books.key_at(index) == target_key:
+            return index
+        return None
@@ -1,4 +1,36 @@
-from timing import *
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+
+from timer import *
+from book import Book
+from book_csv import BookCsvFormatError, read_books_from_csv_file, read_books_from_csv_file_in_parallel
+from hash_map_lms import HashMapLMS
+from binary_search_lms import BinarySearchLMS
+from library_management_system import CopyPolicy
+from library_snapshot import save_snapshot, load_snapshot
+from memory_usage import deep_getsizeof, measure_memory
+from complexity_analysis import analyse, markdown_report
+from concurrent_lms import ConcurrentLMS, StripedLMS
+from process_sharded_lms import ProcessShardedLMS
+from library_server import LibraryService, run_load
+from linear_search_lms import LinearSearchLMS
+from self_organising_lms import SelfOrganisingLMS, OrganisingStrategy
+from sorted_blocks_lms import SortedBlocksLMS
+from sorted_block_list import SortedBlockList
+from fuzzy_index import bounded_edit_distance
+from full_text_index import PostingList
+from lookup_cache import CachedLMS, EvictionPolicy, LRUCache, LFUCache, TinyLFUCache, MISSING
+from title_normalisation import CASE_INSENSITIVE
+import title_keys
 
 def prompt_user_for_number_in_range(prompt, lower, upper):
 	""" Prompts the user for a value between lower and upper using prompt. """
@@ -22,13 +54,818 @@ def test_find(lms):
 def test_unshelve(lms):
 	""" Tests the deletion of the given lms. """
 	random_book = lms.random_book()
-	lms.remove(random_book.title())
+	lms.unshelve(random_book.title())
 
 def test_shelve(lms, books):
 	""" Tests the insertion of books the given lms. """
-	benchmark = Benchmark()
+	benchmark = Benchmarker()
 	for book in books:
 		(_, execution_time_in_ns) = time_execution(lms.shelve)(book)
 		benchmark.add_time(execution_time_in_ns)
 	print(f"--- Time stats for adding {len(books)} books to lms ---")
-	print(benchmark)
\ No newline at end of file
+	print(benchmark)
+
+def stress_test_hash_map_lms(amount_of_operations=2_000_000, amount_of_titles=10_000, seed=0):
+	""" 
+	Interleaves random shelve, unshelve and find calls on a HashMapLMS and checks every result against a reference dict.
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	titles = [f"Title {index}" for index in range(amount_of_titles)]
+	lms = HashMapLMS([])
+	reference = dict()
+	for operation in range(amount_of_operations):
+		title = generator.choice(titles)
+		choice = generator.random()
+		if choice < 0.4:
+			if title in reference: # titles are unique in the reference, so only shelve missing ones
+				continue
+			book = Book(title, None)
+			lms.shelve(book)
+			reference[title] = book
+		elif choice < 0.7:
+			assert lms.unshelve(title) is reference.pop(title, None), f"unshelve({title!r}) mismatch at operation {operation}"
+		else:
+			assert lms.find(title) is reference.get(title), f"find({title!r}) mismatch at operation {operation}"
+		assert len(lms) == len(reference), f"length mismatch at operation {operation}"
+	for title, book in reference.items():
+		assert lms.find(title) is book, f"find({title!r}) mismatch after all operations"
+
+def stress_test_concurrent_lms(lms, amount_of_threads=8, amount_of_operations_per_thread=20_000, amount_of_titles_per_thread=500, seed=0):
+	""" 
+	Runs threads that interleave random shelve, unshelve, find and find_many calls on a shared (thread-safe) lms.
+	Every thread changes only its own titles, so it checks its results against its own reference dict,
+	and it also looks up the titles of other threads to check that no lookup sees a half-made change.
+	Raises an AssertionError on the first mismatch.
+	"""
+	errors = []
+
+	def run_thread(thread_index):
+		generator = random.Random(seed + thread_index)
+		titles = [f"Thread {thread_index} title {index}" for index in range(amount_of_titles_per_thread)]
+		reference = dict()
+		try:
+			for operation in range(amount_of_operations_per_thread):
+				title = generator.choice(titles)
+				choice = generator.random()
+				if choice < 0.3:
+					if title in reference: # titles are unique in the reference, so only shelve missing ones
+						continue
+					book = Book(title, None)
+					lms.shelve(book)
+					reference[title] = book
+				elif choice < 0.5:
+					assert lms.unshelve(title) is reference.pop(title, None), f"unshelve({title!r}) mismatch at operation {operation}"
+				elif choice < 0.6:
+					batch = generator.sample(titles, 5)
+					assert lms.find_many(batch) == [reference.get(title) for title in batch], f"find_many mismatch at operation {operation}"
+				elif choice < 0.8:
+					assert lms.find(title) is reference.get(title), f"find({title!r}) mismatch at operation {operation}"
+				else:
+					other_title = f"Thread {generator.randrange(amount_of_threads)} title {generator.randrange(amount_of_titles_per_thread)}"
+					book = lms.find(other_title)
+					assert book is None or book.title() == other_title, f"find({other_title!r}) returned {book.title()!r} at operation {operation}"
+			for title in titles:
+				assert lms.find(title) is reference.get(title), f"find({title!r}) mismatch after all operations"
+		except Exception as error:
+			errors.append(error)
+		references.append(reference)
+
+	references = []
+	switch_interval = sys.getswitchinterval()
+	# switching threads as often as possible makes interleavings that would tear a change much more likely
+	sys.setswitchinterval(1e-6)
+	try:
+		threads = [threading.Thread(target=run_thread, args=(thread_index,)) for thread_index in range(amount_of_threads)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+	finally:
+		sys.setswitchinterval(switch_interval)
+	if errors:
+		raise errors[0]
+	assert len(lms) == sum(map(len, references)), "length mismatch after all operations"
+
+def test_batch_keys(seed=0):
+	""" 
+	Checks that title_keys.batch_keys gives the same keys as calling every key function on every title,
+	with numpy (the vectorised path) and without it (the fallback). Titles include empty, non-ASCII and very long ones.
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	alphabet = "abcXYZ 019-'é–Ünïcödé😀"
+	titles = ["", "a", "Data Smart", "Ünïcödé – title", "😀" * 3, "x" * 500] + ["".join(generator.choice(alphabet) for _ in range(generator.randrange(60))) for _ in range(20_000)]
+	numpy, batch_size = title_keys.numpy, title_keys._BATCH_SIZE
+	# smaller batches, so titles are split across several batches
+	title_keys._BATCH_SIZE = 1000
+	try:
+		for vectorised in (False, True) if numpy is not None else (False,):
+			title_keys.numpy = numpy if vectorised else None
+			for key in (title_keys.basic_key, title_keys.fnv1a_64, title_keys.polynomial_rolling):
+				assert title_keys.batch_keys(titles, key) == list(map(key, titles)), f"batch_keys mismatch for {key.__name__} ({'numpy' if vectorised else 'fallback'})"
+	finally:
+		title_keys.numpy, title_keys._BATCH_SIZE = numpy, batch_size
+
+def test_snapshot_round_trip():
+	""" 
+	Saves a BinarySearchLMS as a snapshot, loads it back and checks that both libraries hold the same books.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book(f"Title {index}", f"Author {index % 7}" if index % 3 else None) for index in range(1000)]
+	books.append(Book("Ünïcödé – title", "Äuthor"))
+	books.append(Book("", None))
+	lms = BinarySearchLMS(books, key=title_keys.positional_ord)
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "library.snapshot")
+		save_snapshot(lms, path)
+		loaded = load_snapshot(path)
+		assert len(loaded) == len(lms), "length mismatch after loading"
+		assert [str(book) for book in loaded._books] == [str(book) for book in lms._books], "books mismatch after loading"
+		for book in books:
+			found = loaded.find(book.title())
+			assert found is not None and str(found) == str(book), f"find({book.title()!r}) mismatch after loading"
+		assert loaded.find("Missing title") is None, "found a book that was never saved"
+
+		# the loaded library must stay usable once it is changed
+		loaded.shelve(Book("New title", None))
+		assert str(loaded.unshelve("Title 5")) == str(lms.find("Title 5")), "unshelve mismatch after loading"
+		assert loaded.find("New title") is not None and loaded.find("Title 5") is None, "find mismatch after changing the loaded library"
+
+def test_parallel_csv_read():
+	""" 
+	Writes a csv file with a quoted title spanning many lines across the middle of the file (where the parallel reader splits it)
+	and checks that reading it in parallel gives the same books as reading it sequentially.
+	Raises an AssertionError on the first mismatch.
+	"""
+	multi_line_title = "\n".join(f'Line {index} of a "quoted" title, with commas' for index in range(2000))
+	rows = [(f"Title {index}", f"Author {index}") for index in range(1000)] + [(multi_line_title, "Long Author"), ("Title only",)] + [(f"Title {index}", f"Author {index}") for index in range(1000, 2000)]
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "books.csv")
+		with open(path, "w", encoding="utf-8", newline="") as csv_file:
+			writer = csv.writer(csv_file)
+			writer.writerow(("Title", "Author"))
+			writer.writerows(rows)
+		sequential_books = [(book.title(), book.author()) for book in read_books_from_csv_file(path)]
+		assert sequential_books == [(row[0], row[1] if len(row) == 2 else None) for row in rows], "sequential read mismatch"
+		for amount_of_workers in (1, 2, 3):
+			parallel_books = [(book.title(), book.author()) for book in read_books_from_csv_file_in_parallel(path, amount_of_workers)]
+			assert parallel_books == sequential_books, f"parallel read with {amount_of_workers} workers mismatch"
+		limited_books = [(book.title(), book.author()) for book in read_books_from_csv_file_in_parallel(path, 2, 1001)]
+		assert limited_books == sequential_books[:1001], "parallel read of the first 1001 books mismatch"
+
+def test_csv_error_lines():
+	""" 
+	Writes csv files with an invalid record after records with quoted fields spanning lines, and checks that the sequential and parallel readers
+	report the line the invalid record starts on.
+	Raises an AssertionError on the first mismatch.
+	"""
+	# the header is line 1, the first record lines 2 to 4, the second line 5, and the invalid record starts on line 6
+	text = 'Title,Author\n"First\ntitle\nspanning lines",Author\nSecond title,\n"Invalid\ntitle",Author,Extra\nLast title,Author\n'
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "books.csv")
+		with open(path, "w", encoding="utf-8", newline="") as csv_file:
+			csv_file.write(text)
+		for name, read in (("sequential", read_books_from_csv_file), ("parallel", lambda path: read_books_from_csv_file_in_parallel(path, 2))):
+			try:
+				read(path)
+			except BookCsvFormatError as error:
+				assert "found on line 6." in str(error), f"{name} read reported {error}"
+			else:
+				raise AssertionError(f"{name} read accepted an invalid record")
+
+def test_case_insensitive_lookup():
+	""" 
+	Checks that every kind of library finds, prefix searches and unshelves books regardless of case, whitespace and compatibility forms.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book("Data Smart", "John Foreman"), Book("The  Fish Book", None), Book("Ｆｕｌｌ Width", None)]
+	for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+		lms = library_type(books, normaliser=CASE_INSENSITIVE)
+		assert lms.find("data smart") is not None, f"{library_type.__name__} missed a title with different case"
+		assert lms.find(" the fish BOOK ") is not None, f"{library_type.__name__} missed a title with different whitespace"
+		assert lms.find("full width") is not None, f"{library_type.__name__} missed a title with full-width letters"
+		assert lms.find("data smar") is None, f"{library_type.__name__} found a book that was never shelved"
+		assert [book.title() for book in lms.find_prefix("DATA")[0]] == ["Data Smart"], f"{library_type.__name__} prefix search mismatch"
+		lms.shelve(Book("Sherlock Holmes", None))
+		assert lms.unshelve("SHERLOCK holmes") is not None and lms.find("Sherlock Holmes") is None, f"{library_type.__name__} unshelve mismatch"
+
+def test_sorted_block_list(amount_of_operations=20_000, block_size=8, seed=0):
+	""" 
+	Interleaves random inserts and pops on a small-block SortedBlockList and checks it against a sorted reference list after every operation:
+	no block holds more than block_size items or is empty, blocks are merged once they shrink, and every block offset is the position of its first item.
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	blocks = SortedBlockList(range(0, 100, 2), [f"value {key}" for key in range(0, 100, 2)], block_size)
+	reference = [(key, f"value {key}") for key in range(0, 100, 2)]
+	assert [len(key_block) for key_block in blocks._key_blocks] == [block_size] * 6 + [2], "initial blocks are not full"
+	for operation in range(amount_of_operations):
+		# grow for the first half, then shrink until (nearly) empty, so both splitting and merging happen
+		if reference and (generator.random() < 0.3 if operation < amount_of_operations // 2 else generator.random() < 0.8):
+			index = generator.randrange(len(reference))
+			assert blocks.pop(index) == reference.pop(index)[1], f"pop({index}) mismatch at operation {operation}"
+		else:
+			key = generator.randrange(1000)
+			blocks.insert(key, f"value {key} at {operation}")
+			position = next((position for position, (reference_key, _) in enumerate(reference) if reference_key >= key), len(reference))
+			reference.insert(position, (key, f"value {key} at {operation}"))
+		assert len(blocks) == len(reference), f"length mismatch at operation {operation}"
+		assert all(0 < len(key_block) <= block_size for key_block in blocks._key_blocks), f"block sizes {list(map(len, blocks._key_blocks))} at operation {operation}"
+		offset = 0
+		for block, key_block in enumerate(blocks._key_blocks):
+			assert blocks._offsets[block] == offset, f"offset of block {block} is {blocks._offsets[block]} instead of {offset} at operation {operation}"
+			assert blocks._maxes[block] == key_block[-1], f"max of block {block} mismatch at operation {operation}"
+			offset += len(key_block)
+		if operation % 100 == 0:
+			assert list(zip(blocks.keys(), blocks)) == reference, f"items mismatch at operation {operation}"
+			assert all(blocks[index] == value for index, (_, value) in enumerate(reference)), f"indexing mismatch at operation {operation}"
+			assert len(blocks._key_blocks) <= 1 or len(reference) / len(blocks._key_blocks) >= block_size // 4, f"{len(blocks._key_blocks)} blocks for {len(reference)} items at operation {operation}"
+
+def test_batch_operations(amount_of_books=500, seed=0):
+	""" 
+	Checks that find_many, shelve_many and unshelve_many of every backend give the same results as find, shelve and unshelve called one title at a time,
+	including missing and repeated titles.
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	books = [Book(f"Title {index}", f"Author {index % 13}") for index in range(amount_of_books)]
+	new_books = [Book(f"New title {index}", None) for index in range(100)]
+	titles = [generator.choice(books).title() for _ in range(200)] + [f"Missing title {index}" for index in range(20)] + ["Title 0", "Title 0"]
+	generator.shuffle(titles)
+	for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS):
+		batched, reference = library_type(books), library_type(books)
+		found = batched.find_many(titles)
+		assert [str(book) for book in found] == [str(reference.find(title)) for title in titles], f"{library_type.__name__}.find_many mismatch"
+		assert batched.find_many([]) == [], f"{library_type.__name__}.find_many of no titles is not empty"
+
+		batched.shelve_many(new_books)
+		for book in new_books:
+			reference.shelve(book)
+		assert len(batched) == len(reference), f"{library_type.__name__}.shelve_many length mismatch"
+		assert [str(book) for book in batched.find_many(book.title() for book in new_books)] == [str(book) for book in new_books], f"{library_type.__name__}.shelve_many mismatch"
+
+		# books with the same title (in the batch and already in the library) end up in the same order as when shelved one by one
+		duplicate_books = [Book(f"Title {index % 3}", f"Duplicate {index}") for index in range(9)] + [Book("New title 0", "Duplicate")]
+		batched.shelve_many(duplicate_books)
+		for book in duplicate_books:
+			reference.shelve(book)
+		assert [str(book) for book in batched] == [str(book) for book in reference], f"{library_type.__name__}.shelve_many order mismatch with duplicate titles"
+		assert [str(batched.find(f"Title {index}")) for index in range(3)] == [str(reference.find(f"Title {index}")) for index in range(3)], f"{library_type.__name__}.shelve_many find mismatch with duplicate titles"
+
+		# repeated titles are only removed once, like unshelve called for every title in order
+		unshelved = batched.unshelve_many(titles + [book.title() for book in new_books[:50]])
+		expected = [reference.unshelve(title) for title in titles + [book.title() for book in new_books[:50]]]
+		assert [str(book) for book in unshelved] == [str(book) for book in expected], f"{library_type.__name__}.unshelve_many mismatch"
+		assert len(batched) == len(reference), f"{library_type.__name__}.unshelve_many length mismatch"
+		assert all((batched.find(book.title()) is None) == (reference.find(book.title()) is None) for book in books + new_books), f"{library_type.__name__} contents mismatch after unshelve_many"
+
+def test_author_index(amount_of_operations=3000, seed=0):
+	""" 
+	Builds the author index of every backend, then changes the library through shelve, unshelve, shelve_many, unshelve_many and empty
+	(with books without an author, duplicate titles and the same book shelved twice), checking find_by_author against a scan of the library.
+	Raises an AssertionError on the first mismatch.
+	"""
+	authors = [None, "Author A", "Author B", "Author C"]
+
+	def check(lms, description):
+		for author in authors:
+			expected = sorted(id(book) for book in lms if book.author() == author)
+			found = sorted(id(book) for book in lms.find_by_author(author))
+			assert found == expected, f"{type(lms).__name__}: find_by_author({author!r}) mismatch after {description}"
+
+	for library_type in (LinearSearchLMS, BinarySearchLMS, HashMapLMS, SortedBlocksLMS, SelfOrganisingLMS):
+		generator = random.Random(seed)
+		lms = library_type([Book(f"Title {index}", authors[index % 4]) for index in range(200)])
+		lms.find_by_author(None) # builds the index, so every later change has to update it
+		titles = [f"Title {index}" for index in range(300)]
+		for operation in range(amount_of_operations):
+			choice = generator.random()
+			if choice < 0.35:
+				book = Book(generator.choice(titles), generator.choice(authors))
+				lms.shelve(book)
+				if generator.random() < 0.05:
+					lms.shelve(book)
+				description = "shelve"
+			elif choice < 0.7:
+				lms.unshelve(generator.choice(titles))
+				description = "unshelve"
+			elif choice < 0.85:
+				lms.shelve_many([Book(generator.choice(titles), generator.choice(authors)) for _ in range(generator.randrange(5))])
+				description = "shelve_many"
+			elif choice < 0.999:
+				lms.unshelve_many([generator.choice(titles) for _ in range(generator.randrange(5))])
+				description = "unshelve_many"
+			else:
+				lms.empty()
+				lms.find_by_author(None)
+				description = "empty"
+			if operation % 20 == 0:
+				check(lms, f"{description} (operation {operation})")
+		check(lms, "every operation")
+		lms.empty()
+		assert all(lms.find_by_author(author) == [] for author in authors), f"{library_type.__name__}: find_by_author found books after empty"
+
+def test_prefix_pagination(limit=7):
+	""" 
+	Pages through prefix searches with cursors and checks that the pages hold every matching book once, in title order,
+	including books with the same title split across pages and books shelved or unshelved between pages.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book(f"Title {index}", None) for index in range(300)] + [Book("Title 10", f"Copy {copy}") for copy in range(10)] + [Book("Tit", None), Book("title 1", None)]
+	lms = LinearSearchLMS(books, copy_policy=CopyPolicy.SHALLOW)
+	for prefix in ("Title 1", "Title 10", "Tit", "Title 2999", ""):
+		expected = sorted((book for book in books if book.title().startswith(prefix)), key=Book.title)
+		found = []
+		page, cursor = lms.find_prefix(prefix, limit)
+		found.extend(page)
+		while cursor is not None:
+			assert len(page) == limit, f"a page of {prefix!r} before the last one has {len(page)} books"
+			page, cursor = lms.find_prefix(prefix, limit, cursor)
+			found.extend(page)
+		assert [book.title() for book in found] == [book.title() for book in expected], f"titles found with {prefix!r} mismatch"
+		assert {id(book) for book in found} == {id(book) for book in expected} and len(found) == len(expected), f"books found with {prefix!r} mismatch"
+
+	# books shelved and unshelved before the cursor neither repeat nor skip books on the next pages
+	expected = sorted((book for book in books if book.title().startswith("Title 1")), key=Book.title)
+	found, cursor = lms.find_prefix("Title 1", limit)
+	while cursor is not None:
+		lms.shelve(Book("Title 0 shelved", None))
+		# only titles held by one book, so the unshelved book is one that was already found
+		unique_found_titles = [book.title() for book in found if book.title() != "Title 10" and lms.find(book.title()) is not None]
+		if unique_found_titles:
+			lms.unshelve(unique_found_titles[0])
+		page, cursor = lms.find_prefix("Title 1", limit, cursor)
+		found.extend(page)
+	assert [book.title() for book in found] == [book.title() for book in expected], "titles found while changing the library mismatch"
+
+	case_insensitive = LinearSearchLMS(books, normaliser=CASE_INSENSITIVE)
+	assert sorted(book.title() for book in case_insensitive.find_prefix("TITLE 1", 2)[0]) == ["Title 1", "title 1"], "case-insensitive prefix search mismatch"
+	try:
+		lms.find_prefix("Title", 0)
+	except ValueError:
+		pass
+	else:
+		raise AssertionError("a limit of 0 was accepted")
+
+def test_fuzzy_search(amount_of_pairs=5000, seed=0):
+	""" 
+	Checks bounded_edit_distance against a full edit distance on random strings,
+	and that find_fuzzy finds titles exactly max_distance edits away (closest first) but not titles one edit further.
+	Raises an AssertionError on the first mismatch.
+	"""
+	def edit_distance(first, second):
+		previous_row = list(range(len(second) + 1))
+		for row, first_character in enumerate(first, 1):
+			current_row = [row]
+			for column, second_character in enumerate(second, 1):
+				current_row.append(min(previous_row[column] + 1, current_row[column - 1] + 1, previous_row[column - 1] + (first_character != second_character)))
+			previous_row = current_row
+		return previous_row[-1]
+
+	generator = random.Random(seed)
+	for _ in range(amount_of_pairs):
+		first = "".join(generator.choice("ab c") for _ in range(generator.randrange(12)))
+		second = "".join(generator.choice("ab c") for _ in range(generator.randrange(12)))
+		max_distance = generator.randrange(4)
+		distance = edit_distance(first, second)
+		expected = distance if distance <= max_distance else None
+		assert bounded_edit_distance(first, second, max_distance) == expected, f"bounded_edit_distance({first!r}, {second!r}, {max_distance}) mismatch"
+
+	title = "The Pragmatic Programmer"
+	books = [Book(title, None), Book("The Pragmatic Programmers", None), Book("The Pragmatic Programme", None), Book("Tha Pragmatic Programmor", None), Book("A Pragmatic Programmer", None), Book("Structure and Interpretation", None)]
+	lms = HashMapLMS(books)
+	# substitutions far enough apart that they never share a trigram
+	substituted = [title]
+	for position in (1, 9, 17):
+		substituted.append(substituted[-1][:position] + "#" + substituted[-1][position + 1:])
+	for max_distance in range(3):
+		for edits, query in enumerate(substituted):
+			found = [book.title() for book in lms.find_fuzzy(query, max_distance=max_distance)]
+			if edits <= max_distance:
+				assert found and found[0] == title, f"{query!r} ({edits} edits) not found first with max_distance {max_distance}: {found}"
+			else:
+				assert title not in found, f"{query!r} ({edits} edits) found with max_distance {max_distance}"
+	found = [book.title() for book in lms.find_fuzzy(title, max_distance=2)]
+	# "A Pragmatic Programmer" is 3 edits away
+	assert found == [title, "The Pragmatic Programme", "The Pragmatic Programmers", "Tha Pragmatic Programmor"], f"results are not closest first: {found}"
+	assert [book.title() for book in lms.find_fuzzy(title, max_results=2, max_distance=2)] == found[:2], "max_results mismatch"
+	assert lms.find_fuzzy(title, max_distance=3)[-1].title() == "A Pragmatic Programmer", "title 3 edits away not found with max_distance 3"
+
+	# titles shelved and unshelved after the index is built are found (or not) too
+	lms.shelve(Book("The Pragmatic Programmer 2", None))
+	lms.unshelve("Tha Pragmatic Programmor")
+	found = [book.title() for book in lms.find_fuzzy(title, max_distance=2)]
+	assert found == [title, "The Pragmatic Programme", "The Pragmatic Programmers", "The Pragmatic Programmer 2"], f"results after shelving mismatch: {found}"
+
+def test_full_text_search(amount_of_operations=6000, seed=0):
+	""" 
+	Checks that posting lists decode to the ids appended to them (including large gaps between ids),
+	and that find_words finds the same books as a scan of a reference dict while books are shelved and unshelved (enough to compact the index).
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	for _ in range(100):
+		posting_list = PostingList()
+		book_ids = []
+		book_id = -1
+		for _ in range(generator.randrange(1, 200)):
+			book_id += generator.randrange(1, 2 ** generator.randrange(1, 40))
+			posting_list.append(book_id)
+			book_ids.append(book_id)
+		assert list(posting_list) == book_ids and len(posting_list) == len(book_ids), f"posting list round trip mismatch for {book_ids[:10]}..."
+
+	vocabulary = ["Machine", "learning", "Data", "science", "deep", "Python", "art", "of", "the", "systems"]
+	def random_words(amount):
+		return " ".join(generator.choice(vocabulary) for _ in range(amount))
+
+	def words(text):
+		return set(text.casefold().replace(",", " ").split())
+
+	lms = HashMapLMS([])
+	reference = dict()
+	lms.find_words("data") # builds the index, so every later change has to update it
+	for operation in range(amount_of_operations):
+		if generator.random() < 0.55 or not reference:
+			title = f"{random_words(generator.randrange(1, 4))}, volume {operation}"
+			book = Book(title, random_words(1) if generator.random() < 0.5 else None)
+			lms.shelve(book)
+			reference[title] = book
+		else:
+			title = generator.choice(list(reference)) if operation % 2 else next(iter(reference))
+			assert lms.unshelve(title) is reference.pop(title), f"unshelve({title!r}) mismatch at operation {operation}"
+		if operation % 50 == 0:
+			query = random_words(generator.randrange(1, 3)).upper()
+			match_all = generator.random() < 0.5
+			expected = {id(book) for book in reference.values() if (words(query) <= words(book.title() + " " + (book.author() or "")) if match_all else words(query) & words(book.title() + " " + (book.author() or "")))}
+			found = lms.find_words(query, match_all)
+			assert len(found) == len(expected) and {id(book) for book in found} == expected, f"find_words({query!r}, {match_all}) mismatch at operation {operation}"
+	assert lms.find_words(f"volume {amount_of_operations - 1}") == [reference[title] for title in reference if title.endswith(f"volume {amount_of_operations - 1}")], "find_words of the last book mismatch"
+	assert lms.find_words("") == [] and lms.find_words("missing") == [], "find_words of a missing word found books"
+
+def test_lookup_cache():
+	""" 
+	Checks which keys the LRU, LFU and TinyLFU caches evict, and that a CachedLMS with every eviction policy
+	never answers from the cache after the title was shelved or unshelved.
+	Raises an AssertionError on the first mismatch.
+	"""
+	def cached_keys(cache, keys):
+		return [key for key in keys if cache.get(key) is not MISSING]
+
+	lru = LRUCache(3)
+	for key in "abc":
+		lru.put(key, key.upper())
+	lru.get("a")
+	lru.put("d", "D")
+	assert cached_keys(lru, "abcd") == ["a", "c", "d"], "LRU did not evict the least recently used key"
+	lru.put("e", "E") # the gets above used a, c and d in that order
+	assert cached_keys(lru, "abcde") == ["c", "d", "e"], "LRU did not evict the least recently used key"
+
+	lfu = LFUCache(3)
+	for key in "abc":
+		lfu.put(key, key.upper())
+	lfu.get("a")
+	lfu.get("a")
+	lfu.get("c")
+	lfu.put("d", "D")
+	assert [key for key in "abcd" if key in lfu._entries] == ["a", "c", "d"], "LFU did not evict the least frequently used key"
+	lfu.put("e", "E")
+	assert [key for key in "acde" if key in lfu._entries] == ["a", "c", "e"], "LFU did not evict the least frequently used key"
+	lfu.get("e")
+	lfu.put("f", "F") # c and e were both used twice, c less recently
+	assert [key for key in "acef" if key in lfu._entries] == ["a", "e", "f"], "LFU did not evict the least recently used of the least frequently used keys"
+	lfu.discard("f")
+	lfu.put("g", "G")
+	assert len(lfu) == 3 and lfu.get("g") == "G", "LFU did not reuse the room of a discarded key"
+
+	# int keys hash to themselves, so the sketch positions do not change between runs
+	tiny_lfu = TinyLFUCache(100)
+	for key in range(100):
+		tiny_lfu.get(key)
+		tiny_lfu.put(key, key)
+	tiny_lfu.get(1000)
+	tiny_lfu.put(1000, 1000)
+	assert tiny_lfu.get(1000) is MISSING and tiny_lfu.get(0) == 0, "TinyLFU admitted a key used as often as the key it would evict"
+	for _ in range(5):
+		tiny_lfu.get(2000)
+	tiny_lfu.put(2000, 2000)
+	assert tiny_lfu.get(2000) == 2000 and tiny_lfu.get(1) is MISSING and len(tiny_lfu) == 100, "TinyLFU did not replace the least recently used key with a popular key"
+
+	for eviction_policy in EvictionPolicy:
+		name = eviction_policy.name
+		lms = CachedLMS(HashMapLMS([Book(f"Title {index}", None) for index in range(10)]), capacity=4, eviction_policy=eviction_policy)
+		assert lms.find("Title 1").title() == "Title 1" and lms.find("Title 1").title() == "Title 1" and lms.hits() == 1, f"{name}: repeated find was not cached"
+		assert lms.find("Missing") is None and lms.find("Missing") is None and lms.hits() == 2, f"{name}: repeated miss was not cached"
+		lms.unshelve("Title 1")
+		lms.shelve(Book("Missing", "Author"))
+		assert lms.find("Title 1") is None and lms.find("Missing").author() == "Author", f"{name}: stale cached results after shelve and unshelve"
+		lms.find_many(["Title 2", "Title 3"])
+		lms.unshelve_many(["Title 2"])
+		lms.shelve_many([Book("Title 3", "Second copy")])
+		assert lms.find_many(["Title 2", "Title 3"])[0] is None, f"{name}: stale cached results after unshelve_many"
+		assert lms.find("Title 3").author() == "Second copy", f"{name}: stale cached results after shelve_many"
+		lms.empty()
+		assert lms.find("Missing") is None and len(lms) == 0, f"{name}: stale cached results after empty"
+
+def test_self_organising_lms(amount_of_lookups=3000, seed=0):
+	""" 
+	Checks that every strategy of SelfOrganisingLMS moves found books as documented while find keeps returning the right books,
+	and that unshelve_many removes the same rows from the books, titles and counts.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book(f"Title {index}", f"Author {index}") for index in range(10)]
+	move_to_front = SelfOrganisingLMS(books, OrganisingStrategy.MOVE_TO_FRONT)
+	move_to_front.find("Title 5")
+	move_to_front.find("Title 8")
+	assert move_to_front._titles[:3] == ["Title 8", "Title 5", "Title 0"], f"move to front order {move_to_front._titles[:3]}"
+	transpose = SelfOrganisingLMS(books, OrganisingStrategy.TRANSPOSE)
+	transpose.find("Title 5")
+	transpose.find("Title 5")
+	transpose.find("Title 0")
+	assert transpose._titles[:5] == ["Title 0", "Title 1", "Title 2", "Title 5", "Title 3"], f"transpose order {transpose._titles[:5]}"
+
+	generator = random.Random(seed)
+	for strategy in OrganisingStrategy:
+		lms = SelfOrganisingLMS(books, strategy)
+		for _ in range(amount_of_lookups):
+			# skewed lookups, so the popular titles move to the front
+			index = min(int(generator.expovariate(0.5)), 12)
+			found = lms.find(f"Title {index}")
+			assert (found is None) == (index >= 10) and (found is None or found.author() == f"Author {index}"), f"{strategy.name}: find(Title {index}) mismatch"
+		assert lms._titles[0] == "Title 0", f"{strategy.name}: the most popular title is not at the front"
+		assert [book.title() for book in lms._books] == lms._titles, f"{strategy.name}: books and titles out of step"
+		if strategy is OrganisingStrategy.COUNT:
+			assert lms._negated_counts == sorted(lms._negated_counts), "COUNT: books are not ordered by how often they were found"
+		# find_many moves the found books and counts the scans like one find per title
+		batched = SelfOrganisingLMS(books, strategy)
+		one_by_one = SelfOrganisingLMS(books, strategy)
+		lookup_generator = random.Random(seed + 1)
+		lookups = [f"Title {min(int(lookup_generator.expovariate(0.5)), 12)}" for _ in range(200)]
+		assert [str(book) for book in batched.find_many(lookups)] == [str(one_by_one.find(title)) for title in lookups], f"{strategy.name}: find_many mismatch"
+		assert batched._titles == one_by_one._titles and batched._negated_counts == one_by_one._negated_counts, f"{strategy.name}: find_many did not reorganise like find"
+		assert batched.average_scan_length() == one_by_one.average_scan_length() > 0, f"{strategy.name}: find_many scans were not counted"
+		# unshelving scans the books too, but only finds are counted
+		scan_length = batched.average_scan_length()
+		batched.unshelve("Title 9")
+		batched.unshelve("Missing")
+		assert batched.average_scan_length() == scan_length, f"{strategy.name}: unshelve scans were counted"
+		counts = {title: count for title, count in zip(lms._titles, lms._negated_counts)}
+		removed = lms.unshelve_many(["Title 3", "Missing", "Title 0", "Title 3"])
+		assert [book and book.title() for book in removed] == ["Title 3", None, "Title 0", None], f"{strategy.name}: unshelve_many mismatch"
+		assert len(lms._books) == len(lms._titles) == len(lms._negated_counts) == 8, f"{strategy.name}: columns out of step after unshelve_many"
+		assert [book.title() for book in lms._books] == lms._titles and all(counts[title] == count for title, count in zip(lms._titles, lms._negated_counts)), f"{strategy.name}: rows mismatch after unshelve_many"
+		assert all(lms.find(f"Title {index}").author() == f"Author {index}" for index in (1, 2, 4, 5, 6, 7, 8, 9)), f"{strategy.name}: find mismatch after unshelve_many"
+
+def test_striped_lms_copy_policy():
+	""" 
+	Checks that StripedLMS copies the books it is created with as its copy_policy says (and shares shelved books, like every library),
+	and that random_book raises an IndexError once the library is empty.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book(f"Title {index}", None) for index in range(100)]
+	for copy_policy, shares_books in ((CopyPolicy.DEEP, False), (CopyPolicy.SHALLOW, True), (CopyPolicy.BORROW, True)):
+		lms = StripedLMS(books, SortedBlocksLMS, amount_of_shards=4, copy_policy=copy_policy)
+		assert len(lms) == 100 and all(str(lms.find(book.title())) == str(book) for book in books), f"{copy_policy.name}: find mismatch"
+		assert all((lms.find(book.title()) is book) == shares_books for book in books), f"{copy_policy.name}: books were not copied as the copy policy says"
+		shelved_book = Book("Shelved title", None)
+		lms.shelve(shelved_book)
+		assert lms.find("Shelved title") is shelved_book, f"{copy_policy.name}: a shelved book was copied"
+	lms = StripedLMS(books, HashMapLMS, amount_of_shards=4, normaliser=CASE_INSENSITIVE)
+	assert lms.find("TITLE 5").title() == "Title 5", "titles are not normalised with the normaliser of the shards"
+	lms.unshelve_many(book.title() for book in books)
+	try:
+		lms.random_book()
+	except IndexError:
+		pass
+	else:
+		raise AssertionError("random_book of an empty library did not raise an IndexError")
+
+def test_process_sharded_lms():
+	""" 
+	Checks that a ProcessShardedLMS answers like a HashMapLMS, that exceptions raised by a worker are raised by the caller
+	(leaving the worker usable), that random_book raises an IndexError once the library is empty, and that close stops every worker.
+	Raises an AssertionError on the first mismatch.
+	"""
+	books = [Book(f"Title {index}", f"Author {index % 5}") for index in range(200)]
+	reference = HashMapLMS(books)
+	library = ProcessShardedLMS(books, HashMapLMS, amount_of_processes=3)
+	with library:
+		titles = [f"Title {index}" for index in range(0, 220, 3)]
+		assert [str(book) for book in library.find_many(titles)] == [str(reference.find(title)) for title in titles], "find_many mismatch"
+		assert sorted(map(str, library.find_by_author("Author 2"))) == sorted(map(str, reference.find_by_author("Author 2"))), "find_by_author mismatch"
+		try:
+			library._call(0, "find_prefix", "Title", 0)
+		except ValueError:
+			pass
+		else:
+			raise AssertionError("an exception raised by a worker was not raised by the caller")
+		try:
+			library._call(1, "missing_method")
+		except AttributeError:
+			pass
+		else:
+			raise AssertionError("an exception raised by a worker was not raised by the caller")
+		assert str(library.find("Title 7")) == str(reference.find("Title 7")) and len(library) == 200, "a worker is unusable after raising"
+		# a batch whose request to a later shard cannot be sent (a book that cannot be pickled) leaves no unread answer on the earlier shards
+		first_title = next(f"New title {index}" for index in range(100) if library._shard_index(f"New title {index}") == 0)
+		last_title = next(f"New title {index}" for index in range(100) if library._shard_index(f"New title {index}") == 2)
+		try:
+			library.shelve_many([Book(first_title, None), Book(last_title, lambda: None)])
+		except Exception:
+			pass
+		else:
+			raise AssertionError("a book that cannot be pickled was shelved")
+		assert library._shard_index("Title 2") == 0 and str(library.find("Title 2")) == str(reference.find("Title 2")), "a shard answered with the answer of a failed batch"
+		assert library.unshelve(first_title).title() == first_title and len(library) == 200, "the shards of a failed batch are unusable"
+		assert library.random_book().title().startswith("Title "), "random_book mismatch"
+		assert len(library.unshelve_many([book.title() for book in books])) == 200 and len(library) == 0, "unshelve_many did not empty the library"
+		try:
+			library.random_book()
+		except IndexError:
+			pass
+		else:
+			raise AssertionError("random_book of an empty library did not raise an IndexError")
+	assert not any(process.is_alive() for process in library._processes), "close did not stop every worker"
+
+def test_library_server():
+	""" 
+	Starts a LibraryService on a free localhost port and checks the responses to pipelined requests (including invalid ones).
+	Raises an AssertionError on the first mismatch.
+	"""
+	requests = [
+		({"id": 1, "op": "find", "title": "Data Smart"}, {"id": 1, "ok": True, "book": {"title": "Data Smart", "author": "John Foreman"}}),
+		({"id": 2, "op": "shelve", "title": "New title", "author": None}, {"id": 2, "ok": True}),
+		({"id": 3, "op": "find", "title": "New title"}, {"id": 3, "ok": True, "book": {"title": "New title", "author": None}}),
+		({"id": 4, "op": "unshelve", "title": "Data Smart"}, {"id": 4, "ok": True, "book": {"title": "Data Smart", "author": "John Foreman"}}),
+		({"id": 5, "op": "find", "title": "Data Smart"}, {"id": 5, "ok": True, "book": None}),
+		({"id": 6, "op": "len"}, {"id": 6, "ok": True, "len": 1}),
+		({"id": 7, "op": "lend"}, {"id": 7, "ok": False, "error": "unknown op 'lend'"}),
+	]
+
+	async def run():
+		service = LibraryService(HashMapLMS([Book("Data Smart", "John Foreman")]))
+		server = await service.start("127.0.0.1", 0)
+		reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+		writer.write(b"".join(json.dumps(request).encode('utf-8') + b"\n" for request, _ in requests) + b"not json\n")
+		await writer.drain()
+		for request, expected_response in requests:
+			response = json.loads(await reader.readline())
+			assert response == expected_response, f"response to {request} was {response}"
+		assert json.loads(await reader.readline())["ok"] is False, "invalid JSON was accepted"
+		writer.close()
+		await service.close()
+
+	asyncio.run(run())
+
+def test_library_server_errors():
+	""" 
+	Starts a LibraryService whose library fails every lookup and checks that the failed lookups are answered with errors,
+	and that run_load raises instead of waiting forever for the responses.
+	Raises an AssertionError on the first mismatch.
+	"""
+	class FailingLMS(HashMapLMS):
+		def find_many(self, titles):
+			raise KeyError("lookups are broken")
+
+	async def run():
+		service = LibraryService(FailingLMS([Book("Data Smart", "John Foreman")]))
+		server = await service.start("127.0.0.1", 0)
+		port = server.sockets[0].getsockname()[1]
+		reader, writer = await asyncio.open_connection("127.0.0.1", port)
+		writer.write(b"".join(json.dumps({"id": index, "op": "find", "title": "Data Smart"}).encode('utf-8') + b"\n" for index in range(3)))
+		await writer.drain()
+		for index in range(3):
+			response = json.loads(await reader.readline())
+			assert response == {"id": index, "ok": False, "error": "KeyError: 'lookups are broken'"}, f"response to lookup {index} was {response}"
+		writer.close()
+		try:
+			await asyncio.wait_for(run_load(["Data Smart"], "127.0.0.1", port, amount_of_connections=2, amount_of_requests=100), timeout=10)
+		except RuntimeError:
+			pass
+		else:
+			raise AssertionError("run_load did not raise on failed requests")
+		await service.close()
+
+	asyncio.run(run())
+
+def test_latency_histogram(amount_of_times=100_000, seed=0):
+	""" 
+	Records random times in a LatencyHistogram and checks its percentiles against the sorted times,
+	and that a histogram merged from JSON halves equals the histogram of every time.
+	Raises an AssertionError on the first mismatch.
+	"""
+	generator = random.Random(seed)
+	times = [int(generator.lognormvariate(10, 2)) for _ in range(amount_of_times)] + [0, 1, 255, 256, 257]
+	histogram = LatencyHistogram()
+	first_half, second_half = LatencyHistogram(), LatencyHistogram()
+	for index, nanoseconds in enumerate(times):
+		histogram.record(nanoseconds)
+		(first_half if index % 2 else second_half).record(nanoseconds)
+	sorted_times = sorted(times)
+	for percentile in (0, 1, 50, 90, 99, 99.9, 100):
+		exact = sorted_times[max(1, math.ceil(len(sorted_times) * percentile / 100)) - 1]
+		reported = histogram.percentile(percentile)
+		assert exact <= reported <= exact * (1 + 1 / 128), f"p{percentile} was {reported}, expected {exact}"
+	first_half.merge(LatencyHistogram.from_json(second_half.to_json()))
+	assert first_half.to_json() == histogram.to_json(), "merged histogram mismatch"
+
+def test_benchmark_memory_is_flat(small_count=10_000, large_count=1_000_000):
+	""" 
+	Checks that print_benchmark (and the measure_calls loop under it) uses about as much memory for large_count calls as for small_count calls.
+	Raises an AssertionError if the peak grows with the amount of calls.
+	"""
+	def peak_of_benchmark(count):
+		with contextlib.redirect_stdout(io.StringIO()):
+			_, _, peak = measure_memory(print_benchmark(count, batch_size=10, warmup=10, subtract_overhead=True)(max), 1, 2)
+		return peak
+	small_peak = peak_of_benchmark(small_count)
+	large_peak = peak_of_benchmark(large_count)
+	# the histogram grows with the longest time recorded (a slow outlier call adds up to tens of KiB), never with the amount of calls
+	assert large_peak <= small_peak + 64 * 1024, f"peak grew from {small_peak} bytes to {large_peak} bytes"
+
+def test_complexity_analysis():
+	""" 
+	Feeds timings with known growths into the complexity analysis and checks which operations are flagged as not scaling as documented.
+	Raises an AssertionError on the first mismatch.
+	"""
+	sizes = [2_000 * 2 ** step for step in range(7)]
+	growths = {
+		("hash", "find_hit"): lambda size: 150, # documented O(1)
+		("hash", "find_miss"): lambda size: 150 + 0.01 * size, # documented O(1), grows linearly
+		("binary", "find_hit"): lambda size: 300 + 40 * math.log2(size), # documented O(log n)
+		("binary", "find_miss"): lambda size: 300 + 0.05 * size, # documented O(log n), grows linearly
+		("binary", "unshelve"): lambda size: 2_000 + 0.001 * size, # documented O(n), hidden by a constant cost
+		("binary", "shelve"): lambda size: 500 + 0.5 * size, # documented O(n)
+	}
+	results = [{"size": size, "backend": backend, "operation": operation, "p50_ns": growth(size)} for (backend, operation), growth in growths.items() for size in sizes]
+	matches = {(analysis["backend"], analysis["operation"]): analysis["matches"] for analysis in analyse(results)}
+	expected = {("hash", "find_hit"): True, ("hash", "find_miss"): False, ("binary", "find_hit"): True, ("binary", "find_miss"): False, ("binary", "unshelve"): False, ("binary", "shelve"): True}
+	assert matches == expected, f"flagged operations mismatch: {matches}"
+	report = markdown_report(analyse(results))
+	assert "3 operations do not scale as documented" in report and report.count("**MISMATCH**") == 3, "the report does not list the mismatches"
+
+def test_deep_getsizeof():
+	""" 
+	Checks that deep_getsizeof follows __slots__ and containers and counts objects shared by several containers once.
+	Raises an AssertionError on the first mismatch.
+	"""
+	title = "A title long enough not to be interned by the interpreter " * 4
+	book = Book(title, None)
+	assert deep_getsizeof(book) == sys.getsizeof(book) + sys.getsizeof(title) + sys.getsizeof(None), "book size mismatch"
+	books = [book, book]
+	assert deep_getsizeof(books) == sys.getsizeof(books) + deep_getsizeof(book), "a shared book was counted twice"
+	assert deep_getsizeof({title: books}) == sys.getsizeof({title: books}) + deep_getsizeof(books), "a shared title was counted twice"
+
+if __name__ == "__main__":
+	stress_test_hash_map_lms()
+	print("HashMapLMS stress test passed.")
+	test_batch_keys()
+	print("Batch keys test passed" + (" (numpy is not installed, so only the fallback was checked)." if title_keys.numpy is None else "."))
+	test_snapshot_round_trip()
+	print("Snapshot round trip test passed.")
+	test_case_insensitive_lookup()
+	print("Case-insensitive lookup test passed.")
+	test_parallel_csv_read()
+	print("Parallel csv read test passed.")
+	test_csv_error_lines()
+	print("Csv error line test passed.")
+	test_sorted_block_list()
+	print("SortedBlockList test passed.")
+	test_batch_operations()
+	print("Batch operations test passed.")
+	test_self_organising_lms()
+	print("SelfOrganisingLMS test passed.")
+	test_author_index()
+	print("Author index test passed.")
+	test_prefix_pagination()
+	print("Prefix pagination test passed.")
+	test_fuzzy_search()
+	print("Fuzzy search test passed.")
+	test_full_text_search()
+	print("Full-text search test passed.")
+	test_lookup_cache()
+	print("Lookup cache test passed.")
+	for name, lms in (
+		("ConcurrentLMS(HashMapLMS)", ConcurrentLMS(HashMapLMS([]))),
+		("ConcurrentLMS(BinarySearchLMS)", ConcurrentLMS(BinarySearchLMS([]))),
+		("StripedLMS(HashMapLMS)", StripedLMS([], HashMapLMS)),
+		("StripedLMS(SortedBlocksLMS)", StripedLMS([], SortedBlocksLMS)),
+	):
+		stress_test_concurrent_lms(lms)
+		print(f"{name} concurrent stress test passed.")
+	test_striped_lms_copy_policy()
+	print("StripedLMS copy policy test passed.")
+	test_process_sharded_lms()
+	print("ProcessShardedLMS test passed.")
+	test_library_server()
+	print("Library server test passed.")
+	test_library_server_errors()
+	print("Library server error test passed.")
+	test_latency_histogram()
+	print("Latency histogram test passed.")
+	test_deep_getsizeof()
+	print("Deep getsizeof test passed.")
+	test_complexity_analysis()
+	print("Complexity analysis test passed.")
+	test_benchmark_memory_is_flat()
+	print("Flat benchmark memory test passed.")
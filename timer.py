@@ -1,5 +1,10 @@
 import time
 import math
+import json
+import gc
+import itertools
+import functools
+from array import array
 from enum import Enum
 
 ##################################################
@@ -25,7 +30,7 @@ class SecondsFormatter(Enum):
 	def convert(self, nanoseconds):
 		converted_form = self
 		if self is SecondsFormatter.AUTO:
-			power = math.floor(math.log(nanoseconds, 10))
+			power = math.floor(math.log(nanoseconds, 10)) if nanoseconds > 0 else 0
 			if power <= 2:
 				converted_form = SecondsFormatter.NANOSECONDS
 			elif 3 <= power <= 5:
@@ -38,27 +43,151 @@ class SecondsFormatter(Enum):
 		converted_time_name = converted_form.name.lower()
 		return (converted_time, converted_time_name)
 
-class Benchmarker:
-	""" Used to generate execution time statistics from function calls. """
+class LatencyHistogram:
+	""" 
+	A log-linear (HDR-style) histogram of times, used to report percentiles in fixed memory. 
 
-	def __init__(self, total_formatter=SecondsFormatter.AUTO, stats_formatter=SecondsFormatter.AUTO):
-		""" Creates a new benchmarker. """
+	Times below 2 ** sub_bucket_bits nanoseconds get a bucket each. Above that, every power of two is split into 2 ** (sub_bucket_bits - 1) buckets, 
+		so a recorded time is off by at most 1 / 2 ** (sub_bucket_bits - 1) of itself (0.8% by default) -- whether it is 1 microsecond or 1 hour. 
+	Recording is O(1) and the memory used only depends on the longest time recorded (about 40 KB for times up to an hour), never on the amount of times. 
+
+	Histograms with the same sub_bucket_bits can be merged (e.g. from separate runs or processes) and exported as JSON. 
+	"""
+
+	def __init__(self, sub_bucket_bits=8):
+		""" 
+		Creates a new empty histogram. 
+
+		sub_bucket_bits (optional) - the precision of the histogram (see above). 
+		"""
+		if sub_bucket_bits < 2:
+			raise ValueError("sub_bucket_bits must be greater or equal to 2")
+		self._sub_bucket_bits = sub_bucket_bits
+		self._counts = array('Q')
 		self._count = 0
 		self._total_ns = 0
 		self._min_ns = math.inf
 		self._max_ns = 0
+
+	def record(self, nanoseconds, count=1):
+		""" Records a time (in nanoseconds) count times. """
+		index = self._bucket_index(int(nanoseconds))
+		if index >= len(self._counts):
+			self._counts.extend([0] * (index + 1 - len(self._counts)))
+		self._counts[index] += count
+		self._count += count
+		self._total_ns += nanoseconds * count
+		self._min_ns = min(self._min_ns, nanoseconds)
+		self._max_ns = max(self._max_ns, nanoseconds)
+
+	def count(self):
+		""" Returns the amount of times recorded. """
+		return self._count
+
+	def total(self):
+		""" Returns the sum of the times recorded in nanoseconds. """
+		return self._total_ns
+
+	def minimum(self):
+		""" Returns the shortest time recorded in nanoseconds (exact). """
+		return self._min_ns
+
+	def maximum(self):
+		""" Returns the longest time recorded in nanoseconds (exact). """
+		return self._max_ns
+
+	def percentile(self, percentile):
+		""" 
+		Returns the time (in nanoseconds) that percentile percent of the recorded times are shorter or equal to (e.g. percentile(99) is the p99). 
+		The time is the upper end of its bucket (never more than the maximum), so it is never lower than the exact percentile. 
+		"""
+		if self._count <= 0:
+			raise AttributeError("Must record times before asking for percentiles.")
+		if not 0 <= percentile <= 100:
+			raise ValueError("percentile must be between 0 and 100")
+		wanted_count = max(1, math.ceil(self._count * percentile / 100))
+		seen_count = 0
+		for index, bucket_count in enumerate(self._counts):
+			seen_count += bucket_count
+			if seen_count >= wanted_count:
+				return min(max(self._highest_value_of_bucket(index), self._min_ns), self._max_ns)
+		return self._max_ns
+
+	def merge(self, other):
+		""" Adds every time recorded by other (a histogram with the same sub_bucket_bits) to this histogram. """
+		if other._sub_bucket_bits != self._sub_bucket_bits:
+			raise ValueError("only histograms with the same sub_bucket_bits can be merged")
+		if len(other._counts) > len(self._counts):
+			self._counts.extend([0] * (len(other._counts) - len(self._counts)))
+		for index, bucket_count in enumerate(other._counts):
+			if bucket_count:
+				self._counts[index] += bucket_count
+		self._count += other._count
+		self._total_ns += other._total_ns
+		self._min_ns = min(self._min_ns, other._min_ns)
+		self._max_ns = max(self._max_ns, other._max_ns)
+
+	def to_json(self):
+		""" Returns the histogram as a JSON string (only buckets holding times are written). """
+		return json.dumps({
+			"sub_bucket_bits": self._sub_bucket_bits,
+			"count": self._count,
+			"total_ns": self._total_ns,
+			"min_ns": None if self._count == 0 else self._min_ns,
+			"max_ns": self._max_ns,
+			"buckets": [[index, bucket_count] for index, bucket_count in enumerate(self._counts) if bucket_count],
+		})
+
+	@classmethod
+	def from_json(cls, text):
+		""" Returns the histogram written as JSON by to_json. """
+		data = json.loads(text)
+		histogram = cls(data["sub_bucket_bits"])
+		for index, bucket_count in data["buckets"]:
+			if index >= len(histogram._counts):
+				histogram._counts.extend([0] * (index + 1 - len(histogram._counts)))
+			histogram._counts[index] = bucket_count
+		histogram._count = data["count"]
+		histogram._total_ns = data["total_ns"]
+		histogram._min_ns = math.inf if data["min_ns"] is None else data["min_ns"]
+		histogram._max_ns = data["max_ns"]
+		return histogram
+
+	def _bucket_index(self, nanoseconds):
+		""" Returns the index of the bucket of a time. """
+		if nanoseconds < 1 << self._sub_bucket_bits:
+			return max(nanoseconds, 0)
+		# the time is split into a power of two (exponent) and its sub_bucket_bits most significant bits
+		exponent = nanoseconds.bit_length() - self._sub_bucket_bits
+		return (exponent << (self._sub_bucket_bits - 1)) + (nanoseconds >> exponent)
+
+	def _highest_value_of_bucket(self, index):
+		""" Returns the longest time that falls in the bucket at index. """
+		if index < 1 << self._sub_bucket_bits:
+			return index
+		exponent = (index >> (self._sub_bucket_bits - 1)) - 1
+		significant_bits = index - (exponent << (self._sub_bucket_bits - 1))
+		return ((significant_bits + 1) << exponent) - 1
+
+class Benchmarker:
+	""" 
+	Used to generate execution time statistics from function calls. 
+	Times are recorded in a LatencyHistogram, so percentiles can be reported and memory stays fixed no matter how many times are added. 
+	"""
+
+	def __init__(self, total_formatter=SecondsFormatter.AUTO, stats_formatter=SecondsFormatter.AUTO):
+		""" Creates a new benchmarker. """
+		self._histogram = LatencyHistogram()
 		self._total_formatter = total_formatter
 		self._stats_formatter = stats_formatter
 
-	def add_time(self, nanoseconds):
+	def add_time(self, nanoseconds, count=1):
 		""" 
 		Add the execution time to the benchmarker. 
 		Added time must be in nanoseconds. 
+		If count is specified, the time is added count times (e.g. the average time of each call in a batch of count calls). 
 		"""
-		self._count += 1
-		self._total_ns += nanoseconds
-		self._min_ns = min(self._min_ns, nanoseconds)
-		self._max_ns = max(self._max_ns, nanoseconds)
+		self._histogram.record(nanoseconds, count)
 
 	def add_function_call(self, function):
 		""" 
@@ -86,23 +215,35 @@ class Benchmarker:
 
 	def count(self):
 		""" Returns the total amount of executions measured. """
-		return self._count
+		return self._histogram.count()
 
 	def total(self):
 		""" Returns the total amount of execution time measured in nanoseconds. """
-		return self._total_ns
+		return self._histogram.total()
 
 	def minimum(self):
 		""" Returns the minimum amount of execution time measured in nanoseconds. """
-		return self._min_ns
+		return self._histogram.minimum()
 
 	def maximum(self):
 		""" Returns the maximum amount of execution time measured in nanoseconds. """
-		return self._max_ns
+		return self._histogram.maximum()
 
 	def average(self):
 		""" Returns the average amount of execution time measured in nanoseconds. """
-		return self._total_ns / self._count
+		return self._histogram.total() / self._histogram.count()
+
+	def percentile(self, percentile):
+		""" Returns the execution time in nanoseconds that percentile percent of the executions were faster or equal to (within 0.8%, see LatencyHistogram). """
+		return self._histogram.percentile(percentile)
+
+	def histogram(self):
+		""" Returns the histogram holding the measured times (e.g. to export it with to_json). """
+		return self._histogram
+
+	def merge(self, other):
+		""" Adds every time measured by other (a Benchmarker or a LatencyHistogram, e.g. loaded from another process) to this benchmarker. """
+		self._histogram.merge(other.histogram() if isinstance(other, Benchmarker) else other)
 
 	def set_total_formatter(self, total_formatter):
 		""" Sets the total formatter to the specified seconds formatter. """
@@ -115,18 +256,26 @@ class Benchmarker:
 	def __str__(self):
 		""" Returns a report of all of the stats generated from benchmarking. """
 
-		if self._count <= 0:
+		if self.count() <= 0:
 			raise AttributeError("Must add times to benchmarker before printing results.")
 
 		converted_total, converted_total_name = self._total_formatter.convert(self.total())
 		converted_minimum, converted_minimum_name = self._stats_formatter.convert(self.minimum())
 		converted_average, converted_average_name = self._stats_formatter.convert(self.average())
+		converted_p50, converted_p50_name = self._stats_formatter.convert(self.percentile(50))
+		converted_p90, converted_p90_name = self._stats_formatter.convert(self.percentile(90))
+		converted_p99, converted_p99_name = self._stats_formatter.convert(self.percentile(99))
+		converted_p999, converted_p999_name = self._stats_formatter.convert(self.percentile(99.9))
 		converted_maximum, converted_maximum_name = self._stats_formatter.convert(self.maximum())
 
-		report = f"""{self._count} executions:
+		report = f"""{self.count()} executions:
 total ... {converted_total:.3f} {converted_total_name} 
 min ..... {converted_minimum:.3f} {converted_minimum_name}
 avg ..... {converted_average:.3f} {converted_average_name}
+p50 ..... {converted_p50:.3f} {converted_p50_name}
+p90 ..... {converted_p90:.3f} {converted_p90_name}
+p99 ..... {converted_p99:.3f} {converted_p99_name}
+p99.9 ... {converted_p999:.3f} {converted_p999_name}
 max ..... {converted_maximum:.3f} {converted_maximum_name}"""
 
 		return report
@@ -233,11 +382,100 @@ def time_execution(function):
 		return (result, execution_time_in_ns)
 	return time_execution_wrapper
 
+########################################################
+############### LOW-OVERHEAD MEASUREMENT ###############
+########################################################
+
+def _do_nothing(*args):
+	""" Used in place of the measured function to measure the overhead of timing it. """
+	pass
+
+def _time_batch(function, batch):
+	""" Calls function once with every tuple of args in batch and returns (the last result, the time taken in nanoseconds). """
+	perf_counter_ns = time.perf_counter_ns
+	result = None
+	start = perf_counter_ns()
+	for args in batch:
+		result = function(*args)
+	end = perf_counter_ns()
+	return (result, end - start)
+
+def measure_overhead(batch, amount_of_samples=201):
+	""" 
+	Returns the median time (in nanoseconds) taken to time batch (a list of tuples of args) with a function that does nothing. 
+	This is the timer, loop and call overhead included in every batch timed by measure_calls. 
+	"""
+	times = sorted(_time_batch(_do_nothing, batch)[1] for _ in range(amount_of_samples))
+	return times[len(times) // 2]
+
+def measure_calls(function, arguments, batch_size=1, warmup=0, disable_gc=False, subtract_overhead=False, benchmarker=None):
+	""" 
+	Calls function once with every tuple of args in arguments, adding the execution times to a benchmarker. 
+	Returns (the last result, the benchmarker). 
+	Unlike Benchmarker.add_function_call, nothing is created between calls, so the only overhead is the timer and the call itself. 
+
+	function - the function to measure.
+	arguments - the tuples of args to call function with (e.g. [(title,) for title in titles]). 
+		Any iterable can be used -- it is read lazily, so measuring many calls (e.g. from itertools.repeat) uses no more memory than measuring a few.
+	batch_size (optional) - the amount of calls timed together. Each call of a batch is added with the average time of the batch.
+		Should be used for operations taking less than a microsecond, which are shorter than the timer's resolution and overhead.
+	warmup (optional) - the amount of tuples of args taken first from arguments and called untimed, so caches and lazily built state are ready.
+		Should not be used with functions that change what later calls do (e.g. shelving the same books twice).
+	disable_gc (optional) - if True, the garbage collector is run first and then disabled while measuring, so no collection lands in a timed batch. 
+	subtract_overhead (optional) - if True, the timer and call overhead (see measure_overhead) is subtracted from every batch.
+	benchmarker (optional) - the benchmarker to add the times to (a new one is created by default).
+
+	USAGE:
+
+	result, benchmarker = measure_calls(library.find, [(title,) for title in titles], batch_size=100, warmup=1000, disable_gc=True, subtract_overhead=True)
+	print(benchmarker)
+
+	"""
+	if batch_size <= 0:
+		raise ValueError("batch_size must be greater or equal to 1")
+	if benchmarker is None:
+		benchmarker = Benchmarker()
+	arguments = iter(arguments)
+	for args in itertools.islice(arguments, warmup):
+		function(*args)
+	gc_was_enabled = gc.isenabled()
+	if disable_gc:
+		gc.collect()
+		gc.disable()
+	try:
+		result = None
+		overhead_ns = None
+		# one buffer is filled again for every batch, so nothing is allocated per call
+		batch = [None] * batch_size
+		while True:
+			amount_of_calls = 0
+			for args in itertools.islice(arguments, batch_size):
+				batch[amount_of_calls] = args
+				amount_of_calls += 1
+			if amount_of_calls == 0:
+				break
+			timed_batch = batch if amount_of_calls == batch_size else batch[:amount_of_calls]
+			result, execution_time_in_ns = _time_batch(function, timed_batch)
+			if subtract_overhead:
+				if amount_of_calls < batch_size:
+					execution_time_in_ns -= measure_overhead(timed_batch)
+				else:
+					if overhead_ns is None:
+						overhead_ns = measure_overhead(batch)
+					execution_time_in_ns -= overhead_ns
+			benchmarker.add_time(max(0, execution_time_in_ns) / amount_of_calls, amount_of_calls)
+			if amount_of_calls < batch_size:
+				break
+	finally:
+		if disable_gc and gc_was_enabled:
+			gc.enable()
+	return (result, benchmarker)
+
 #######################################################
 ############### BENCHMARKING DECORATORS ###############
 #######################################################
 
-def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatter=SecondsFormatter.AUTO):
+def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatter=SecondsFormatter.AUTO, batch_size=1, warmup=0, disable_gc=False, subtract_overhead=False):
 	""" 
 	A decorator used to print the execution time statistics of the given function over count calls with the specified formatting. 
 
@@ -245,6 +483,7 @@ def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatte
 		If the count specified is not at least 1, then a ValueError will be raised.
 	total_formatter (optional) - the format to print the total execution time with (e.g. SecondsFormatter.SECONDS will print the time in seconds).
 	stats_formatter (optional) - the format to print the execution time statistics with (such as minimum, maximum, average, etc.).
+	batch_size, warmup, disable_gc and subtract_overhead (optional) - how the calls are measured (see measure_calls).
 
 	If the function returns a value, only the last one is kept and returned. 
 
@@ -267,6 +506,10 @@ def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatte
 	total ... 1.182 seconds
 	min ..... 84.836 milliseconds
 	avg ..... 118.225 milliseconds
+	p50 ..... 116.392 milliseconds
+	p90 ..... 141.557 milliseconds
+	p99 ..... 147.665 milliseconds
+	p99.9 ... 147.665 milliseconds
 	max ..... 147.665 milliseconds"
 
 	#################### METHOD 2 ####################
@@ -284,6 +527,10 @@ def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatte
 	total ... 1.182 seconds
 	min ..... 84.836 milliseconds
 	avg ..... 118.225 milliseconds
+	p50 ..... 116.392 milliseconds
+	p90 ..... 141.557 milliseconds
+	p99 ..... 147.665 milliseconds
+	p99.9 ... 147.665 milliseconds
 	max ..... 147.665 milliseconds"
 
 	#################### FORMATTING ####################
@@ -306,22 +553,27 @@ def print_benchmark(count, total_formatter=SecondsFormatter.AUTO, stats_formatte
 
 	In both examples, the benchmarking results (total and stats) will be displayed in microseconds.
 
+	#################### LOW-OVERHEAD MODE ####################
+	Operations taking less than a microsecond (e.g. HashMapLMS.find) are dominated by the timer and call overhead. 
+	The keyword arguments of measure_calls (batch_size, warmup, disable_gc and subtract_overhead) can be used to measure them. 
+
+	print_benchmark(1_000_000, batch_size=100, warmup=1000, disable_gc=True, subtract_overhead=True)(library.find)(title)
+
 	"""
 	if count <= 0: 
 		raise ValueError("count must be greater or equal to 1 to benchmark")
 
 	def benchmark_decorator(function):
 		def benchmark_wrapper(*args, **kwargs):
-			benchmarker = Benchmarker(total_formatter, stats_formatter)
-			for _ in range(count):
-				result = benchmarker.add_function_call(function)(*args, **kwargs)
+			measured_function = functools.partial(function, **kwargs) if kwargs else function
+			result, benchmarker = measure_calls(measured_function, itertools.repeat(args, count + warmup), batch_size, warmup, disable_gc, subtract_overhead, Benchmarker(total_formatter, stats_formatter))
 			print(f"--- {function.__name__} benchmark results ---")
 			print(benchmarker)
 			return result
 		return benchmark_wrapper
 	return benchmark_decorator
 
-def benchmark(count):
+def benchmark(count, batch_size=1, warmup=0, disable_gc=False, subtract_overhead=False):
 	""" 
 	A decorator used to wrap the return value with the execution time statistics of the given function over count calls. 
 	All functions decorated with this will have their return type changed from <result> to <(result, benchmark)>, 
@@ -329,6 +581,7 @@ def benchmark(count):
 
 	count - the amount of times to execute the function to gather data.
 		If the count specified is not at least 1, then a ValueError will be raised.
+	batch_size, warmup, disable_gc and subtract_overhead (optional) - how the calls are measured (see measure_calls).
 
 	If the function returns a value, only the last one is kept and returned. 
 
@@ -374,15 +627,19 @@ def benchmark(count):
 
 	In both examples, the benchmarking results (total and stats) will be displayed in microseconds.
 
+	#################### LOW-OVERHEAD MODE ####################
+	Operations taking less than a microsecond (e.g. HashMapLMS.find) are dominated by the timer and call overhead. 
+	The keyword arguments of measure_calls (batch_size, warmup, disable_gc and subtract_overhead) can be used to measure them. 
+
+	benchmark(1_000_000, batch_size=100, warmup=1000, disable_gc=True, subtract_overhead=True)(library.find)(title)
+
 	"""
 	if count <= 0: 
 		raise ValueError("count must be greater or equal to 1 to benchmark")
 
 	def benchmark_decorator(function):
 		def benchmark_wrapper(*args, **kwargs):
-			benchmarker = Benchmarker()
-			for _ in range(count):
-				result = benchmarker.add_function_call(function)(*args, **kwargs)
-			return (result, benchmarker)
+			measured_function = functools.partial(function, **kwargs) if kwargs else function
+			return measure_calls(measured_function, itertools.repeat(args, count + warmup), batch_size, warmup, disable_gc, subtract_overhead)
 		return benchmark_wrapper
 	return benchmark_decorator
\ No newline at end of file
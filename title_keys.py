@@ -1,3 +1,17 @@
+from collections import Counter
+
+# numpy is optional -- batch_keys falls back to plain python when it is not installed
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_MASK_64 = 2**64 - 1
+_FNV_OFFSET_BASIS = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_POLYNOMIAL_BASE = 1_000_003
+_BATCH_SIZE = 65_536
+
 def basic_key(title):
     """ 
     A basic key generator that just sums the ord value of the characters of the title. 
@@ -11,3 +25,118 @@ def positional_ord(title):
     Better at preventing collisions. 
     """
     return sum(map(lambda i: ord(i[1]) * i[0], enumerate(title)))
+
+def fnv1a_64(title):
+    """
+    A key generator that hashes the UTF-8 bytes of the title with 64-bit FNV-1a.
+    Keys are spread over the whole 64-bit range, so different titles practically never collide.
+    """
+    key = _FNV_OFFSET_BASIS
+    for byte in title.encode('utf-8'):
+        key = ((key ^ byte) * _FNV_PRIME) & _MASK_64
+    return key
+
+def polynomial_rolling(title):
+    """
+    A key generator that evaluates the UTF-8 bytes of the title as a polynomial (mod 2^64).
+    Unlike basic_key, the order of the characters matters, so anagrams do not collide.
+    """
+    key = 0
+    for byte in title.encode('utf-8'):
+        key = (key * _POLYNOMIAL_BASE + byte + 1) & _MASK_64
+    return key
+
+KEY_FUNCTIONS = (basic_key, positional_ord, fnv1a_64, polynomial_rolling)
+
+def batch_keys(titles, key):
+    """
+    Returns the keys of all of the titles (as a list of ints), as if key was called for every title.
+
+    When numpy is installed, the key functions defined here are computed for many titles at once.
+    Other key functions (or a missing numpy) fall back to calling key for every title.
+    """
+    titles = titles if isinstance(titles, list) else list(titles)
+    vectorised_key = _VECTORISED_KEYS.get(key)
+    if numpy is None or vectorised_key is None:
+        return list(map(key, titles))
+    keys = []
+    # batches bound the size of the padded character matrices
+    for start in range(0, len(titles), _BATCH_SIZE):
+        keys.extend(vectorised_key(titles[start:start + _BATCH_SIZE]))
+    return keys
+
+def collision_report(titles, key):
+    """
+    Measures how well key separates the distinct titles of a catalog.
+
+    Returns a dictionary with:
+        titles ... the amount of distinct titles.
+        keys ..... the amount of distinct keys.
+        max_run .. the most titles that share one key (the longest run a sorted search walks through).
+        mean_run . the average amount of titles per key.
+        expected_run - the average run length seen by a lookup of a random title.
+    """
+    distinct_titles = list(set(titles))
+    run_lengths = Counter(batch_keys(distinct_titles, key)).values()
+    amount_of_titles = len(distinct_titles)
+    amount_of_keys = len(run_lengths)
+    return {
+        "titles": amount_of_titles,
+        "keys": amount_of_keys,
+        "max_run": max(run_lengths, default=0),
+        "mean_run": amount_of_titles / amount_of_keys if amount_of_keys else 0.0,
+        "expected_run": sum(length * length for length in run_lengths) / amount_of_titles if amount_of_titles else 0.0,
+    }
+
+def print_collision_report(titles, keys=KEY_FUNCTIONS):
+    """ Prints the collision report of every key function in keys for the titles of a catalog. """
+    print(f"{'key':<20} {'titles':>10} {'keys':>10} {'max run':>8} {'mean run':>9} {'expected run':>13}")
+    for key in keys:
+        report = collision_report(titles, key)
+        print(f"{key.__name__:<20} {report['titles']:>10} {report['keys']:>10} {report['max_run']:>8} {report['mean_run']:>9.3f} {report['expected_run']:>13.3f}")
+
+def _code_point_matrix(titles):
+    """ Returns the code points of the titles as a matrix (one row per title), padded with zeros. """
+    width = max(map(len, titles))
+    return numpy.array(titles, dtype=f"U{max(width, 1)}").view(numpy.uint32).reshape(len(titles), max(width, 1)).astype(numpy.int64)
+
+def _byte_matrix(titles):
+    """ Returns (the UTF-8 bytes of the titles as a matrix padded with zeros, the byte length of every title). """
+    encoded_titles = [title.encode('utf-8') for title in titles]
+    lengths = numpy.fromiter(map(len, encoded_titles), dtype=numpy.int64, count=len(encoded_titles))
+    width = max(int(lengths.max()), 1)
+    matrix = numpy.array(encoded_titles, dtype=f"S{width}").view(numpy.uint8).reshape(len(encoded_titles), width)
+    return (matrix, lengths)
+
+def _basic_key_batch(titles):
+    return _code_point_matrix(titles).sum(axis=1).tolist()
+
+def _positional_ord_batch(titles):
+    code_points = _code_point_matrix(titles)
+    return (code_points * numpy.arange(code_points.shape[1], dtype=numpy.int64)).sum(axis=1).tolist()
+
+def _fnv1a_64_batch(titles):
+    matrix, lengths = _byte_matrix(titles)
+    keys = numpy.full(len(titles), _FNV_OFFSET_BASIS, dtype=numpy.uint64)
+    prime = numpy.uint64(_FNV_PRIME)
+    for position in range(matrix.shape[1]):
+        # uint64 arithmetic wraps around, which is the same as masking with 2^64 - 1
+        hashed = (keys ^ matrix[:, position]) * prime
+        keys = numpy.where(lengths > position, hashed, keys)
+    return keys.tolist()
+
+def _polynomial_rolling_batch(titles):
+    matrix, lengths = _byte_matrix(titles)
+    keys = numpy.zeros(len(titles), dtype=numpy.uint64)
+    base = numpy.uint64(_POLYNOMIAL_BASE)
+    for position in range(matrix.shape[1]):
+        rolled = keys * base + matrix[:, position] + numpy.uint64(1)
+        keys = numpy.where(lengths > position, rolled, keys)
+    return keys.tolist()
+
+_VECTORISED_KEYS = {
+    basic_key: _basic_key_batch,
+    positional_ord: _positional_ord_batch,
+    fnv1a_64: _fnv1a_64_batch,
+    polynomial_rolling: _polynomial_rolling_batch,
+}
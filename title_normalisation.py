@@ -0,0 +1,53 @@
+import unicodedata
+
+class TitleNormaliser:
+    """
+    A policy deciding which titles a library treats as equal.
+    Libraries normalise a title once when its book is shelved, store the result and compare lookups against it.
+
+    nfkc - applies Unicode NFKC normalisation (e.g. "ﬁ" becomes "fi" and full-width letters become ASCII).
+    casefold - ignores case (e.g. "Data Smart" and "data smart" are equal).
+    collapse_whitespace - ignores leading and trailing whitespace and treats runs of whitespace as one space.
+    """
+
+    def __init__(self, nfkc=False, casefold=False, collapse_whitespace=False):
+        """ Creates a normaliser with the specified options. All options are off by default (titles are compared exactly). """
+        self._nfkc = nfkc
+        self._casefold = casefold
+        self._collapse_whitespace = collapse_whitespace
+
+    def __call__(self, title):
+        """ Returns the normalised form of title. """
+        if self._nfkc:
+            title = unicodedata.normalize("NFKC", title)
+        if self._casefold:
+            title = title.casefold()
+            if self._nfkc:
+                # casefolding can produce characters that NFKC would change again
+                title = unicodedata.normalize("NFKC", title)
+        if self._collapse_whitespace:
+            title = " ".join(title.split())
+        return title
+
+    def options(self):
+        """ Returns the options of the normaliser as a dictionary (usable as keyword arguments to create an equal normaliser). """
+        return {"nfkc": self._nfkc, "casefold": self._casefold, "collapse_whitespace": self._collapse_whitespace}
+
+    def is_exact(self):
+        """ Returns True if the normaliser leaves titles unchanged. """
+        return not any(self.options().values())
+
+    def __eq__(self, other):
+        return isinstance(other, TitleNormaliser) and self.options() == other.options()
+
+    def __hash__(self):
+        return hash(tuple(self.options().items()))
+
+    def __repr__(self):
+        return "TitleNormaliser(" + ", ".join(f"{name}={value}" for name, value in self.options().items()) + ")"
+
+# compares titles exactly, as libraries always did (the default)
+EXACT = TitleNormaliser()
+
+# ignores case, whitespace differences and Unicode compatibility forms
+CASE_INSENSITIVE = TitleNormaliser(nfkc=True, casefold=True, collapse_whitespace=True)